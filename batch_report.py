@@ -0,0 +1,122 @@
+import sys
+import os
+import time
+import datetime
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+import pandas as pd
+
+from data.data_handler import load_activities, load_user_id
+from data.config import load_config
+from utils.intervals import week_edges, split_activities
+from utils.pdf_exporter import generate_weekly_report_pdf
+
+def week_starts_between(start_date, end_date):
+    """Returns the Monday of every week that overlaps start_date..end_date."""
+    first_monday = start_date - datetime.timedelta(days=start_date.weekday())
+    weeks = []
+    week_start = first_monday
+    while week_start <= end_date:
+        weeks.append(week_start)
+        week_start += datetime.timedelta(days=7)
+    return weeks
+
+def load_directory(data_dir, week_starts):
+    """
+    Parses one tracker_data directory once and returns its config, user id and
+    the activity rows for each requested week, already clipped to the week.
+    """
+    config = load_config(os.path.join(data_dir, 'config.csv'))
+    user_id = load_user_id(os.path.join(data_dir, 'user_id.txt')) or os.path.basename(os.path.abspath(data_dir))
+    activities_df = load_activities(os.path.join(data_dir, 'activities.csv'))
+    weekly_slices = {week_start: split_activities(activities_df, week_edges(week_start)) for week_start in week_starts}
+    return data_dir, user_id, config, len(activities_df), weekly_slices
+
+def write_weekly_summary_csv(file_path, week_start_date, weekly_data_df, config):
+    """Writes per-day total and productive seconds for one week."""
+    productive_apps = config.get('productivity_apps', [])
+    productive_mask = weekly_data_df['app_name'].str.contains('|'.join(productive_apps), case=False, na=False)
+    days = weekly_data_df['start_time'].dt.date
+    date_range = pd.date_range(start=week_start_date, periods=7).date
+    summary = pd.DataFrame({
+        'total_seconds': weekly_data_df.groupby(days)['duration_seconds'].sum(),
+        'productive_seconds': weekly_data_df[productive_mask].groupby(days[productive_mask])['duration_seconds'].sum(),
+    }).reindex(date_range, fill_value=0).fillna(0)
+    summary['focus_score'] = (summary['productive_seconds'] / summary['total_seconds'].where(summary['total_seconds'] > 0) * 100).fillna(0).round(1)
+    summary.index.name = 'date'
+    summary.to_csv(file_path)
+
+def generate_report(output_format, file_path, week_start_date, weekly_data_df, config, cache_dir):
+    """Worker task: writes a single weekly report and returns its path."""
+    if output_format == 'pdf':
+        generate_weekly_report_pdf(file_path, week_start_date, weekly_data_df, config, cache_dir=cache_dir)
+    else:
+        write_weekly_summary_csv(file_path, week_start_date, weekly_data_df, config)
+    return file_path
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate weekly productivity reports without the GUI.")
+    parser.add_argument('data_dirs', nargs='+', help="One or more tracker_data directories.")
+    parser.add_argument('--start', required=True, type=datetime.date.fromisoformat, help="First date (YYYY-MM-DD).")
+    parser.add_argument('--end', required=True, type=datetime.date.fromisoformat, help="Last date (YYYY-MM-DD).")
+    parser.add_argument('--format', choices=['pdf', 'csv'], default='pdf')
+    parser.add_argument('--output', default='reports', help="Output directory; one sub-folder per user id.")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Number of worker processes.")
+    parser.add_argument('--skip-empty', action='store_true', help="Don't write reports for weeks with no data.")
+    parser.add_argument('--no-cache', action='store_true', help="Don't reuse or store cached charts and reports.")
+    args = parser.parse_args()
+
+    if args.end < args.start:
+        parser.error("--end must not be before --start")
+    week_starts = week_starts_between(args.start, args.end)
+    started = time.perf_counter()
+    rows_parsed = 0
+    reports_written = 0
+    failures = 0
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        # --- Stage 1: parse each directory once, in parallel ---
+        load_futures = [pool.submit(load_directory, data_dir, week_starts) for data_dir in args.data_dirs]
+
+        # --- Stage 2: fan out one report per (directory, week) ---
+        report_futures = {}
+        for future in as_completed(load_futures):
+            try:
+                data_dir, user_id, config, row_count, weekly_slices = future.result()
+            except Exception as e:
+                print(f"Failed to load data directory: {e}", file=sys.stderr)
+                failures += 1
+                continue
+            rows_parsed += row_count
+            user_output_dir = os.path.join(args.output, user_id)
+            os.makedirs(user_output_dir, exist_ok=True)
+            for week_start, week_df in weekly_slices.items():
+                if args.skip_empty and week_df.empty:
+                    continue
+                prefix = 'Productivity_Report' if args.format == 'pdf' else 'Productivity_Summary'
+                file_path = os.path.join(user_output_dir, f"{prefix}_{week_start.strftime('%Y_%m_%d')}.{args.format}")
+                cache_dir = None if args.no_cache else os.path.join(data_dir, 'report_cache')
+                report_future = pool.submit(generate_report, args.format, file_path, week_start, week_df, config, cache_dir)
+                report_futures[report_future] = (data_dir, week_start)
+
+        for future in as_completed(report_futures):
+            data_dir, week_start = report_futures[future]
+            try:
+                future.result()
+                reports_written += 1
+            except Exception as e:
+                print(f"Failed report for {data_dir} week of {week_start}: {e}", file=sys.stderr)
+                failures += 1
+
+    elapsed = time.perf_counter() - started
+    print(f"Directories: {len(args.data_dirs)}  Weeks: {len(week_starts)}  Rows parsed: {rows_parsed:,}")
+    print(f"Reports written: {reports_written}  Failures: {failures}")
+    print(f"Elapsed: {elapsed:.2f}s  Throughput: {reports_written / elapsed if elapsed > 0 else 0:.1f} reports/s")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
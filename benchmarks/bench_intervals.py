@@ -0,0 +1,58 @@
+import sys
+import os
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from utils.intervals import clip_intervals, day_edges, split_activities, OverlapIndex
+
+def make_intervals(n, days=365, seed=0):
+    """Builds n random [start, end) intervals (int64 ns) spread over the given number of days."""
+    rng = np.random.default_rng(seed)
+    origin = pd.Timestamp('2024-01-01').value
+    starts = np.sort(origin + rng.integers(0, days * 86400, n, dtype=np.int64) * 10**9)
+    durations = rng.exponential(600, n).astype(np.int64) * 10**9 + 10**9
+    return starts, starts + durations, origin
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark interval clipping on synthetic data.")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    starts, ends, origin = make_intervals(args.rows, args.days)
+    start_date = pd.Timestamp(origin).date()
+    edges = day_edges(start_date, start_date + pd.Timedelta(days=args.days)).values.view(np.int64)
+
+    timings = []
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        rows, _, _, _ = clip_intervals(starts, ends, edges)
+        timings.append(time.perf_counter() - t0)
+    print(f"clip_intervals: {args.rows:,} intervals -> {len(rows):,} pieces, best {min(timings) * 1000:.1f} ms")
+
+    df = pd.DataFrame({
+        'app_name': 'VS Code',
+        'start_time': pd.to_datetime(starts),
+        'end_time': pd.to_datetime(ends),
+        'duration_seconds': (ends - starts) / 1e9,
+        'tags': '',
+    })
+    t0 = time.perf_counter()
+    split_df = split_activities(df, pd.to_datetime(edges))
+    print(f"split_activities: {len(split_df):,} rows in {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    t0 = time.perf_counter()
+    index = OverlapIndex(starts, ends)
+    build_ms = (time.perf_counter() - t0) * 1000
+    t0 = time.perf_counter()
+    overlaps = index.overlaps_any(starts + 1, starts + 2)
+    print(f"OverlapIndex: built in {build_ms:.1f} ms, {len(overlaps):,} overlap checks in {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+import sys
+import os
+import argparse
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from benchmarks.synthetic_data import generate_activities
+from data.compact_store import CompactActivityLog
+
+def frame_bytes(df):
+    return int(df.memory_usage(deep=True).sum())
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the resident size of the plain and compact activity history.")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--apps', type=int, default=200)
+    parser.add_argument('--tag-density', type=float, default=0.1)
+    parser.add_argument('--years', type=float, default=3.0)
+    args = parser.parse_args()
+
+    # Build the frame the way load_activities would hand it to the UI (object strings)
+    activities_df = generate_activities(args.rows, args.apps, args.tag_density, args.years)
+    activities_df['app_name'] = activities_df['app_name'].astype(object)
+    activities_df['tags'] = activities_df['tags'].astype(object)
+
+    compact_log = CompactActivityLog.from_frame(activities_df)
+    plain = frame_bytes(activities_df)
+    compact = compact_log.memory_usage_bytes()
+
+    print(f"Rows: {len(activities_df):,}  Apps: {args.apps}  Tag density: {args.tag_density}")
+    print(f"{'load_activities() DataFrame':<34} {plain / 2**20:10.1f} MiB")
+    print(f"{'CompactActivityLog (resident)':<34} {compact / 2**20:10.1f} MiB   ({plain / compact:.1f}x smaller)")
+    print(f"{'to_frame() view (transient)':<34} {frame_bytes(compact_log.to_frame()) / 2**20:10.1f} MiB")
+    for column in activities_df.columns:
+        print(f"  {column:<32} {int(activities_df[column].memory_usage(deep=True, index=False)) / 2**20:10.1f} MiB")
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,187 @@
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import datetime
+import tempfile
+
+# The tracker runs headless on Qt's offscreen platform
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from tracking.trace import VirtualClock, ReplayBackend, load_trace, write_trace
+
+SYNTHETIC_WINDOWS = [
+    "main.py - project - Visual Studio Code", "report.docx - Word", "Inbox - Outlook",
+    "GitHub - Google Chrome", "Stack Overflow - Google Chrome", "general | Slack",
+    "Zoom Meeting", "Windows PowerShell", "tracker - PyCharm", "Downloads - File Explorer",
+]
+# The stages reported, in pipeline order: poll the backend, classify, store, redraw
+STAGES = ['replay.check', 'ui.handle_activity_change', 'classify.get_clean_app_name',
+          'storage.append_activity', 'ui.refresh_views']
+
+def synthetic_trace(events, seed=0, start=None, check_interval_seconds=3, idle_threshold_minutes=5):
+    """A trace of `events` window switches with exponential dwell times and occasional idle periods."""
+    rng = random.Random(seed)
+    header = {'version': 1, 'start': start or datetime.datetime(2025, 1, 6, 9, 0),
+              'check_interval_seconds': check_interval_seconds, 'idle_threshold_minutes': idle_threshold_minutes}
+    trace, t = [], 0.0
+    while len(trace) < events:
+        trace.append({'t': round(t, 3), 'title': rng.choice(SYNTHETIC_WINDOWS)})
+        t += 1 + rng.expovariate(1 / 90)
+        if rng.random() < 0.03 and len(trace) < events:
+            idle = rng.uniform(120, 1800)
+            trace.append({'t': round(t, 3), 'idle': round(idle, 3)})
+            t += idle
+    return header, trace
+
+def replay(header, events, speed=0, idle_resolution='break'):
+    """
+    Feeds the trace through WindowDetector -> handle_activity_change -> storage of a
+    full ProductivityTrackerApp in the current directory. speed=0 runs as fast as
+    possible; otherwise the virtual clock runs `speed` times faster than real time.
+    Returns the wall-clock seconds taken and the number of detector checks.
+    """
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QTimer, QEventLoop
+    from data.config import default_config, save_config
+    from ui.main_window import ProductivityTrackerApp
+    from utils import metrics
+
+    app = QApplication.instance() or QApplication([])
+    os.makedirs('tracker_data', exist_ok=True)
+    save_config(dict(default_config(), check_interval_seconds=header['check_interval_seconds'],
+                     idle_threshold_minutes=header['idle_threshold_minutes']))
+
+    clock = VirtualClock(header['start'])
+    backend = ReplayBackend(header, events, clock)
+    window = ProductivityTrackerApp(detector_backend=backend, clock=clock.now, idle_resolution=idle_resolution)
+    # The replay drives the checks itself instead of the detector's real-time timer
+    detector = window.window_detector
+    detector.stop()
+    metrics.reset()
+
+    interval = header['check_interval_seconds']
+    checks = 0
+    def tick():
+        nonlocal checks
+        clock.advance(interval)
+        with metrics.timed('replay.check'):
+            detector.check_activity()
+        checks += 1
+
+    t0 = time.perf_counter()
+    if speed <= 0:
+        while not backend.finished():
+            tick()
+            if checks % 1000 == 0:
+                app.processEvents()
+    else:
+        loop = QEventLoop()
+        timer = QTimer()
+        timer.setInterval(max(int(interval * 1000 / speed), 0))
+        def scaled_tick():
+            tick()
+            if backend.finished():
+                timer.stop()
+                loop.quit()
+        timer.timeout.connect(scaled_tick)
+        timer.start()
+        loop.exec_()
+    # Close the open activity the way quitting the app does
+    window.on_app_exit()
+    return time.perf_counter() - t0, checks
+
+def _row_keys(df):
+    """Rows as comparable (app, start, end) tuples, to the second."""
+    return sorted(zip(df['app_name'].astype(str), df['start_time'].dt.floor('s').astype(str), df['end_time'].dt.floor('s').astype(str)))
+
+def compare_rows(written_df, expected_df):
+    written, expected = _row_keys(written_df), _row_keys(expected_df)
+    missing = sorted(set(expected) - set(written))
+    unexpected = sorted(set(written) - set(expected))
+    return {'expected_rows': len(expected), 'written_rows': len(written),
+            'missing': len(missing), 'unexpected': len(unexpected),
+            'first_missing': list(missing[0]) if missing else None,
+            'first_unexpected': list(unexpected[0]) if unexpected else None}
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a window-title trace through the tracking pipeline and report throughput.")
+    parser.add_argument('--trace', help="Trace to replay (see tracking/trace.py; record one with `python main.py --record-trace FILE`).")
+    parser.add_argument('--synthetic-events', type=int, default=5000, help="Without --trace, replay a synthetic trace of this many events.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--speed', type=float, default=0, help="Time scale factor (e.g. 60 = one minute per second); 0 runs as fast as possible.")
+    parser.add_argument('--idle', choices=['break', 'keep', 'discard'], default='break', help="How returns from idle are resolved.")
+    parser.add_argument('--expected', help="Activities CSV from an earlier run to compare the written rows against.")
+    parser.add_argument('--write-expected', help="Save the written rows as a CSV for later --expected runs.")
+    parser.add_argument('--save-trace', help="Save the synthetic trace used.")
+    parser.add_argument('--output', help="Write the report as JSON.")
+    args = parser.parse_args()
+
+    from data.data_handler import load_activities
+    from utils.metrics import snapshot
+
+    if args.trace:
+        header, events = load_trace(args.trace)
+    else:
+        header, events = synthetic_trace(args.synthetic_events, args.seed)
+        if args.save_trace:
+            write_trace(args.save_trace, header, events)
+
+    output_paths = [os.path.abspath(path) if path else None for path in (args.expected, args.write_expected, args.output)]
+    expected_path, write_expected_path, output_path = output_paths
+    original_cwd = os.getcwd()
+    # The tracker uses a relative tracker_data/ directory, so run inside a scratch one
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        os.chdir(scratch_dir)
+        try:
+            elapsed, checks = replay(header, events, args.speed, args.idle)
+            written_df = load_activities()
+            timings = snapshot()
+        finally:
+            os.chdir(original_cwd)
+
+    trace_seconds = max((event['t'] + event.get('idle', 0) for event in events), default=0)
+    print(f"Replayed {len(events):,} events ({trace_seconds / 3600:.1f} h of activity, {checks:,} checks) in {elapsed:.2f} s")
+    print(f"  {len(events) / elapsed:,.0f} events/s, {checks / elapsed:,.0f} checks/s, {len(written_df):,} rows written\n")
+    print(f"{'Stage':<32}{'Count':>8}{'p50 (ms)':>11}{'p95 (ms)':>11}{'Max (ms)':>11}")
+    missing_stages = [stage for stage in STAGES if not timings.get(stage, {}).get('count')]
+    for stage in STAGES:
+        if stage in missing_stages:
+            print(f"{stage:<32}{'-':>8}")
+            continue
+        summary = timings[stage]
+        print(f"{stage:<32}{summary['count']:>8}{summary['p50_ms']:>11.2f}{summary['p95_ms']:>11.2f}{summary['max_ms']:>11.2f}")
+
+    report = {
+        'events': len(events), 'checks': checks, 'elapsed_seconds': elapsed,
+        'events_per_second': len(events) / elapsed, 'rows_written': len(written_df),
+        'stages': {stage: timings[stage] for stage in STAGES if stage not in missing_stages},
+        'missing_stages': missing_stages,
+    }
+    status = 0
+    # Every stage runs on each window switch, so a missing one means its timer isn't recording
+    if missing_stages and len(written_df):
+        print(f"\nNo timings recorded for: {', '.join(missing_stages)}")
+        status = 1
+    if expected_path:
+        comparison = compare_rows(written_df, load_activities(expected_path))
+        report['comparison'] = comparison
+        print(f"\nCompared with {expected_path}: {comparison['written_rows']:,} written, {comparison['expected_rows']:,} expected, "
+              f"{comparison['missing']} missing, {comparison['unexpected']} unexpected")
+        if comparison['missing'] or comparison['unexpected']:
+            print(f"  first missing: {comparison['first_missing']}, first unexpected: {comparison['first_unexpected']}")
+            status = 1
+    if write_expected_path:
+        written_df.to_csv(write_expected_path, index=False)
+        print(f"Written rows saved to {write_expected_path}")
+    if output_path:
+        with open(output_path, 'w') as f: json.dump(report, f, indent=2)
+    return status
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+import sys
+import os
+import json
+import time
+import datetime
+import platform
+import argparse
+import tempfile
+import statistics
+
+# Charts are drawn on Qt's offscreen platform so the suite runs without a display
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from benchmarks.synthetic_data import generate_activities, write_tracker_data
+
+class _BenchmarkWindow:
+    """The subset of ProductivityTrackerApp the pages need when built on their own."""
+    def __init__(self, config, activity_log):
+        self.config = config
+        self.activity_log = activity_log
+
+    def update_all_ui(self):
+        pass
+
+def time_call(func, repeat):
+    """Runs func `repeat` times and returns the wall-clock seconds of each run."""
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - t0)
+    return timings
+
+def run_suite(repeat):
+    """Times the storage, UI and export hot paths against ./tracker_data."""
+    from PyQt5.QtWidgets import QApplication
+    from data import data_handler
+    from data.config import load_config
+    from data.compact_store import CompactActivityLog
+    from utils.pdf_exporter import generate_weekly_report_pdf
+    from utils.intervals import day_edges, week_edges, split_activities, app_bucket_totals
+    from data.importer import prepare_import, guess_column_mapping
+    from data.query import run_query
+    from utils.deep_work import log_daily_streaks
+    from data.binary_store import BinaryActivityLog, csv_to_binary
+    from ui.pages.log_pages import LogPage
+    from ui.pages.dashboard_page import DashboardPage
+    from ui.pages.weekly_report_page import WeeklyReportPage
+
+    app = QApplication.instance() or QApplication([])
+    config = load_config()
+    activities_df = data_handler.load_activities()
+    window = _BenchmarkWindow(config, CompactActivityLog.from_frame(activities_df))
+    today = datetime.date.today()
+    week_start = today - datetime.timedelta(days=today.weekday())
+    week_df = split_activities(activities_df, week_edges(week_start))
+    existing_start = activities_df['start_time'].iloc[len(activities_df) // 2]
+    now = datetime.datetime.now()
+    # Re-importing the whole history exercises validation, dedup and the overlap index
+    import_source = activities_df.astype(str)
+    new_activity = {'app_name': 'Benchmark', 'start_time': now, 'end_time': now + datetime.timedelta(seconds=5), 'duration_seconds': 5.0, 'tags': ''}
+
+    log_page = LogPage(window)
+    dashboard_page = DashboardPage(window)
+    weekly_report_page = WeeklyReportPage(window)
+    pdf_path = os.path.join(os.getcwd(), 'benchmark_report.pdf')
+    binary_log = csv_to_binary()
+    year_edges = day_edges(today - datetime.timedelta(days=364), today)
+
+    cases = [
+        ('load_activities', data_handler.load_activities),
+        ('BinaryActivityLog (map)', lambda: BinaryActivityLog().close()),
+        ('app_bucket_totals (binary, 365 days)', lambda: app_bucket_totals(binary_log, year_edges)),
+        ('app_bucket_totals (compact, 365 days)', lambda: app_bucket_totals(window.activity_log, year_edges)),
+        ('log_daily_streaks (365 days)', lambda: log_daily_streaks(window.activity_log, year_edges, config)),
+        ('append_activity', lambda: data_handler.append_activity(dict(new_activity))),
+        ('prepare_import', lambda: prepare_import(import_source, guess_column_mapping(import_source.columns), activities_df)),
+        ('update_activity_tags', lambda: data_handler.update_activity_tags(existing_start, 'benchmark')),
+        ('LogPage.display_activities', lambda: log_page.display_activities(activities_df)),
+        ('run_query', lambda: run_query(window.activity_log, 'productive:no AND (duration>10m OR tag:meeting) AND time:09:00-17:00', config)),
+        ('DashboardPage.generate_activity_report', lambda: dashboard_page.generate_activity_report(window.activity_log, config)),
+        ('WeeklyReportPage.update_report', weekly_report_page.update_report),
+        ('generate_weekly_report_pdf', lambda: generate_weekly_report_pdf(pdf_path, week_start, week_df, config, cache_dir=None)),
+    ]
+
+    results = {}
+    for name, func in cases:
+        timings = time_call(func, repeat)
+        app.processEvents()
+        results[name] = {'best': min(timings), 'mean': statistics.mean(timings), 'runs': timings}
+        print(f"{name:<42} best {min(timings) * 1000:10.1f} ms   mean {statistics.mean(timings) * 1000:10.1f} ms")
+    return results
+
+def compare(results, baseline_path):
+    """Prints the best-time ratio of each case against a previous results file."""
+    with open(baseline_path) as f: baseline = json.load(f)['results']
+    print(f"\nCompared with {baseline_path}:")
+    for name, result in results.items():
+        if name in baseline and baseline[name]['best'] > 0:
+            ratio = result['best'] / baseline[name]['best']
+            print(f"{name:<42} {ratio:6.2f}x {'(slower)' if ratio > 1.1 else '(faster)' if ratio < 0.9 else ''}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the tracker's storage, UI and export paths on synthetic data.")
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--apps', type=int, default=50, help="Number of distinct app names.")
+    parser.add_argument('--tag-density', type=float, default=0.1)
+    parser.add_argument('--years', type=float, default=1.0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='benchmark_results.json', help="Where to write the JSON results.")
+    parser.add_argument('--baseline', help="A previous results file to compare against.")
+    args = parser.parse_args()
+
+    output_path = os.path.abspath(args.output)
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+    original_cwd = os.getcwd()
+
+    # The data handler uses a relative tracker_data/ directory, so run inside a scratch one
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        os.chdir(scratch_dir)
+        try:
+            activities_df = generate_activities(args.rows, args.apps, args.tag_density, args.years, args.seed)
+            write_tracker_data('tracker_data', activities_df)
+            print(f"Generated {len(activities_df):,} rows over {args.years} year(s), {args.apps} apps\n")
+            results = run_suite(args.repeat)
+        finally:
+            os.chdir(original_cwd)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'rows': args.rows, 'apps': args.apps, 'tag_density': args.tag_density,
+            'years': args.years, 'repeat': args.repeat, 'seed': args.seed,
+        },
+        'results': results,
+    }
+    with open(output_path, 'w') as f: json.dump(report, f, indent=2)
+    print(f"\nResults written to {output_path}")
+    if baseline_path:
+        compare(results, baseline_path)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,78 @@
+import sys
+import os
+import time
+import argparse
+import datetime
+import tempfile
+import multiprocessing
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+ORIGIN = datetime.datetime(2024, 1, 1)
+
+def _activity(worker, row):
+    # Rows are 10 s apart and each worker gets its own year, so no two rows match the same tag lookup
+    start_time = ORIGIN + datetime.timedelta(days=366 * worker, seconds=10 * row)
+    return {'app_name': f"Worker {worker}", 'start_time': start_time,
+            'end_time': start_time + datetime.timedelta(seconds=5), 'duration_seconds': 5.0, 'tags': ''}
+
+def write_rows(worker, rows, activities_file, tag_every):
+    """One writer process: appends rows one at a time and re-tags every tag_every-th row it wrote."""
+    from data.data_handler import append_activity, update_activity_tags
+    for row in range(rows):
+        activity = _activity(worker, row)
+        append_activity(activity, activities_file)
+        if tag_every and row % tag_every == 0:
+            if not update_activity_tags(activity['start_time'], f"checked-{worker}", activities_file):
+                raise RuntimeError(f"worker {worker} lost its row {row} before tagging it")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run concurrent writer processes against one history and check that no rows are lost.")
+    parser.add_argument('--workers', type=int, default=6)
+    parser.add_argument('--rows', type=int, default=100, help="Rows appended by each worker.")
+    parser.add_argument('--tag-every', type=int, default=10, help="Each worker re-tags every Nth row it wrote (0 to disable).")
+    args = parser.parse_args()
+
+    from data.data_handler import load_activities, clear_activities
+
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        activities_file = os.path.join(scratch_dir, 'activities.csv')
+        clear_activities(activities_file)
+
+        context = multiprocessing.get_context('spawn')
+        processes = [context.Process(target=write_rows, args=(worker, args.rows, activities_file, args.tag_every))
+                     for worker in range(args.workers)]
+        t0 = time.perf_counter()
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - t0
+
+        df = load_activities(activities_file)
+        failed_workers = [worker for worker, process in enumerate(processes) if process.exitcode != 0]
+        expected_rows = args.workers * args.rows
+        expected_tags = args.workers * len(range(0, args.rows, args.tag_every)) if args.tag_every else 0
+        duplicates = int(df.duplicated(['app_name', 'start_time']).sum())
+        tagged = int((df['tags'] != '').sum())
+
+    print(f"{args.workers} writers x {args.rows} rows in {elapsed:.1f} s "
+          f"({expected_rows / elapsed:.0f} writes/s): {len(df):,} rows stored, {duplicates} duplicates, {tagged} tagged")
+    problems = []
+    if failed_workers:
+        problems.append(f"workers {failed_workers} failed")
+    if len(df) != expected_rows:
+        problems.append(f"expected {expected_rows:,} rows, found {len(df):,}")
+    if duplicates:
+        problems.append(f"{duplicates} duplicate rows")
+    if tagged != expected_tags:
+        problems.append(f"expected {expected_tags} tagged rows, found {tagged}")
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    if not problems:
+        print("OK: no rows or tag edits were lost")
+    return 1 if problems else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
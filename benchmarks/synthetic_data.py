@@ -0,0 +1,84 @@
+import sys
+import os
+import uuid
+import argparse
+import numpy as np
+import pandas as pd
+
+KNOWN_APPS = ["VS Code", "Google Chrome", "PyCharm", "Slack", "Zoom", "Terminal/CMD", "File Explorer", "Mozilla Firefox", "Microsoft Edge"]
+TAG_VOCABULARY = ["work", "meeting", "research", "email", "planning", "review", "personal", "client-a", "client-b", "learning"]
+
+def make_app_names(cardinality):
+    """Returns `cardinality` distinct app names: the known apps first, then raw-title style names."""
+    names = KNOWN_APPS[:cardinality]
+    for i in range(len(names), cardinality):
+        names.append(f"Document {i} - {KNOWN_APPS[i % len(KNOWN_APPS)]} Window")
+    return names
+
+def generate_activities(rows, app_cardinality=50, tag_density=0.1, years=1.0, seed=0, end_time=None):
+    """
+    Builds a realistic, non-overlapping activity history ending at end_time (default: now).
+    App usage follows a Zipf-like distribution; tag_density is the fraction of rows with tags.
+    """
+    rng = np.random.default_rng(seed)
+    end_time = pd.Timestamp(end_time) if end_time is not None else pd.Timestamp.now()
+    span_seconds = years * 365 * 86400
+    step = span_seconds / max(rows, 1)
+
+    # --- Sequential sessions separated by gaps ---
+    durations = np.maximum(rng.exponential(step * 0.6, rows), 1.0)
+    gaps = rng.exponential(step * 0.4, rows)
+    offsets = np.cumsum(durations + gaps) - (durations + gaps)
+    history_seconds = offsets[-1] + durations[-1] if rows else 0
+    starts = end_time - pd.Timedelta(seconds=history_seconds) + pd.to_timedelta(offsets, unit='s')
+
+    # --- Zipf-like app popularity ---
+    app_names = np.array(make_app_names(app_cardinality), dtype=object)
+    weights = 1.0 / np.arange(1, app_cardinality + 1)
+    apps = app_names[rng.choice(app_cardinality, size=rows, p=weights / weights.sum())]
+
+    # --- Sparse comma-separated tags ---
+    tags = np.full(rows, '', dtype=object)
+    tagged = np.flatnonzero(rng.random(rows) < tag_density)
+    first_tags = rng.integers(0, len(TAG_VOCABULARY), len(tagged))
+    second_tags = rng.integers(0, len(TAG_VOCABULARY), len(tagged))
+    has_second = rng.random(len(tagged)) < 0.3
+    tags[tagged] = [
+        TAG_VOCABULARY[a] + (f",{TAG_VOCABULARY[b]}" if two and a != b else '')
+        for a, b, two in zip(first_tags, second_tags, has_second)
+    ]
+
+    return pd.DataFrame({
+        'app_name': apps,
+        'start_time': starts,
+        'end_time': starts + pd.to_timedelta(durations, unit='s'),
+        'duration_seconds': durations,
+        'tags': tags,
+    })
+
+def write_tracker_data(data_dir, activities_df, productivity_apps=("VS Code", "PyCharm", "Terminal/CMD")):
+    """Writes a complete tracker_data directory (activities, config, user id)."""
+    os.makedirs(data_dir, exist_ok=True)
+    activities_df.to_csv(os.path.join(data_dir, 'activities.csv'), index=False)
+    pd.DataFrame({
+        'key': ['check_interval_seconds', 'productivity_apps', 'is_dark_mode', 'idle_threshold_minutes', 'dashboard_top_n'],
+        'value': [3, ",".join(productivity_apps), 'False', 5, 10]
+    }).to_csv(os.path.join(data_dir, 'config.csv'), index=False)
+    with open(os.path.join(data_dir, 'user_id.txt'), 'w') as f: f.write(str(uuid.uuid4()))
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic tracker_data directory.")
+    parser.add_argument('output_dir', help="Directory to write activities.csv, config.csv and user_id.txt into.")
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--apps', type=int, default=50, help="Number of distinct app names.")
+    parser.add_argument('--tag-density', type=float, default=0.1, help="Fraction of rows that carry tags.")
+    parser.add_argument('--years', type=float, default=1.0, help="Years of history to spread the rows over.")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    df = generate_activities(args.rows, args.apps, args.tag_density, args.years, args.seed)
+    write_tracker_data(args.output_dir, df)
+    print(f"Wrote {len(df):,} activities to {args.output_dir}")
+
+if __name__ == '__main__':
+    sys.exit(main())
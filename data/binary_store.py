@@ -0,0 +1,300 @@
+import gc
+import os
+import mmap
+import numpy as np
+import pandas as pd
+
+from data.data_handler import DATA_DIR, ACTIVITIES_FILE, load_activities
+from data.compact_store import ACTIVITY_COLUMNS
+from data.locking import locked, atomic_write_csv, read_complete
+from utils.intervals import to_ns
+from utils.metrics import timed
+
+BINARY_ACTIVITIES_FILE = os.path.join(DATA_DIR, 'activities.bin')
+
+# One 24-byte record per activity; app and tags are line numbers in the dictionary files
+RECORD_DTYPE = np.dtype([('start_ns', '<i8'), ('end_ns', '<i8'), ('app', '<u4'), ('tags', '<u4')])
+# A record-sized header in front of the records: the size and mtime of the CSV the log
+# mirrored when it was last written, so a rewritten CSV is noticed without reading it
+HEADER_DTYPE = np.dtype([('magic', 'S8'), ('source_size', '<i8'), ('source_mtime_ns', '<i8')])
+BINARY_MAGIC = b'ACTBIN01'
+
+# Maps close() couldn't release because arrays handed out earlier still view them, by file
+_unreleased_maps = {}
+
+def dictionary_paths(binary_file):
+    base, _ = os.path.splitext(binary_file)
+    return base + '_apps.txt', base + '_tags.txt'
+
+class _StringDictionary:
+    """Distinct strings stored one per line; a string's id is its line number."""
+    def __init__(self, path):
+        self.path = path
+        self.strings = read_complete(path, b'\n').decode('utf-8').splitlines()
+        self.codes = {string: code for code, string in enumerate(self.strings)}
+
+    def encode(self, values):
+        """Returns the ids of values (a Series), appending unseen strings to the file in one write."""
+        unique_values, inverse = np.unique(values.fillna('').astype(str).to_numpy(), return_inverse=True)
+        new_strings = []
+        for value in unique_values:
+            # Strings are stored one per line
+            value = ' '.join(value.splitlines())
+            if value not in self.codes:
+                self.codes[value] = len(self.strings)
+                self.strings.append(value)
+                new_strings.append(value)
+        if new_strings:
+            with open(self.path, 'a', encoding='utf-8', newline='\n') as f:
+                f.write(''.join(string + '\n' for string in new_strings))
+        codes = np.array([self.codes[' '.join(value.splitlines())] for value in unique_values], dtype=np.uint32)
+        return codes[inverse]
+
+class BinaryActivityLog:
+    """
+    An activity history stored as fixed-width records (start, end, app id, tag-set id)
+    plus two string dictionaries. The records file is memory-mapped and read as a
+    NumPy structured array without parsing or copying; appends are a single write.
+    Offers the same read interface as CompactActivityLog (interval_arrays(), the
+    code arrays the query language uses, to_frame...), so it can be the app's
+    resident history when the binary_activity_log setting is on.
+    """
+    def __init__(self, binary_file=BINARY_ACTIVITIES_FILE, source_file=None):
+        """source_file is the CSV the log mirrors; its size and mtime are stamped in the header on each append."""
+        self.binary_file = binary_file
+        self.source_file = source_file
+        apps_file, tags_file = dictionary_paths(binary_file)
+        self.apps = _StringDictionary(apps_file)
+        self.tags = _StringDictionary(tags_file)
+        self._file = None
+        self._mmap = None
+        self._map()
+
+    def _map(self):
+        self.close()
+        if not os.path.exists(self.binary_file) or os.path.getsize(self.binary_file) < HEADER_DTYPE.itemsize:
+            with open(self.binary_file, 'wb') as f:
+                _write_header(f, (0, 0))
+        elif read_header(self.binary_file) is None:
+            raise ValueError(f"{self.binary_file} is not a binary activity log; rebuild it with csv_to_binary().")
+        size = os.path.getsize(self.binary_file)
+        # Drop a partial record left by a crash mid-append
+        if (size - HEADER_DTYPE.itemsize) % RECORD_DTYPE.itemsize:
+            size -= (size - HEADER_DTYPE.itemsize) % RECORD_DTYPE.itemsize
+            os.truncate(self.binary_file, size)
+        if size == HEADER_DTYPE.itemsize:
+            self.records = np.empty(0, dtype=RECORD_DTYPE)
+            return
+        self._file = open(self.binary_file, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.records = np.frombuffer(self._mmap, dtype=RECORD_DTYPE, offset=HEADER_DTYPE.itemsize)
+
+    def close(self):
+        """
+        Unmaps the records file. Returns False if arrays handed out earlier still view
+        the map; it stays open until release_maps() succeeds after they are gone.
+        """
+        # The array is a view of the map; drop it before closing the map
+        self.records = np.empty(0, dtype=RECORD_DTYPE)
+        released = True
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+                self._file.close()
+            except BufferError:
+                _unreleased_maps.setdefault(os.path.abspath(self.binary_file), []).append((self._mmap, self._file))
+                released = False
+            self._mmap = None
+            self._file = None
+        return released
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def app_categories(self):
+        return pd.Index(self.apps.strings, dtype=object)
+
+    @property
+    def tag_categories(self):
+        return pd.Index(self.tags.strings, dtype=object)
+
+    @timed('storage.binary.append')
+    def append(self, activities_df):
+        """
+        Appends activity rows with one write and stamps the header with the source
+        CSV's current size and mtime (write the CSV first), then maps the grown file.
+        """
+        if activities_df.empty:
+            return
+        records = np.empty(len(activities_df), dtype=RECORD_DTYPE)
+        records['start_ns'] = to_ns(activities_df['start_time'])
+        records['end_ns'] = to_ns(activities_df['end_time'])
+        self.close()
+        with locked(self.binary_file):
+            # Another process may have added strings since we loaded the dictionaries
+            self.apps = _StringDictionary(self.apps.path)
+            self.tags = _StringDictionary(self.tags.path)
+            records['app'] = self.apps.encode(activities_df['app_name'])
+            records['tags'] = self.tags.encode(activities_df['tags'] if 'tags' in activities_df else pd.Series([''] * len(activities_df)))
+            with open(self.binary_file, 'r+b') as f:
+                f.seek(0, os.SEEK_END)
+                f.write(records.tobytes())
+                if self.source_file:
+                    f.seek(0)
+                    _write_header(f, _source_stamp(self.source_file))
+        self._map()
+
+    def stamp(self, source_stamp):
+        """Records (source_size, source_mtime_ns) of the CSV the log now mirrors in the header."""
+        with locked(self.binary_file), open(self.binary_file, 'r+b') as f:
+            _write_header(f, source_stamp)
+
+    def interval_arrays(self):
+        """(start_ns, end_ns, app codes, tag codes): views of the mapped records, no copies."""
+        return self.records['start_ns'], self.records['end_ns'], self.records['app'], self.records['tags']
+
+    # --- The row arrays data.query evaluates predicates on ---
+
+    @property
+    def app_codes(self):
+        return self.records['app']
+
+    @property
+    def tag_codes(self):
+        return self.records['tags']
+
+    @property
+    def durations(self):
+        return ((self.records['end_ns'] - self.records['start_ns']) / 1e9).astype(np.float32)
+
+    # Start times as whole seconds from base_seconds, as in CompactActivityLog
+    base_seconds = 0
+
+    @property
+    def start_offsets(self):
+        return self.records['start_ns'] // 10**9
+
+    def _rows_overlapping(self, start, end):
+        mask = np.ones(len(self.records), dtype=bool)
+        if start is not None:
+            mask &= self.records['end_ns'] > pd.Timestamp(start).value
+        if end is not None:
+            mask &= self.records['start_ns'] < pd.Timestamp(end).value
+        return mask
+
+    def to_frame(self, start=None, end=None):
+        """Materialises the rows overlapping [start, end) (all rows by default) as an activities DataFrame."""
+        if start is None and end is None:
+            return self._frame(self.records)
+        return self._frame(self.records[self._rows_overlapping(start, end)])
+
+    def to_frame_where(self, mask, start=None, end=None):
+        """Like to_frame, but only the rows where the boolean mask (one entry per row) is set."""
+        if start is not None or end is not None:
+            mask = mask & self._rows_overlapping(start, end)
+        return self._frame(self.records[mask])
+
+    def find_overlapping(self, start, end):
+        """Rows overlapping [start, end) as a DataFrame."""
+        return self.to_frame(start, end)
+
+    def _frame(self, records):
+        start_ns, end_ns = records['start_ns'], records['end_ns']
+        return pd.DataFrame({
+            'app_name': pd.Categorical.from_codes(records['app'].astype(np.int64), self.app_categories),
+            'start_time': pd.to_datetime(start_ns),
+            'end_time': pd.to_datetime(end_ns),
+            'duration_seconds': (end_ns - start_ns) / 1e9,
+            'tags': pd.Categorical.from_codes(records['tags'].astype(np.int64), self.tag_categories),
+        }, columns=ACTIVITY_COLUMNS)
+
+def _source_stamp(source_file):
+    if source_file is None or not os.path.exists(source_file):
+        return 0, 0
+    stat = os.stat(source_file)
+    return stat.st_size, stat.st_mtime_ns
+
+def _write_header(f, source_stamp):
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header['magic'] = BINARY_MAGIC
+    header['source_size'], header['source_mtime_ns'] = source_stamp
+    f.write(header.tobytes())
+
+def read_header(binary_file):
+    """(source_size, source_mtime_ns) from a binary log's header, or None if it has none."""
+    try:
+        with open(binary_file, 'rb') as f:
+            data = f.read(HEADER_DTYPE.itemsize)
+    except FileNotFoundError:
+        return None
+    if len(data) < HEADER_DTYPE.itemsize:
+        return None
+    header = np.frombuffer(data, dtype=HEADER_DTYPE)[0]
+    if header['magic'] != BINARY_MAGIC:
+        return None
+    return int(header['source_size']), int(header['source_mtime_ns'])
+
+def release_maps(binary_file=BINARY_ACTIVITIES_FILE):
+    """Closes the maps of binary_file that close() had to leave open; returns whether none are left."""
+    key = os.path.abspath(binary_file)
+    maps = _unreleased_maps.pop(key, [])
+    if maps:
+        # Arrays kept alive only by reference cycles would otherwise still hold the map
+        gc.collect()
+    still_mapped = []
+    for mapped, file in maps:
+        try:
+            mapped.close()
+        except BufferError:
+            still_mapped.append((mapped, file))
+            continue
+        file.close()
+    if still_mapped:
+        _unreleased_maps[key] = still_mapped
+    return not still_mapped
+
+# --- Converters ---
+
+def open_binary_log(csv_file=ACTIVITIES_FILE, binary_file=BINARY_ACTIVITIES_FILE):
+    """
+    Maps the binary log, first rebuilding it from the CSV unless its header still
+    matches the CSV's size and mtime (the tracker appends to both and restamps the
+    header, so only a rewrite of the CSV, e.g. an import, sync or rollup, makes it stale).
+    """
+    if os.path.exists(csv_file) and read_header(binary_file) == _source_stamp(csv_file):
+        return BinaryActivityLog(binary_file, csv_file)
+    return csv_to_binary(csv_file, binary_file)
+
+@timed('storage.binary.csv_to_binary')
+def csv_to_binary(csv_file=ACTIVITIES_FILE, binary_file=BINARY_ACTIVITIES_FILE):
+    """
+    Writes the CSV history as a new binary log (replacing any existing one) and returns
+    it opened. Raises BufferError if the existing file is still mapped (Windows can't
+    remove it then).
+    """
+    if not release_maps(binary_file):
+        raise BufferError(f"{binary_file} is still mapped by arrays in use and can't be rebuilt.")
+    for path in (binary_file,) + dictionary_paths(binary_file):
+        if os.path.exists(path):
+            os.remove(path)
+    # Stamp what the CSV was before reading it; a write in between just makes the next open rebuild again
+    source_stamp = _source_stamp(csv_file)
+    binary_log = BinaryActivityLog(binary_file)
+    binary_log.append(load_activities(csv_file))
+    binary_log.stamp(source_stamp)
+    binary_log.source_file = csv_file
+    return binary_log
+
+@timed('storage.binary.binary_to_csv')
+def binary_to_csv(binary_file=BINARY_ACTIVITIES_FILE, csv_file=ACTIVITIES_FILE):
+    """Writes a binary log back out as the CSV history."""
+    binary_log = BinaryActivityLog(binary_file)
+    try:
+        activities_df = binary_log.to_frame()
+        activities_df['app_name'] = activities_df['app_name'].astype(object)
+        activities_df['tags'] = activities_df['tags'].astype(object)
+        with locked(csv_file):
+            atomic_write_csv(activities_df, csv_file)
+    finally:
+        binary_log.close()
@@ -0,0 +1,58 @@
+import os
+import struct
+import datetime
+
+from data.data_handler import DATA_DIR
+from utils.metrics import timed
+
+CHECKPOINT_FILE = os.path.join(DATA_DIR, 'checkpoint.bin')
+
+# magic, version, start timestamp, checkpoint timestamp, name length, name bytes
+_MAGIC = b'PTCK'
+_VERSION = 1
+_MAX_NAME_BYTES = 256
+_RECORD = struct.Struct(f'<4sHddH{_MAX_NAME_BYTES}s')
+
+@timed('storage.write_checkpoint')
+def write_checkpoint(activity, checkpoint_time=None, checkpoint_file=CHECKPOINT_FILE):
+    """
+    Atomically records the in-flight activity as a single fixed-size record.
+    This costs one small write and a rename, independent of history size.
+    """
+    checkpoint_time = checkpoint_time or datetime.datetime.now()
+    name = activity['app_name'].encode('utf-8')[:_MAX_NAME_BYTES]
+    record = _RECORD.pack(_MAGIC, _VERSION, activity['start_time'].timestamp(), checkpoint_time.timestamp(), len(name), name)
+    temp_file = checkpoint_file + '.tmp'
+    with open(temp_file, 'wb') as f:
+        f.write(record)
+    os.replace(temp_file, checkpoint_file)
+
+def read_checkpoint(checkpoint_file=CHECKPOINT_FILE):
+    """Returns the checkpointed activity as a closed activity dict, or None if there is none."""
+    try:
+        with open(checkpoint_file, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    if len(data) != _RECORD.size:
+        return None
+    magic, version, start_ts, checkpoint_ts, name_length, name = _RECORD.unpack(data)
+    if magic != _MAGIC or version != _VERSION or checkpoint_ts < start_ts:
+        return None
+
+    start_time = datetime.datetime.fromtimestamp(start_ts)
+    end_time = datetime.datetime.fromtimestamp(checkpoint_ts)
+    return {
+        # errors='ignore' drops a multi-byte character cut off by the length limit
+        'app_name': name[:name_length].decode('utf-8', errors='ignore'),
+        'start_time': start_time,
+        'end_time': end_time,
+        'duration_seconds': (end_time - start_time).total_seconds(),
+        'tags': ''
+    }
+
+def clear_checkpoint(checkpoint_file=CHECKPOINT_FILE):
+    try:
+        os.remove(checkpoint_file)
+    except FileNotFoundError:
+        pass
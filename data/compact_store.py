@@ -0,0 +1,175 @@
+import numpy as np
+import pandas as pd
+
+from utils.intervals import OverlapIndex
+
+ACTIVITY_COLUMNS = ['app_name', 'start_time', 'end_time', 'duration_seconds', 'tags']
+
+class CompactActivityLog:
+    """
+    A memory-efficient copy of the activity history; rows are only ever appended.
+
+    Start times are stored as int32 second offsets from base_seconds (a Unix
+    timestamp), durations as float32, and end times are derived from the two.
+    App names and tags are dictionary-encoded: each row holds an integer code
+    into a shared list of distinct strings. Sub-second parts of start times are
+    dropped; durations keep them, so totals are unaffected. The row arrays are
+    views of buffers with spare capacity, so append() is amortised O(rows added).
+    """
+    def __init__(self, base_seconds, start_offsets, durations, app_codes, app_categories, tag_codes, tag_categories):
+        self.base_seconds = int(base_seconds)
+        self.start_offsets = start_offsets
+        self.durations = durations
+        self.app_codes = app_codes
+        self.app_categories = app_categories
+        self.tag_codes = tag_codes
+        self.tag_categories = tag_categories
+        self._overlap_index = None
+        self._buffers = None
+
+    @classmethod
+    def from_frame(cls, activities_df):
+        """Builds the compact form from a DataFrame as returned by load_activities."""
+        if activities_df.empty:
+            empty_index = pd.Index([], dtype=object)
+            return cls(0, np.empty(0, np.int32), np.empty(0, np.float32), np.empty(0, np.int8), empty_index, np.empty(0, np.int8), empty_index)
+
+        start_seconds = np.asarray(activities_df['start_time'].values.astype('datetime64[s]').view(np.int64))
+        base_seconds = start_seconds.min()
+        offsets = start_seconds - base_seconds
+        if offsets.max() > np.iinfo(np.int32).max:
+            raise ValueError("Activity history spans more than 68 years and cannot use int32 offsets.")
+
+        apps = pd.Categorical(activities_df['app_name'].astype(str))
+        tags = pd.Categorical(activities_df['tags'].fillna('').astype(str))
+        return cls(
+            base_seconds,
+            offsets.astype(np.int32),
+            activities_df['duration_seconds'].to_numpy(dtype=np.float32),
+            apps.codes, apps.categories,
+            tags.codes, tags.categories
+        )
+
+    def __len__(self):
+        return len(self.start_offsets)
+
+    # --- Appending ---
+
+    def _grow(self, rows):
+        """Makes room for `rows` more rows, doubling the buffers when they are full."""
+        size = len(self)
+        buffers = self._buffers
+        if buffers is None or size + rows > len(buffers[0]):
+            capacity = max(2 * size, size + rows, 1024)
+            # Codes are widened once so new apps and tags can never overflow them
+            dtypes = [np.int32, np.float32, np.int32, np.int32]
+            old = [self.start_offsets, self.durations, self.app_codes, self.tag_codes]
+            buffers = [np.empty(capacity, dtype=dtype) for dtype in dtypes]
+            for buffer, array in zip(buffers, old):
+                buffer[:size] = array
+            self._buffers = buffers
+        return size
+
+    @staticmethod
+    def _encode(values, categories):
+        """Codes of values in categories, adding the strings not seen before."""
+        codes = categories.get_indexer(values)
+        unseen = codes < 0
+        if unseen.any():
+            new_strings = pd.Index(pd.unique(values[unseen]), dtype=object)
+            categories = categories.append(new_strings)
+            codes[unseen] = len(categories) - len(new_strings) + new_strings.get_indexer(values[unseen])
+        return codes, categories
+
+    def append(self, activities_df):
+        """Adds rows (as returned by load_activities) in place, without rebuilding the log."""
+        if activities_df.empty:
+            return
+        start_seconds = np.asarray(pd.to_datetime(activities_df['start_time']).values.astype('datetime64[s]').view(np.int64))
+        if len(self) == 0:
+            self.base_seconds = int(start_seconds.min())
+        offsets = start_seconds - self.base_seconds
+        if offsets.min() < 0 or offsets.max() > np.iinfo(np.int32).max:
+            # Rows before the base (e.g. an import of older history) need a new base
+            rebuilt = CompactActivityLog.from_frame(pd.concat([self.to_frame(), activities_df[ACTIVITY_COLUMNS]], ignore_index=True))
+            self.__dict__.update(rebuilt.__dict__)
+            return
+
+        app_codes, self.app_categories = self._encode(activities_df['app_name'].astype(str).to_numpy(dtype=object), pd.Index(self.app_categories, dtype=object))
+        tag_codes, self.tag_categories = self._encode(activities_df['tags'].fillna('').astype(str).to_numpy(dtype=object), pd.Index(self.tag_categories, dtype=object))
+        size = self._grow(len(offsets))
+        new_size = size + len(offsets)
+        start_buffer, duration_buffer, app_buffer, tag_buffer = self._buffers
+        start_buffer[size:new_size] = offsets
+        duration_buffer[size:new_size] = activities_df['duration_seconds'].to_numpy(dtype=np.float32)
+        app_buffer[size:new_size] = app_codes
+        tag_buffer[size:new_size] = tag_codes
+        self.start_offsets = start_buffer[:new_size]
+        self.durations = duration_buffer[:new_size]
+        self.app_codes = app_buffer[:new_size]
+        self.tag_codes = tag_buffer[:new_size]
+        self._overlap_index = None
+
+    def _rows_overlapping(self, start, end):
+        """Returns the row positions whose [start, end) interval overlaps the given range."""
+        mask = np.ones(len(self), dtype=bool)
+        if start is not None:
+            start_offset = pd.Timestamp(start).value // 10**9 - self.base_seconds
+            mask &= self.start_offsets + self.durations > start_offset
+        if end is not None:
+            end_offset = pd.Timestamp(end).value // 10**9 - self.base_seconds
+            mask &= self.start_offsets < end_offset
+        return np.flatnonzero(mask)
+
+    def to_frame(self, start=None, end=None):
+        """
+        Materialises the rows overlapping [start, end) (all rows by default) as a
+        regular activities DataFrame. app_name and tags come back as categoricals,
+        so group by them with observed=True.
+        """
+        rows = self._rows_overlapping(start, end) if start is not None or end is not None else slice(None)
+        return self._frame(rows)
+
+    def to_frame_where(self, mask, start=None, end=None):
+        """Like to_frame, but only the rows where the boolean mask (one entry per row) is set."""
+        if start is not None or end is not None:
+            mask = mask.copy()
+            in_range = np.zeros(len(self), dtype=bool)
+            in_range[self._rows_overlapping(start, end)] = True
+            mask &= in_range
+        return self._frame(np.flatnonzero(mask))
+
+    def _frame(self, rows):
+        start_time = pd.to_datetime((self.start_offsets[rows].astype(np.int64) + self.base_seconds) * 10**9)
+        durations = self.durations[rows].astype(np.float64)
+        return pd.DataFrame({
+            'app_name': pd.Categorical.from_codes(self.app_codes[rows], self.app_categories),
+            'start_time': start_time,
+            'end_time': start_time + pd.to_timedelta(durations, unit='s'),
+            'duration_seconds': durations,
+            'tags': pd.Categorical.from_codes(self.tag_codes[rows], self.tag_categories),
+        }, columns=ACTIVITY_COLUMNS)
+
+    def interval_arrays(self):
+        """(start_ns, end_ns, app codes, tag codes) of all rows, as used by utils.intervals.app_bucket_totals."""
+        starts = (self.start_offsets.astype(np.int64) + self.base_seconds) * 10**9
+        ends = starts + np.round(self.durations.astype(np.float64) * 1e9).astype(np.int64)
+        return starts, ends, self.app_codes, self.tag_codes
+
+    def overlap_index(self):
+        """An OverlapIndex over all rows (nanosecond scale), built on first use."""
+        if self._overlap_index is None:
+            starts, ends, _, _ = self.interval_arrays()
+            self._overlap_index = OverlapIndex(starts, ends)
+        return self._overlap_index
+
+    def find_overlapping(self, start, end):
+        """Rows overlapping [start, end) as a DataFrame, found in O(log n + matches)."""
+        positions = self.overlap_index().overlapping(pd.Timestamp(start).value, pd.Timestamp(end).value)
+        return self._frame(np.sort(positions))
+
+    def memory_usage_bytes(self):
+        """Approximate resident size, including the string dictionaries."""
+        arrays = [self.start_offsets, self.durations, self.app_codes, self.tag_codes]
+        dictionaries = [self.app_categories, self.tag_categories]
+        return sum(a.nbytes for a in arrays) + sum(int(d.memory_usage(deep=True)) for d in dictionaries)
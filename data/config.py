@@ -0,0 +1,132 @@
+import os
+import csv
+
+from data.data_handler import DATA_DIR
+from utils.metrics import timed
+
+CONFIG_FILE = os.path.join(DATA_DIR, 'config.csv')
+
+class ConfigError(ValueError):
+    pass
+
+def _parse_bool(text):
+    value = text.strip().lower()
+    if value not in ('true', 'false'):
+        raise ValueError(f"expected True or False, got {text!r}")
+    return value == 'true'
+
+def _parse_list(text):
+    return [item.strip() for item in text.split(',') if item.strip()]
+
+def _in_range(low, high):
+    def check(value):
+        if not low <= value <= high:
+            raise ValueError(f"must be between {low} and {high}")
+    return check
+
+def _one_of(*choices):
+    def check(value):
+        if value not in choices:
+            raise ValueError(f"must be one of {', '.join(choices)}")
+    return check
+
+def _no_check(value):
+    pass
+
+def parse_app_limits(entries):
+    """['Slack=30', 'YouTube=15'] -> [('Slack', 30), ('YouTube', 15)]. Raises ValueError."""
+    limits = []
+    for entry in entries:
+        app, separator, minutes = entry.rpartition('=')
+        if not separator or not app.strip() or not minutes.strip().isdigit() or int(minutes) < 1:
+            raise ValueError(f"expected App=minutes, got {entry!r}")
+        limits.append((app.strip(), int(minutes)))
+    return limits
+
+# key: (parse from the file's text, format back to text, default, validate)
+CONFIG_SCHEMA = {
+    'check_interval_seconds': (int, str, 3, _in_range(1, 60)),
+    'productivity_apps': (_parse_list, ','.join, ['VS Code', 'Google Chrome', 'PyCharm'], _no_check),
+    'is_dark_mode': (_parse_bool, str, False, _no_check),
+    'idle_threshold_minutes': (int, str, 5, _in_range(1, 120)),
+    'dashboard_top_n': (int, str, 10, _in_range(3, 50)),
+    'write_metrics_file': (_parse_bool, str, False, _no_check),
+    'aggregation_server_url': (str.strip, str, '', _no_check),
+    'sync_folder': (str.strip, str, '', _no_check),
+    'retention_days': (int, str, 0, _in_range(0, 3650)),
+    'retention_granularity': (str.strip, str, 'day', _one_of('hour', 'day')),
+    'daily_goal_minutes': (int, str, 0, _in_range(0, 1440)),
+    'app_limits': (_parse_list, ','.join, [], parse_app_limits),
+    'deep_work_min_minutes': (int, str, 25, _in_range(1, 480)),
+    'deep_work_max_interruption_seconds': (int, str, 120, _in_range(0, 3600)),
+    'binary_activity_log': (_parse_bool, str, False, _no_check),
+}
+
+def default_config():
+    return {key: (list(default) if isinstance(default, list) else default) for key, (_, _, default, _) in CONFIG_SCHEMA.items()}
+
+def validate_config(config):
+    """Raises ConfigError listing every key whose value has the wrong type or is out of range."""
+    errors = []
+    for key, (_, _, default, validate) in CONFIG_SCHEMA.items():
+        value = config.get(key)
+        if not isinstance(value, type(default)):
+            errors.append(f"{key}: expected {type(default).__name__}")
+            continue
+        try:
+            validate(value)
+        except ValueError as e:
+            errors.append(f"{key}: {e}")
+    if errors:
+        raise ConfigError("; ".join(errors))
+
+@timed('storage.load_config')
+def load_config(config_file=CONFIG_FILE, fallback=None):
+    """
+    Reads config.csv (key,value rows) without pandas. Missing or invalid values fall
+    back to `fallback` (e.g. the current config on a hot reload) or the defaults.
+    """
+    return load_config_with_errors(config_file, fallback)[0]
+
+def load_config_with_errors(config_file=CONFIG_FILE, fallback=None):
+    """Like load_config, but also returns a list of the problems found."""
+    config = dict(fallback) if fallback else default_config()
+    errors = []
+    try:
+        with open(config_file, newline='', encoding='utf-8') as f:
+            rows = {row['key']: row['value'] for row in csv.DictReader(f) if row.get('key')}
+    except FileNotFoundError:
+        return config, errors
+    except (csv.Error, KeyError, UnicodeDecodeError) as e:
+        return config, [f"could not read {config_file}: {e}"]
+
+    for key, (parse, _, _, validate) in CONFIG_SCHEMA.items():
+        if key not in rows:
+            continue
+        try:
+            value = parse(rows[key] or '')
+            validate(value)
+        except ValueError as e:
+            errors.append(f"{key}: {e}")
+            continue
+        config[key] = value
+    return config, errors
+
+@timed('storage.save_config')
+def save_config(config, config_file=CONFIG_FILE):
+    """Validates and atomically writes the configuration."""
+    validate_config(config)
+    temp_file = config_file + '.tmp'
+    with open(temp_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['key', 'value'])
+        for key, (_, format_value, _, _) in CONFIG_SCHEMA.items():
+            writer.writerow([key, format_value(config[key])])
+    os.replace(temp_file, config_file)
+
+def ensure_config_file(config_file=CONFIG_FILE):
+    if not os.path.exists(config_file):
+        save_config(default_config(), config_file)
+
+def changed_keys(old_config, new_config):
+    return {key for key in CONFIG_SCHEMA if old_config.get(key) != new_config.get(key)}
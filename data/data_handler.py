@@ -2,57 +2,42 @@ import os
 import uuid
 import pandas as pd
 
+from utils.metrics import timed
+from utils.intervals import OverlapIndex
+from data.locking import locked, atomic_write_csv
+
 # --- Configuration & Data Paths ---
 DATA_DIR = 'tracker_data'
-CONFIG_FILE = os.path.join(DATA_DIR, 'config.csv')
 ACTIVITIES_FILE = os.path.join(DATA_DIR, 'activities.csv')
 USER_ID_FILE = os.path.join(DATA_DIR, 'user_id.txt')
+METRICS_FILE = os.path.join(DATA_DIR, 'metrics.json')
 
 def ensure_data_dir_and_files():
     """Ensures that the data directory and necessary files exist."""
     os.makedirs(DATA_DIR, exist_ok=True)
-    if not os.path.exists(ACTIVITIES_FILE):
-        pd.DataFrame(columns=['app_name', 'start_time', 'end_time', 'duration_seconds', 'tags']).to_csv(ACTIVITIES_FILE, index=False)
-    else:
-        df = pd.read_csv(ACTIVITIES_FILE)
-        if 'tags' not in df.columns:
-            df['tags'] = ''
-            df.to_csv(ACTIVITIES_FILE, index=False)
+    with locked(ACTIVITIES_FILE):
+        if not os.path.exists(ACTIVITIES_FILE):
+            clear_activities()
+        else:
+            df = pd.read_csv(ACTIVITIES_FILE)
+            if 'tags' not in df.columns:
+                df['tags'] = ''
+                atomic_write_csv(df, ACTIVITIES_FILE)
     if not os.path.exists(USER_ID_FILE):
         with open(USER_ID_FILE, 'w') as f: f.write(str(uuid.uuid4()))
-    if not os.path.exists(CONFIG_FILE):
-        pd.DataFrame({
-            'key': ['check_interval_seconds', 'productivity_apps', 'is_dark_mode', 'idle_threshold_minutes'],
-            'value': [3, 'VS Code,Google Chrome,PyCharm', 'False', 5]
-        }).to_csv(CONFIG_FILE, index=False)
-
-def load_config():
-    """Loads configuration from the CSV file."""
+
+def load_user_id(user_id_file=USER_ID_FILE):
+    """Returns the install's user id, or None if it has not been created yet."""
     try:
-        df = pd.read_csv(CONFIG_FILE).set_index('key')['value']
-        return {
-            "check_interval_seconds": int(df.get('check_interval_seconds', 3)),
-            "productivity_apps": [app.strip() for app in df.get('productivity_apps', "").split(',')],
-            "is_dark_mode": df.get('is_dark_mode', 'False').lower() == 'true',
-            "idle_threshold_minutes": int(df.get('idle_threshold_minutes', 5))
-        }
-    except (FileNotFoundError, KeyError):
-        return { "check_interval_seconds": 3, "productivity_apps": ["VS Code", "Google Chrome"], "is_dark_mode": False, "idle_threshold_minutes": 5 }
-
-def save_config(config):
-    """Saves the configuration dictionary to the CSV file."""
-    config_to_save = {
-        'check_interval_seconds': config['check_interval_seconds'],
-        'productivity_apps': ",".join(config['productivity_apps']),
-        'is_dark_mode': str(config['is_dark_mode']),
-        'idle_threshold_minutes': config['idle_threshold_minutes']
-    }
-    pd.DataFrame(config_to_save.items(), columns=['key', 'value']).to_csv(CONFIG_FILE, index=False)
+        with open(user_id_file) as f: return f.read().strip()
+    except FileNotFoundError:
+        return None
 
-def load_activities():
+@timed('storage.load_activities')
+def load_activities(activities_file=ACTIVITIES_FILE):
     """Loads activity data from the CSV file."""
     try:
-        df = pd.read_csv(ACTIVITIES_FILE)
+        df = pd.read_csv(activities_file)
         df['start_time'] = pd.to_datetime(df['start_time'])
         df['end_time'] = pd.to_datetime(df['end_time'])
         df['duration_seconds'] = pd.to_numeric(df['duration_seconds'])
@@ -62,46 +47,134 @@ def load_activities():
     except (FileNotFoundError, pd.errors.EmptyDataError):
         return pd.DataFrame(columns=['app_name', 'start_time', 'end_time', 'duration_seconds', 'tags'])
 
-def append_activity(activity_data):
+def clear_activities(activities_file=ACTIVITIES_FILE):
+    """Replaces the history with an empty file."""
+    with locked(activities_file):
+        atomic_write_csv(pd.DataFrame(columns=['app_name', 'start_time', 'end_time', 'duration_seconds', 'tags']), activities_file)
+
+# Every mutation below is a read-modify-write of the whole file, so each one holds the
+# file's lock from the read to the atomic replace; another instance or script can't
+# slip a write in between and have it overwritten.
+
+@timed('storage.append_activity')
+def append_activity(activity_data, activities_file=ACTIVITIES_FILE):
     """Appends a new activity record to the CSV file."""
     if 'tags' not in activity_data:
         activity_data['tags'] = ''
-    df = load_activities()
-    new_df = pd.DataFrame([activity_data])
-    df = pd.concat([df, new_df], ignore_index=True)
-    df.to_csv(ACTIVITIES_FILE, index=False)
-
-def update_activity_tags(start_time, new_tags):
-    """Finds an activity by its start time and updates its tags."""
-    df = load_activities()
-    start_time_dt = pd.to_datetime(start_time)
-    mask = (df['start_time'] >= start_time_dt - pd.Timedelta(seconds=1)) & \
-           (df['start_time'] <= start_time_dt + pd.Timedelta(seconds=1))
-    if mask.any():
-        df.loc[mask, 'tags'] = new_tags
-        df.to_csv(ACTIVITIES_FILE, index=False)
-        return True
-    return False
+    with locked(activities_file):
+        df = load_activities(activities_file)
+        new_df = pd.DataFrame([activity_data])
+        df = pd.concat([df, new_df], ignore_index=True)
+        atomic_write_csv(df, activities_file)
+
+@timed('storage.append_activities')
+def append_activities(activities_df, activities_file=ACTIVITIES_FILE):
+    """Merges many activities into the history in chronological order with a single write."""
+    with locked(activities_file):
+        df = load_activities(activities_file)
+        df = pd.concat([df, activities_df], ignore_index=True).sort_values('start_time', kind='stable')
+        atomic_write_csv(df, activities_file)
+
+OVERLAP_MODES = ('trim', 'split', 'replace')
+
+def _activity_piece(activity, start_time, end_time):
+    return {
+        'app_name': activity['app_name'],
+        'start_time': start_time,
+        'end_time': end_time,
+        'duration_seconds': (end_time - start_time).total_seconds(),
+        'tags': activity.get('tags', ''),
+    }
+
+@timed('storage.insert_activity')
+def insert_activity(activity, overlap_mode=None, activities_file=ACTIVITIES_FILE):
+    """
+    Adds a (manual) activity, resolving overlaps with stored rows according to overlap_mode:
+    'trim' fits the new activity into the gaps between them, 'split' cuts the new
+    activity's time out of them, and 'replace' removes them. None stores it as is.
+    Returns a dict of the removed rows' start times, the rows put back in their
+    place ('replacements') and the rows of the new activity ('inserted').
+    """
+    with locked(activities_file):
+        df = load_activities(activities_file)
+        start_time = pd.Timestamp(activity['start_time'])
+        end_time = pd.Timestamp(activity['end_time'])
+        conflicts = df.iloc[0:0]
+        if overlap_mode and not df.empty:
+            positions = OverlapIndex.from_frame(df).overlapping(start_time.value, end_time.value)
+            # The trim cursor walks the conflicts in time order, whatever their order in the file
+            conflicts = df.iloc[positions].sort_values('start_time', kind='stable')
+
+        removed, replacements, inserted = conflicts.iloc[0:0], [], [activity]
+        if conflicts.empty:
+            pass
+        elif overlap_mode == 'trim':
+            inserted, cursor = [], start_time
+            for conflict in conflicts.itertuples():
+                if conflict.start_time > cursor:
+                    inserted.append(_activity_piece(activity, cursor, min(conflict.start_time, end_time)))
+                cursor = max(cursor, conflict.end_time)
+            if cursor < end_time:
+                inserted.append(_activity_piece(activity, cursor, end_time))
+        elif overlap_mode == 'split':
+            removed = conflicts
+            for conflict in conflicts.to_dict('records'):
+                if conflict['start_time'] < start_time:
+                    replacements.append(_activity_piece(conflict, conflict['start_time'], start_time))
+                if conflict['end_time'] > end_time:
+                    replacements.append(_activity_piece(conflict, end_time, conflict['end_time']))
+        elif overlap_mode == 'replace':
+            removed = conflicts
+        else:
+            raise ValueError(f"Unknown overlap mode: {overlap_mode}")
+
+        if inserted or not removed.empty:
+            df = pd.concat([df.drop(index=removed.index), pd.DataFrame(replacements + inserted, columns=df.columns)], ignore_index=True)
+            atomic_write_csv(df.sort_values('start_time', kind='stable'), activities_file)
+    return {'removed': list(removed['start_time']), 'replacements': replacements, 'inserted': inserted}
+
+@timed('storage.update_activity_tags')
+def update_activity_tags(start_time, new_tags, activities_file=ACTIVITIES_FILE):
+    """
+    Finds an activity by its start time (within 1 second) and updates its tags.
+    Returns the exact start times of the updated rows; empty if none matched.
+    """
+    with locked(activities_file):
+        df = load_activities(activities_file)
+        start_time_dt = pd.to_datetime(start_time)
+        mask = (df['start_time'] >= start_time_dt - pd.Timedelta(seconds=1)) & \
+               (df['start_time'] <= start_time_dt + pd.Timedelta(seconds=1))
+        if mask.any():
+            df.loc[mask, 'tags'] = new_tags
+            atomic_write_csv(df, activities_file)
+            return list(df.loc[mask, 'start_time'])
+    return []
 
 # --- Start of New Function ---
-def update_last_activity_end_time(new_end_time):
-    """Finds the last non-idle/non-break activity and extends its duration."""
-    df = load_activities()
-    if df.empty:
-        return
-
-    # Filter out idle/break activities to find the last real work session
-    real_activities = df[~df['app_name'].isin(['Idle', 'Break'])]
-    if real_activities.empty:
-        return
-
-    # Get the index of the last real activity
-    last_activity_index = real_activities.index[-1]
-    
-    # Update the end_time and recalculate the duration
-    df.loc[last_activity_index, 'end_time'] = new_end_time
-    new_duration = (new_end_time - df.loc[last_activity_index, 'start_time']).total_seconds()
-    df.loc[last_activity_index, 'duration_seconds'] = new_duration
-    
-    df.to_csv(ACTIVITIES_FILE, index=False)
+@timed('storage.update_last_activity_end_time')
+def update_last_activity_end_time(new_end_time, activities_file=ACTIVITIES_FILE):
+    """
+    Finds the last non-idle/non-break activity and extends its duration.
+    Returns the updated activity as a dict, or None if there was nothing to extend.
+    """
+    with locked(activities_file):
+        df = load_activities(activities_file)
+        if df.empty:
+            return None
+
+        # Filter out idle/break activities to find the last real work session
+        real_activities = df[~df['app_name'].isin(['Idle', 'Break'])]
+        if real_activities.empty:
+            return None
+
+        # Get the index of the last real activity
+        last_activity_index = real_activities.index[-1]
+
+        # Update the end_time and recalculate the duration
+        df.loc[last_activity_index, 'end_time'] = new_end_time
+        new_duration = (new_end_time - df.loc[last_activity_index, 'start_time']).total_seconds()
+        df.loc[last_activity_index, 'duration_seconds'] = new_duration
+
+        atomic_write_csv(df, activities_file)
+    return df.loc[last_activity_index].to_dict()
 # --- End of New Function ---
\ No newline at end of file
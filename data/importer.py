@@ -0,0 +1,109 @@
+import os
+import datetime
+import numpy as np
+import pandas as pd
+
+from data.data_handler import ACTIVITIES_FILE, append_activities
+from data.compact_store import ACTIVITY_COLUMNS
+from utils.intervals import OverlapIndex
+from utils.metrics import timed
+
+# Columns an import must provide (after mapping) and ones it may provide
+REQUIRED_IMPORT_COLUMNS = ['app_name', 'start_time', 'end_time']
+OPTIONAL_IMPORT_COLUMNS = ['tags']
+
+def read_import_file(file_path):
+    """Reads a CSV or JSON Lines file with every column as text."""
+    if os.path.splitext(file_path)[1].lower() in ('.jsonl', '.ndjson', '.json'):
+        df = pd.read_json(file_path, lines=True, dtype=False)
+        return df.where(df.notna(), '').astype(str)
+    return pd.read_csv(file_path, dtype=str, keep_default_na=False)
+
+def guess_column_mapping(source_columns):
+    """Maps each target column to a source column with the same (case-insensitive) name, if any."""
+    by_lower_name = {column.lower(): column for column in source_columns}
+    return {target: by_lower_name[target] for target in REQUIRED_IMPORT_COLUMNS + OPTIONAL_IMPORT_COLUMNS if target in by_lower_name}
+
+# pandas 2 infers one format from the first value and turns rows in any other format
+# into NaT; 'mixed' parses each value on its own, as pandas 1 did by default
+_PER_VALUE_FORMAT = {'format': 'mixed'} if int(pd.__version__.split('.')[0]) >= 2 else {}
+
+def _parse_times(values):
+    try:
+        times = pd.to_datetime(values, errors='coerce', **_PER_VALUE_FORMAT)
+    except ValueError:
+        times = None
+    if times is None or times.dtype == object:
+        # Mixed UTC offsets (e.g. calendar exports across DST changes)
+        times = pd.to_datetime(values, errors='coerce', utc=True, **_PER_VALUE_FORMAT)
+    if isinstance(times.dtype, pd.DatetimeTZDtype):
+        # Stored times are naive local time, like datetime.now()
+        local_tz = datetime.datetime.now().astimezone().tzinfo
+        times = times.dt.tz_convert(local_tz).dt.tz_localize(None)
+    return times
+
+@timed('storage.prepare_import')
+def prepare_import(source_df, column_mapping, existing_df):
+    """
+    Validates and normalises rows for import in vectorised form.
+    Rows with an empty app name, unparseable times or start >= end are rejected,
+    durations are recomputed from the times, rows already in existing_df (same app,
+    start and end to the second) are dropped as duplicates, and rows overlapping
+    another imported or existing activity are flagged in an 'overlaps' column.
+    Returns (rows, report).
+    """
+    missing = [column for column in REQUIRED_IMPORT_COLUMNS if not column_mapping.get(column)]
+    if missing:
+        raise ValueError(f"No source column mapped to: {', '.join(missing)}")
+
+    df = pd.DataFrame({
+        'app_name': source_df[column_mapping['app_name']].astype(str).str.strip(),
+        'start_time': _parse_times(source_df[column_mapping['start_time']]),
+        'end_time': _parse_times(source_df[column_mapping['end_time']]),
+        'tags': source_df[column_mapping['tags']].astype(str).str.strip() if column_mapping.get('tags') else '',
+    })
+    valid = (df['app_name'] != '') & df['start_time'].notna() & df['end_time'].notna() & (df['start_time'] < df['end_time'])
+    df = df[valid].copy()
+    df['duration_seconds'] = (df['end_time'] - df['start_time']).dt.total_seconds()
+
+    # --- Duplicates: within the file and against the existing history ---
+    def interval_keys(frame):
+        return pd.MultiIndex.from_arrays([
+            frame['app_name'].astype(str),
+            frame['start_time'].values.astype('datetime64[s]'),
+            frame['end_time'].values.astype('datetime64[s]'),
+        ])
+    keys = interval_keys(df)
+    duplicate = keys.duplicated()
+    if not existing_df.empty:
+        duplicate |= keys.isin(interval_keys(existing_df))
+    df = df[~duplicate].sort_values('start_time', kind='stable').reset_index(drop=True)
+
+    # --- Overlaps: against the previous imported rows and against the existing history ---
+    starts = df['start_time'].values.astype('datetime64[ns]').view(np.int64)
+    ends = df['end_time'].values.astype('datetime64[ns]').view(np.int64)
+    overlaps = np.zeros(len(df), dtype=bool)
+    if len(df) > 1:
+        overlaps[1:] = np.maximum.accumulate(ends)[:-1] > starts[1:]
+        # Starts are sorted, so a row overlaps a later one iff the next row starts before it ends
+        overlaps[:-1] |= starts[1:] < ends[:-1]
+    if not existing_df.empty:
+        overlaps |= OverlapIndex.from_frame(existing_df).overlaps_any(starts, ends)
+    df['overlaps'] = overlaps
+
+    report = {
+        'rows': len(source_df),
+        'invalid': int((~valid).sum()),
+        'duplicates': int(duplicate.sum()),
+        'overlapping': int(overlaps.sum()),
+        'importable': len(df),
+    }
+    return df[ACTIVITY_COLUMNS + ['overlaps']], report
+
+def import_activities(rows, skip_overlapping=False, activities_file=ACTIVITIES_FILE):
+    """Commits prepared rows in one batched write. Returns the rows written."""
+    if skip_overlapping:
+        rows = rows[~rows['overlaps']]
+    rows = rows[ACTIVITY_COLUMNS]
+    append_activities(rows, activities_file)
+    return rows
@@ -0,0 +1,132 @@
+import os
+import sys
+import errno
+import time
+import shutil
+import threading
+import contextlib
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+# Locks held by this process, so a mutation may call another one without deadlocking
+_held = {}
+_held_guard = threading.Lock()
+
+def _lock_file(f):
+    if sys.platform == "win32":
+        f.seek(0)
+        # LK_LOCK gives up after ~10 seconds; keep waiting like flock does, but only
+        # while the failure is another process holding the lock
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError as e:
+                if e.errno not in (errno.EDEADLOCK, errno.EACCES):
+                    raise
+            time.sleep(0.05)
+    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+def _unlock_file(f):
+    if sys.platform == "win32":
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+@contextlib.contextmanager
+def locked(path):
+    """
+    Holds an exclusive advisory lock on `path` (through a `path`.lock sidecar) for a
+    read-modify-write. Every process that mutates the file must take it. Quick
+    readers don't need to, because writes replace the file atomically (see
+    atomic_write_csv), but on Windows a file can't be replaced while it is open, so
+    readers that keep it open for long must read a snapshot() instead.
+    Re-entrant within a thread.
+    """
+    key = os.path.abspath(path)
+    with _held_guard:
+        entry = _held.setdefault(key, [threading.RLock(), None, 0])
+    thread_lock = entry[0]
+    with thread_lock:
+        if entry[2] == 0:
+            lock_file = open(key + '.lock', 'a+b')
+            try:
+                _lock_file(lock_file)
+            except BaseException:
+                lock_file.close()
+                raise
+            entry[1] = lock_file
+        entry[2] += 1
+        try:
+            yield
+        finally:
+            entry[2] -= 1
+            if entry[2] == 0:
+                lock_file, entry[1] = entry[1], None
+                _unlock_file(lock_file)
+                lock_file.close()
+
+@contextlib.contextmanager
+def snapshot(path):
+    """
+    Yields the path of a private copy of `path`, taken under its lock, for readers that
+    keep the file open for long (a streaming export, the retention worker); writers
+    only wait for the copy. The copy is removed afterwards.
+    """
+    copy_path = f"{path}.{os.getpid()}.{threading.get_ident()}.snapshot"
+    try:
+        with locked(path):
+            shutil.copyfile(path, copy_path)
+        yield copy_path
+    finally:
+        if os.path.exists(copy_path):
+            os.remove(copy_path)
+
+def read_complete(path, unit):
+    """
+    Reads a file, dropping (and truncating away) a trailing partial record left by a
+    crash mid-write. unit is the record size in bytes, or the record terminator.
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return b''
+    complete = len(data) - len(data) % unit if isinstance(unit, int) else data.rfind(unit) + 1
+    if complete != len(data):
+        with open(path, 'r+b') as f:
+            f.truncate(complete)
+    return data[:complete]
+
+def _replace(temp_path, path, attempts=50):
+    # On Windows the target can't be replaced while a reader has it open; quick readers
+    # are done within the retries, long ones read a snapshot()
+    for attempt in range(attempts):
+        try:
+            os.replace(temp_path, path)
+            return
+        except PermissionError:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(0.02)
+
+def atomic_write_csv(df, path):
+    """
+    Writes df next to path and renames it into place, so readers never see a partial
+    file. Raises PermissionError if a reader keeps path open on Windows for ~1 s.
+    """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'w', newline='', encoding='utf-8') as f:
+            df.to_csv(f, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+        _replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
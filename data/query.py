@@ -0,0 +1,279 @@
+import os
+import re
+import json
+import numpy as np
+
+from data.data_handler import DATA_DIR
+from utils.live_totals import KeywordMatcher
+from utils.metrics import timed
+
+SAVED_VIEWS_FILE = os.path.join(DATA_DIR, 'saved_views.json')
+
+QUERY_HELP = (
+    "app:chrome  tag:meeting  duration>30m  time:09:00-12:00  productive:yes\n"
+    "Combine with AND / OR / NOT and parentheses; terms next to each other are ANDed. "
+    "Quote values with spaces: app:\"VS Code\". Plain words match app names or tags."
+)
+
+class QueryError(ValueError):
+    pass
+
+_TOKEN_PATTERN = re.compile(r'''
+    \s*(?:
+        (?P<paren>[()])
+      | (?P<field>[A-Za-z_]+)\s*(?P<op>>=|<=|!=|:|=|>|<)\s*(?P<value>"[^"]*"|[^\s()"]+)
+      | (?P<word>"[^"]*"|[^\s()"]+)
+    )''', re.VERBOSE)
+
+_DURATION_PATTERN = re.compile(r'^(?:(\d+(?:\.\d+)?)h)?(?:(\d+(?:\.\d+)?)m)?(?:(\d+(?:\.\d+)?)s)?$')
+_TIME_PATTERN = re.compile(r'^(\d{1,2})(?::(\d{2}))?$')
+_COMPARISONS = {
+    '>': np.greater, '>=': np.greater_equal, '<': np.less, '<=': np.less_equal,
+    '=': np.equal, ':': np.equal, '!=': np.not_equal,
+}
+
+def _tokenize(text):
+    tokens, position = [], 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN_PATTERN.match(text, position)
+        if not match or match.end() == position:
+            raise QueryError(f"Could not read the query at: {text[position:].strip()!r}")
+        position = match.end()
+        if match.group('paren'):
+            tokens.append(('paren', match.group('paren')))
+        elif match.group('field'):
+            tokens.append(('term', (match.group('field').lower(), match.group('op'), match.group('value').strip('"'))))
+        else:
+            word = match.group('word')
+            if word.upper() in ('AND', 'OR', 'NOT'):
+                tokens.append(('keyword', word.upper()))
+            else:
+                tokens.append(('term', ('text', ':', word.strip('"'))))
+    return tokens
+
+def _parse_duration(text):
+    """'90' (minutes), '45s', '30m', '1h30m' -> seconds."""
+    if re.fullmatch(r'\d+(?:\.\d+)?', text):
+        return float(text) * 60
+    match = _DURATION_PATTERN.match(text.lower())
+    if not text or not match or not any(match.groups()):
+        raise QueryError(f"Invalid duration {text!r}; use e.g. 45s, 30m or 1h30m")
+    hours, minutes, seconds = (float(part) if part else 0.0 for part in match.groups())
+    return hours * 3600 + minutes * 60 + seconds
+
+def _parse_time_of_day(text):
+    """'9', '09:30' -> seconds since midnight, from 00:00 to 24:00."""
+    match = _TIME_PATTERN.match(text)
+    seconds = int(match.group(1)) * 3600 + int(match.group(2) or 0) * 60 if match else -1
+    if not match or int(match.group(2) or 0) > 59 or not 0 <= seconds <= 86400:
+        raise QueryError(f"Invalid time of day {text!r}; use HH:MM between 00:00 and 24:00")
+    return seconds
+
+def _parse_flag(text):
+    value = text.lower()
+    if value in ('yes', 'true', '1'):
+        return True
+    if value in ('no', 'false', '0'):
+        return False
+    raise QueryError(f"Invalid flag {text!r}; use yes or no")
+
+# --- Predicates ---
+# Each term compiles to a function of (log, context) returning a boolean mask over the
+# log's rows. Predicates on app names and tags are evaluated once per distinct string
+# and then looked up through the row codes, so their cost barely grows with history size.
+
+def _lookup(matches, codes):
+    table = np.asarray(matches, dtype=bool)
+    return table[codes] if len(table) else np.zeros(len(codes), dtype=bool)
+
+def _app_contains(value):
+    def predicate(log, context):
+        return _lookup(log.app_categories.str.contains(value, case=False, regex=False), log.app_codes)
+    return predicate
+
+def _split_tags(tags):
+    return {tag.strip().lower() for tag in tags.split(',') if tag.strip()}
+
+def _has_tag(value):
+    value = value.lower()
+    def predicate(log, context):
+        return _lookup([value in _split_tags(tags) for tags in log.tag_categories], log.tag_codes)
+    return predicate
+
+def _text_contains(value):
+    app_predicate = _app_contains(value)
+    def predicate(log, context):
+        tag_matches = log.tag_categories.str.contains(value, case=False, regex=False)
+        return app_predicate(log, context) | _lookup(tag_matches, log.tag_codes)
+    return predicate
+
+def _productive(flag):
+    def predicate(log, context):
+        matches = KeywordMatcher(context.get('productivity_apps', [])).mask(log.app_categories)
+        mask = _lookup(matches, log.app_codes)
+        return mask if flag else ~mask
+    return predicate
+
+def _duration(op, seconds):
+    compare = _COMPARISONS[op]
+    def predicate(log, context):
+        return compare(log.durations, np.float32(seconds))
+    return predicate
+
+def _seconds_of_day(log):
+    # Start times are naive local times, so whole days are multiples of 86400 s
+    return (log.start_offsets.astype(np.int64) + log.base_seconds) % 86400
+
+def _time_range(start, end):
+    def predicate(log, context):
+        seconds = _seconds_of_day(log)
+        if start <= end:
+            return (seconds >= start) & (seconds < end)
+        # e.g. 22:00-06:00 wraps past midnight
+        return (seconds >= start) | (seconds < end)
+    return predicate
+
+def _time_compare(op, seconds):
+    compare = _COMPARISONS[op]
+    def predicate(log, context):
+        return compare(_seconds_of_day(log), seconds)
+    return predicate
+
+def _term(field, op, value):
+    if field in ('app', 'tag', 'text', 'productive') and op not in (':', '=', '!='):
+        raise QueryError(f"{field} only supports ':' and '!='")
+    if field == 'app':
+        predicate = _app_contains(value)
+    elif field == 'tag':
+        predicate = _has_tag(value)
+    elif field == 'text':
+        predicate = _text_contains(value)
+    elif field == 'productive':
+        predicate = _productive(_parse_flag(value))
+    elif field == 'duration':
+        return _duration(op, _parse_duration(value))
+    elif field == 'time':
+        if '-' in value and op == ':':
+            start, end = value.split('-', 1)
+            return _time_range(_parse_time_of_day(start), _parse_time_of_day(end))
+        seconds = _parse_time_of_day(value)
+        if op in (':', '=', '!='):
+            # time:9 means the hour from 09:00, time:9:30 the minute from 09:30
+            width = 60 if ':' in value else 3600
+            if seconds + width > 86400:
+                raise QueryError(f"Invalid time of day {value!r}; use a time before 24:00")
+            predicate = _time_range(seconds, seconds + width)
+            return _not(predicate) if op == '!=' else predicate
+        return _time_compare(op, seconds)
+    else:
+        raise QueryError(f"Unknown field {field!r}; use app, tag, duration, time or productive")
+    if op == '!=':
+        return _not(predicate)
+    return predicate
+
+def _not(predicate):
+    return lambda log, context: ~predicate(log, context)
+
+def _all(predicates):
+    def predicate(log, context):
+        mask = predicates[0](log, context)
+        for other in predicates[1:]:
+            mask &= other(log, context)
+        return mask
+    return predicate
+
+def _any(predicates):
+    def predicate(log, context):
+        mask = predicates[0](log, context)
+        for other in predicates[1:]:
+            mask |= other(log, context)
+        return mask
+    return predicate
+
+# --- Parser: or_expr := and_expr (OR and_expr)*; and_expr := not_expr ([AND] not_expr)* ---
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def take(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def parse_or(self):
+        predicates = [self.parse_and()]
+        while self.peek() == ('keyword', 'OR'):
+            self.take()
+            predicates.append(self.parse_and())
+        return predicates[0] if len(predicates) == 1 else _any(predicates)
+
+    def parse_and(self):
+        predicates = [self.parse_not()]
+        while True:
+            kind, value = self.peek()
+            if (kind, value) == ('keyword', 'AND'):
+                self.take()
+            elif kind is None or (kind, value) in (('keyword', 'OR'), ('paren', ')')):
+                break
+            predicates.append(self.parse_not())
+        return predicates[0] if len(predicates) == 1 else _all(predicates)
+
+    def parse_not(self):
+        if self.peek() == ('keyword', 'NOT'):
+            self.take()
+            return _not(self.parse_not())
+        return self.parse_atom()
+
+    def parse_atom(self):
+        kind, value = self.take()
+        if (kind, value) == ('paren', '('):
+            predicate = self.parse_or()
+            if self.take() != ('paren', ')'):
+                raise QueryError("Missing ')'")
+            return predicate
+        if kind == 'term':
+            return _term(*value)
+        raise QueryError("Incomplete query" if kind is None else f"Unexpected {value!r}")
+
+def compile_query(text):
+    """
+    Compiles a query (see QUERY_HELP) into a function (log, context) -> boolean mask
+    over a CompactActivityLog's rows. context carries settings such as
+    productivity_apps. An empty query matches everything. Raises QueryError.
+    """
+    tokens = _tokenize(text)
+    if not tokens:
+        return lambda log, context: np.ones(len(log), dtype=bool)
+    parser = _Parser(tokens)
+    predicate = parser.parse_or()
+    if parser.position != len(tokens):
+        raise QueryError(f"Unexpected {parser.peek()[1]!r}")
+    return predicate
+
+@timed('query.run_query')
+def run_query(log, text, context, start=None, end=None):
+    """Returns the log rows matching the query (and overlapping [start, end), if given) as a DataFrame."""
+    return log.to_frame_where(compile_query(text)(log, context), start, end)
+
+# --- Saved views ---
+
+def load_saved_views(views_file=SAVED_VIEWS_FILE):
+    """Returns {name: query} of the user's saved views."""
+    try:
+        with open(views_file, encoding='utf-8') as f:
+            views = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return {str(name): str(query) for name, query in views.items()} if isinstance(views, dict) else {}
+
+def save_saved_views(views, views_file=SAVED_VIEWS_FILE):
+    temp_file = views_file + '.tmp'
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(views.items())), f, indent=2)
+    os.replace(temp_file, views_file)
@@ -0,0 +1,119 @@
+import hashlib
+import datetime
+import numpy as np
+import pandas as pd
+
+from data.data_handler import ACTIVITIES_FILE, load_activities
+from data.compact_store import ACTIVITY_COLUMNS
+from data.locking import locked, snapshot, atomic_write_csv
+from utils.intervals import to_ns, clip_intervals, deoverlap_intervals
+from utils.metrics import timed
+
+RETENTION_GRANULARITIES = {'hour': pd.Timedelta(hours=1), 'day': pd.Timedelta(days=1)}
+
+def retention_cutoff(retention_days, now=None):
+    """Midnight retention_days ago; only activities that ended before it are rolled up."""
+    today = (now or datetime.datetime.now()).date()
+    return pd.Timestamp(today - datetime.timedelta(days=retention_days))
+
+def normalize_tags(tags):
+    """'b, a,b' -> 'a, b'; the same set of tags always gives the same string."""
+    return ', '.join(sorted({tag.strip() for tag in tags.split(',') if tag.strip()}))
+
+def rollup_activities(activities_df, cutoff, granularity='day'):
+    """
+    Compacts the activities that ended before cutoff into one row per app, tag set
+    and hour/day bucket. Each row keeps the bucket's total duration, and the rows are
+    packed back to back inside the bucket (end - start == duration), so splitting by
+    day or hour and summing durations gives the same results as the raw rows did.
+    """
+    old_df = activities_df[activities_df['end_time'] <= cutoff]
+    if old_df.empty:
+        return old_df[ACTIVITY_COLUMNS].copy()
+
+    step = RETENTION_GRANULARITIES[granularity]
+    edges = to_ns(pd.date_range(start=old_df['start_time'].min().floor(step), end=cutoff, freq=step))
+    # Count doubly covered time once, as the reports do
+    starts, ends = deoverlap_intervals(to_ns(old_df['start_time']), to_ns(old_df['end_time']))
+    rows, buckets, piece_starts, piece_ends = clip_intervals(starts, ends, edges)
+
+    unique_tags, tag_codes = np.unique(old_df['tags'].fillna('').astype(str).to_numpy(), return_inverse=True)
+    normalized_tags = np.array([normalize_tags(tags) for tags in unique_tags], dtype=object)
+    pieces = pd.DataFrame({
+        'app_name': old_df['app_name'].to_numpy()[rows],
+        'tags': normalized_tags[tag_codes[rows]],
+        'bucket': buckets,
+        'piece_start': piece_starts,
+        'duration': piece_ends - piece_starts,
+    })
+    rolled = pieces.groupby(['app_name', 'tags', 'bucket'], sort=False).agg(
+        first_start=('piece_start', 'min'), duration=('duration', 'sum')
+    ).reset_index()
+
+    # Lay the rows of a bucket end to end from its start, in order of first use, so they
+    # never overlap each other (reports de-overlap time and would otherwise drop some)
+    rolled = rolled.sort_values(['bucket', 'first_start'], kind='stable')
+    duration = rolled['duration'].to_numpy()
+    offsets = rolled.groupby('bucket', sort=False)['duration'].cumsum().to_numpy() - duration
+    starts = edges[rolled['bucket'].to_numpy()] + offsets
+    rolled_df = pd.DataFrame({
+        'app_name': rolled['app_name'].to_numpy(),
+        'start_time': pd.to_datetime(starts),
+        'end_time': pd.to_datetime(starts + duration),
+        'duration_seconds': duration / 1e9,
+        'tags': rolled['tags'].to_numpy(),
+    })
+    return rolled_df.sort_values('start_time', kind='stable').reset_index(drop=True)
+
+def _old_rows_signature(activities_df, cutoff):
+    """Digest of the rows that ended before cutoff, the only rows a rollup replaces."""
+    old_df = activities_df.loc[activities_df['end_time'] <= cutoff, ACTIVITY_COLUMNS]
+    digest = hashlib.sha256(str(len(old_df)).encode())
+    digest.update(pd.util.hash_pandas_object(old_df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+@timed('storage.plan_rollup')
+def plan_rollup(cutoff, granularity='day', activities_file=ACTIVITIES_FILE):
+    """
+    Background task: computes the rolled-up rows for everything before cutoff.
+    Returns None if there is nothing left to compact.
+    """
+    # Parse a copy, so the tracker can keep saving while a large history is read
+    with snapshot(activities_file) as snapshot_path:
+        activities_df = load_activities(snapshot_path)
+    signature = _old_rows_signature(activities_df, cutoff)
+    raw_rows = int((activities_df['end_time'] <= cutoff).sum())
+    rolled_df = rollup_activities(activities_df, cutoff, granularity)
+    if len(rolled_df) >= raw_rows:
+        return None
+    return {'signature': signature, 'cutoff': cutoff, 'rolled': rolled_df, 'raw_rows': raw_rows}
+
+def rollup_changes(replaced_df, rolled_df):
+    """
+    The sync changes a rollup amounts to: (start times of replaced rows to delete,
+    rolled rows to upsert). Rows an earlier rollup produced come out of the next one
+    unchanged and are left out, so each run only sends the newly compacted rows. A
+    kept row that starts where a deleted one did is upserted again to survive the delete.
+    """
+    keys = ['app_name', 'start_time', 'end_time', 'tags']
+    replaced_keys, rolled_keys = replaced_df[keys], rolled_df[keys]
+    gone = replaced_keys.merge(rolled_keys.drop_duplicates(), on=keys, how='left', indicator=True)['_merge'].to_numpy() == 'left_only'
+    new = rolled_keys.merge(replaced_keys.drop_duplicates(), on=keys, how='left', indicator=True)['_merge'].to_numpy() == 'left_only'
+    deleted = replaced_df['start_time'][gone]
+    return deleted, rolled_df[new | rolled_df['start_time'].isin(deleted).to_numpy()]
+
+@timed('storage.apply_rollup')
+def apply_rollup(plan, activities_file=ACTIVITIES_FILE):
+    """
+    Replaces the rows before the plan's cutoff with its rolled-up rows in one write
+    and returns the rows it replaced. Rows added after the cutoff since the plan was
+    made (the tracker appends all the time) are kept; if any row before the cutoff
+    changed, nothing is written and None is returned.
+    """
+    with locked(activities_file):
+        activities_df = load_activities(activities_file)
+        if _old_rows_signature(activities_df, plan['cutoff']) != plan['signature']:
+            return None
+        is_old = activities_df['end_time'] <= plan['cutoff']
+        atomic_write_csv(pd.concat([plan['rolled'], activities_df[~is_old]], ignore_index=True).sort_values('start_time', kind='stable'), activities_file)
+    return activities_df[is_old]
@@ -0,0 +1,111 @@
+import os
+import datetime
+import numpy as np
+import pandas as pd
+
+from data.data_handler import DATA_DIR
+from data.locking import read_complete
+from utils.text_index import TokenIndex
+from utils.metrics import timed
+
+WINDOW_TITLES_FILE = os.path.join(DATA_DIR, 'window_titles.txt')
+TITLE_SEGMENTS_FILE = os.path.join(DATA_DIR, 'title_segments.bin')
+
+# One row per title change: start time (Unix milliseconds) and title code; -1 marks "no title" (idle, paused, exited)
+SEGMENT_DTYPE = np.dtype([('start_ms', '<i8'), ('code', '<i4')])
+NO_TITLE = -1
+
+def _to_ms(when):
+    return int(when.timestamp() * 1000)
+
+class TitleStore:
+    """
+    Raw window titles over time. Each distinct title is stored once in a dictionary
+    file and numbered by its line; every title change appends a 12-byte
+    (start, code) segment, so repeated titles cost one integer per row.
+    A token index over the distinct titles answers searches across the whole history.
+    """
+    def __init__(self, titles_file=WINDOW_TITLES_FILE, segments_file=TITLE_SEGMENTS_FILE):
+        self.titles_file = titles_file
+        self.segments_file = segments_file
+        self.titles = []
+        self.codes = {}
+        self.index = TokenIndex()
+        for line in read_complete(titles_file, b'\n').decode('utf-8', errors='replace').splitlines():
+            self._add_title(line)
+        data = read_complete(segments_file, SEGMENT_DTYPE.itemsize)
+        segments = np.frombuffer(data, dtype=SEGMENT_DTYPE).copy()
+        self._segments = [segments]
+        self._last = segments[-1] if len(segments) else None
+
+    def _add_title(self, title):
+        code = len(self.titles)
+        self.titles.append(title)
+        self.codes[title] = code
+        self.index.add(code, title)
+        return code
+
+    def _code_for(self, title):
+        # Titles are stored one per line
+        title = ' '.join(title.splitlines()).strip()
+        code = self.codes.get(title)
+        if code is None:
+            code = self._add_title(title)
+            with open(self.titles_file, 'a', encoding='utf-8') as f:
+                f.write(title + '\n')
+        return code
+
+    def _append(self, start_ms, code):
+        if self._last is not None and (self._last['code'] == code or start_ms < self._last['start_ms']):
+            return
+        segment = np.array([(start_ms, code)], dtype=SEGMENT_DTYPE)
+        with open(self.segments_file, 'ab') as f:
+            segment.tofile(f)
+        self._segments.append(segment)
+        self._last = segment[0]
+
+    def record(self, title, when=None):
+        """Starts a segment for title, unless it is already the current one."""
+        self._append(_to_ms(when or datetime.datetime.now()), self._code_for(title))
+
+    def close_segment(self, when=None):
+        """Ends the current segment (idle, pause, exit, or the last checkpoint before a crash)."""
+        self._append(_to_ms(when or datetime.datetime.now()), NO_TITLE)
+
+    def segments(self):
+        if len(self._segments) > 1:
+            self._segments = [np.concatenate(self._segments)]
+        return self._segments[0]
+
+    def clear(self):
+        for path in (self.titles_file, self.segments_file):
+            if os.path.exists(path):
+                os.remove(path)
+        self.__init__(self.titles_file, self.segments_file)
+
+    @timed('search.window_titles')
+    def search(self, query, limit=500, now=None):
+        """
+        Titles matching every word of query (as prefixes), with the total time spent
+        on each and when it was last seen, most time first.
+        """
+        matching_codes = self.index.search(query)
+        if not matching_codes:
+            return pd.DataFrame(columns=['title', 'total_seconds', 'last_seen'])
+        segments = self.segments()
+        starts = segments['start_ms']
+        # A segment lasts until the next one starts; the open one until now
+        ends = np.append(starts[1:], _to_ms(now or datetime.datetime.now()))
+        codes = segments['code']
+        rows = np.flatnonzero(np.isin(codes, np.fromiter(matching_codes, dtype=np.int32)))
+        if len(rows) == 0:
+            return pd.DataFrame(columns=['title', 'total_seconds', 'last_seen'])
+
+        result = pd.DataFrame({'code': codes[rows], 'seconds': (ends[rows] - starts[rows]) / 1000, 'start_ms': starts[rows]})
+        result = result.groupby('code').agg(total_seconds=('seconds', 'sum'), last_ms=('start_ms', 'max'))
+        result = result.sort_values('total_seconds', ascending=False).head(limit)
+        return pd.DataFrame({
+            'title': [self.titles[code] for code in result.index],
+            'total_seconds': result['total_seconds'].to_numpy(),
+            'last_seen': [datetime.datetime.fromtimestamp(ms / 1000) for ms in result['last_ms']],
+        })
@@ -1,5 +1,7 @@
 import sys
 import os
+import argparse
+import multiprocessing
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtGui import QFont
 
@@ -10,19 +12,42 @@ sys.path.insert(0, project_root)
 # --- End of fix ---
 
 from ui.main_window import ProductivityTrackerApp
+from services.single_instance import SingleInstanceGuard
+from tracking.window_detector import SystemBackend
+from tracking.trace import TraceRecorder
+from data.config import load_config
 
 if __name__ == '__main__':
     """
     Main entry point for the Automated ProductivityTracker application.
     """
-    app = QApplication(sys.argv)
+    # Required for worker processes (e.g. PDF export) in the frozen build
+    multiprocessing.freeze_support()
+
+    parser = argparse.ArgumentParser(description="Automated Productivity Tracker")
+    parser.add_argument('--record-trace', metavar='PATH', help="Also record window titles and idle periods to a trace file for benchmarks/replay_trace.py.")
+    args, qt_args = parser.parse_known_args()
+
+    app = QApplication(sys.argv[:1] + qt_args)
     
     # Set a modern, clean default font for the entire application
     font = QFont("Segoe UI", 10)
     app.setFont(font)
 
+    # Only one tracker may write to tracker_data/; a second launch brings the first to the front
+    instance_guard = SingleInstanceGuard()
+    if instance_guard.notify_running_instance():
+        sys.exit(0)
+    if not instance_guard.listen():
+        print("Warning: could not register as the running instance; a second launch will not be detected.")
+
     # Instantiate and show the main application window
-    main_app = ProductivityTrackerApp()
+    detector_backend = None
+    if args.record_trace:
+        config = load_config()
+        detector_backend = TraceRecorder(args.record_trace, SystemBackend(), config['check_interval_seconds'], config['idle_threshold_minutes'])
+    main_app = ProductivityTrackerApp(detector_backend=detector_backend)
+    instance_guard.activation_requested.connect(main_app.bring_to_front)
     main_app.show()
     
     # Start the application's event loop
@@ -0,0 +1,87 @@
+import gzip
+import json
+import queue
+import threading
+import urllib.request
+import urllib.error
+
+class AggregationClient:
+    """
+    Pushes closed activities to an aggregation server in compressed batches.
+    enqueue() never blocks the caller; a daemon thread sends everything waiting
+    every flush_interval seconds, in requests of at most batch_size rows.
+    Rows that fail to send are kept (up to max_pending) and retried. Only that
+    thread touches the pending rows, including the final flush on close().
+    """
+    def __init__(self, server_url, user_id, batch_size=200, flush_interval=30, max_pending=50000, timeout=10):
+        self.server_url = server_url
+        self.push_url = server_url.rstrip('/') + '/push'
+        self.user_id = user_id
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self._pending = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='AggregationClient', daemon=True)
+        self._thread.start()
+
+    def enqueue(self, activity):
+        self._queue.put({
+            'app_name': activity['app_name'],
+            'start_time': activity['start_time'].isoformat(sep=' '),
+            'end_time': activity['end_time'].isoformat(sep=' '),
+            'duration_seconds': activity['duration_seconds'],
+            'tags': activity.get('tags', ''),
+        })
+
+    def _drain_queue(self):
+        while True:
+            try:
+                self._pending.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if len(self._pending) > self.max_pending:
+            # Drop the oldest rows rather than grow without bound while offline
+            del self._pending[:len(self._pending) - self.max_pending]
+
+    def _send(self, rows):
+        body = gzip.compress('\n'.join(json.dumps(row) for row in rows).encode('utf-8'))
+        request = urllib.request.Request(self.push_url, data=body, method='POST', headers={
+            'Content-Type': 'application/x-ndjson',
+            'Content-Encoding': 'gzip',
+            'X-User-Id': self.user_id,
+        })
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return response.status == 200
+
+    def _flush(self):
+        """Sends everything waiting; returns False if the server could not be reached. Worker thread only."""
+        self._drain_queue()
+        while self._pending:
+            batch = self._pending[:self.batch_size]
+            try:
+                if not self._send(batch):
+                    return False
+            except (urllib.error.URLError, OSError):
+                return False
+            del self._pending[:len(batch)]
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self._flush()
+        # Final attempt, made here so no other thread ever sends the same rows
+        self._flush()
+
+    def close(self, timeout=5, wait=True):
+        """
+        Asks the background thread to make one last flush, with requests limited to
+        timeout seconds, and stop. With wait, blocks until it has finished (at most
+        about one request); otherwise the thread finishes on its own.
+        """
+        self.timeout = timeout
+        self._stop.set()
+        if wait:
+            self._thread.join(timeout + 1)
@@ -0,0 +1,236 @@
+import sys
+import os
+import re
+import csv
+import gzip
+import json
+import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+ACTIVITY_COLUMNS = ['app_name', 'start_time', 'end_time', 'duration_seconds', 'tags']
+# user_ids become directory names, so only allow UUID-like values
+USER_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+def summarize_shard(shard_file, start, end, productive_apps):
+    """
+    Worker task: totals for one user's shard between start and end (dates, inclusive).
+    Runs in a separate process so shards are summarised in parallel.
+    """
+    import datetime
+    import pandas as pd
+    from utils.intervals import day_edges, split_activities
+    from utils.live_totals import KeywordMatcher
+
+    df = pd.read_csv(shard_file, on_bad_lines='skip')
+    df['start_time'] = pd.to_datetime(df['start_time'], errors='coerce')
+    df['end_time'] = pd.to_datetime(df['end_time'], errors='coerce')
+    df = df.dropna(subset=['start_time', 'end_time'])
+    df['tags'] = df['tags'].fillna('').astype(str)
+    df = split_activities(df, day_edges(datetime.date.fromisoformat(start), datetime.date.fromisoformat(end)))
+
+    # Classified like the tracker's own totals; each distinct app is matched once
+    app_codes, app_names = pd.factorize(df['app_name'].fillna('').astype(str))
+    productive_mask = KeywordMatcher(productive_apps).mask(app_names)[app_codes] if len(app_names) else []
+    total_seconds = float(df['duration_seconds'].sum())
+    productive_seconds = float(df.loc[productive_mask, 'duration_seconds'].sum())
+    top_apps = df.groupby('app_name')['duration_seconds'].sum().nlargest(5)
+    return {
+        'rows': int(len(df)),
+        'total_seconds': total_seconds,
+        'productive_seconds': productive_seconds,
+        'focus_score': productive_seconds / total_seconds * 100 if total_seconds > 0 else 0,
+        'top_apps': {app: float(seconds) for app, seconds in top_apps.items()},
+    }
+
+class ShardStore:
+    """
+    Append-only per-user activity shards under data_dir/<user_id>/activities.csv.
+    A row whose start_time the user's shard already holds is skipped, so a batch
+    that is pushed again (e.g. after a timed-out response) is not counted twice.
+    """
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        os.makedirs(data_dir, exist_ok=True)
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        # user_id -> start_times in the shard, read from the file on the user's first push
+        self._start_times = {}
+
+    def _lock_for(self, user_id):
+        with self._locks_lock:
+            return self._locks.setdefault(user_id, threading.Lock())
+
+    def shard_file(self, user_id):
+        return os.path.join(self.data_dir, user_id, 'activities.csv')
+
+    def _known_start_times(self, user_id):
+        start_times = self._start_times.get(user_id)
+        if start_times is None:
+            start_times = set()
+            try:
+                with open(self.shard_file(user_id), newline='', encoding='utf-8') as f:
+                    start_times.update(row.get('start_time') for row in csv.DictReader(f))
+            except FileNotFoundError:
+                pass
+            self._start_times[user_id] = start_times
+        return start_times
+
+    def append(self, user_id, rows):
+        """
+        Appends the rows not yet in the user's shard and returns how many that was;
+        after the first push, cost is proportional to the batch, not the shard.
+        """
+        shard_file = self.shard_file(user_id)
+        with self._lock_for(user_id):
+            start_times = self._known_start_times(user_id)
+            new_rows = []
+            for row in rows:
+                start_time = str(row['start_time'])
+                if start_time not in start_times:
+                    start_times.add(start_time)
+                    new_rows.append(row)
+            if not new_rows:
+                return 0
+            os.makedirs(os.path.dirname(shard_file), exist_ok=True)
+            is_new = not os.path.exists(shard_file)
+            with open(shard_file, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=ACTIVITY_COLUMNS, extrasaction='ignore')
+                if is_new:
+                    writer.writeheader()
+                writer.writerows(new_rows)
+            return len(new_rows)
+
+    def user_ids(self):
+        return sorted(
+            name for name in os.listdir(self.data_dir)
+            if USER_ID_PATTERN.match(name) and os.path.exists(self.shard_file(name))
+        )
+
+class AggregationServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, data_dir, report_workers=None):
+        super().__init__(address, AggregationRequestHandler)
+        self.store = ShardStore(data_dir)
+        self.report_pool = ProcessPoolExecutor(max_workers=report_workers)
+
+    def team_report(self, start, end, productive_apps):
+        """Summarises every shard in parallel and adds team-wide totals."""
+        user_ids = self.store.user_ids()
+        futures = {
+            user_id: self.report_pool.submit(summarize_shard, self.store.shard_file(user_id), start, end, productive_apps)
+            for user_id in user_ids
+        }
+        users = {user_id: future.result() for user_id, future in futures.items()}
+        total_seconds = sum(u['total_seconds'] for u in users.values())
+        productive_seconds = sum(u['productive_seconds'] for u in users.values())
+        return {
+            'start': start,
+            'end': end,
+            'users': users,
+            'team': {
+                'users': len(users),
+                'total_seconds': total_seconds,
+                'productive_seconds': productive_seconds,
+                'focus_score': productive_seconds / total_seconds * 100 if total_seconds > 0 else 0,
+            },
+        }
+
+    def server_close(self):
+        super().server_close()
+        self.report_pool.shutdown(wait=False, cancel_futures=True)
+
+class AggregationRequestHandler(BaseHTTPRequestHandler):
+    """
+    POST /push    gzip-compressed JSON lines of activities, X-User-Id header
+    GET  /report  ?start=YYYY-MM-DD&end=YYYY-MM-DD&productive=VS Code,PyCharm
+    GET  /health
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        # Per-request logging to stderr would dominate the cost of small pushes
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if urlparse(self.path).path != '/push':
+            return self._send_json(404, {'error': 'not found'})
+        user_id = self.headers.get('X-User-Id', '')
+        if not USER_ID_PATTERN.match(user_id):
+            return self._send_json(400, {'error': 'missing or invalid X-User-Id'})
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            return self._send_json(400, {'error': 'invalid Content-Length'})
+        if length <= 0 or length > MAX_BODY_BYTES:
+            return self._send_json(413 if length > MAX_BODY_BYTES else 400, {'error': 'invalid body size'})
+
+        body = self.rfile.read(length)
+        try:
+            if self.headers.get('Content-Encoding', '') == 'gzip':
+                body = gzip.decompress(body)
+            rows = [json.loads(line) for line in body.decode('utf-8').splitlines() if line.strip()]
+        except (OSError, ValueError) as e:
+            return self._send_json(400, {'error': f'could not decode batch: {e}'})
+        if any(not isinstance(row, dict) or 'start_time' not in row or 'end_time' not in row for row in rows):
+            return self._send_json(400, {'error': 'every row needs start_time and end_time'})
+
+        added = self.server.store.append(user_id, rows)
+        self._send_json(200, {'accepted': len(rows), 'duplicates': len(rows) - added})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/health':
+            return self._send_json(200, {'status': 'ok'})
+        if url.path != '/report':
+            return self._send_json(404, {'error': 'not found'})
+        query = parse_qs(url.query)
+        try:
+            start = query['start'][0]
+            end = query.get('end', [start])[0]
+        except KeyError:
+            return self._send_json(400, {'error': 'start is required'})
+        productive_apps = [app.strip() for app in query.get('productive', [''])[0].split(',') if app.strip()]
+        try:
+            self._send_json(200, self.server.team_report(start, end, productive_apps))
+        except ValueError as e:
+            self._send_json(400, {'error': str(e)})
+
+def serve(host='127.0.0.1', port=8765, data_dir='aggregation_data', report_workers=None):
+    """Creates the server; port 0 picks a free port (see server.server_address)."""
+    return AggregationServer((host, port), data_dir, report_workers)
+
+def main():
+    parser = argparse.ArgumentParser(description="Team aggregation service for productivity tracker instances.")
+    parser.add_argument('--host', default='127.0.0.1', help="Use 0.0.0.0 to accept pushes from the local network.")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--data-dir', default='aggregation_data', help="Where per-user shards are stored.")
+    parser.add_argument('--report-workers', type=int, default=None, help="Processes used to summarise shards.")
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, args.data_dir, args.report_workers)
+    print(f"Aggregation server listening on http://{server.server_address[0]}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,59 @@
+import os
+import hashlib
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtNetwork import QLocalServer, QLocalSocket
+
+from data.data_handler import DATA_DIR
+
+ACTIVATE_MESSAGE = b'activate'
+
+def server_name(data_dir=DATA_DIR):
+    """One name per data directory, so trackers for different data can still run side by side."""
+    digest = hashlib.sha1(os.path.abspath(data_dir).lower().encode('utf-8')).hexdigest()[:16]
+    return f"productivity-tracker-{digest}"
+
+class SingleInstanceGuard(QObject):
+    """
+    Makes sure only one tracker runs against a data directory. The first instance
+    listens on a local socket; a later one sends it ACTIVATE_MESSAGE (so it can show
+    its window) and exits instead of becoming a second writer.
+    """
+    activation_requested = pyqtSignal()
+
+    def __init__(self, data_dir=DATA_DIR, parent=None):
+        super().__init__(parent)
+        self.name = server_name(data_dir)
+        self.server = None
+
+    def notify_running_instance(self, timeout_ms=500):
+        """Returns True if another instance is running (and was asked to activate)."""
+        socket = QLocalSocket()
+        socket.connectToServer(self.name)
+        if not socket.waitForConnected(timeout_ms):
+            return False
+        socket.write(ACTIVATE_MESSAGE)
+        socket.waitForBytesWritten(timeout_ms)
+        socket.disconnectFromServer()
+        return True
+
+    def listen(self):
+        """Becomes the running instance. Returns False if the name could not be claimed."""
+        self.server = QLocalServer(self)
+        if not self.server.listen(self.name):
+            # A crashed instance can leave its socket file behind (Unix); nobody answered on it
+            QLocalServer.removeServer(self.name)
+            if not self.server.listen(self.name):
+                return False
+        self.server.newConnection.connect(self._on_new_connection)
+        return True
+
+    def _on_new_connection(self):
+        socket = self.server.nextPendingConnection()
+        if socket is None:
+            return
+        socket.readyRead.connect(lambda: self._on_message(socket))
+        socket.disconnected.connect(socket.deleteLater)
+
+    def _on_message(self, socket):
+        if bytes(socket.readAll()).strip() == ACTIVATE_MESSAGE:
+            self.activation_requested.emit()
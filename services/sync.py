@@ -0,0 +1,210 @@
+import os
+import json
+import time
+import datetime
+import pandas as pd
+
+from data.data_handler import DATA_DIR, ACTIVITIES_FILE, load_activities
+from data.locking import locked, atomic_write_csv
+from utils.metrics import timed
+
+SYNC_JOURNAL_FILE = os.path.join(DATA_DIR, 'sync_journal.jsonl')
+SYNC_STATE_FILE = os.path.join(DATA_DIR, 'sync_state.json')
+
+def _row_key(start_time):
+    """Rows are identified across instances by their exact start time."""
+    return pd.Timestamp(start_time).isoformat()
+
+class SyncJournal:
+    """
+    Append-only log of this instance's local changes, plus the sync state:
+    how far the journal has been exported (the local high-water mark) and,
+    for every peer user_id, how far its journal has been imported.
+    Tag edits carry a timestamp so concurrent edits resolve last-writer-wins.
+    """
+    def __init__(self, journal_file=SYNC_JOURNAL_FILE, state_file=SYNC_STATE_FILE):
+        self.journal_file = journal_file
+        self.state_file = state_file
+        self.state = self._load_state()
+
+    def _load_state(self):
+        try:
+            with open(self.state_file) as f: return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {'seq': 0, 'exported_offset': 0, 'peers': {}, 'tag_versions': {}}
+
+    def save_state(self):
+        temp_file = self.state_file + '.tmp'
+        with open(temp_file, 'w') as f: json.dump(self.state, f)
+        os.replace(temp_file, self.state_file)
+
+    def _append(self, *entries):
+        now = time.time()
+        for entry in entries:
+            self.state['seq'] += 1
+            entry['seq'] = self.state['seq']
+            entry['ts'] = now
+        with open(self.journal_file, 'a', encoding='utf-8') as f:
+            f.writelines(json.dumps(entry) + '\n' for entry in entries)
+        return entries[-1] if entries else None
+
+    @staticmethod
+    def _upsert_entry(activity):
+        return {
+            'op': 'upsert',
+            'key': _row_key(activity['start_time']),
+            'app_name': activity['app_name'],
+            'end_time': pd.Timestamp(activity['end_time']).isoformat(),
+            'duration_seconds': float(activity['duration_seconds']),
+            'tags': activity.get('tags', ''),
+        }
+
+    def record_upsert(self, activity):
+        """Records a new or extended activity."""
+        self._append(self._upsert_entry(activity))
+        self.save_state()
+
+    def record_upserts(self, activities_df):
+        """Records many new activities (e.g. a bulk import) with one journal write."""
+        self._append(*(self._upsert_entry(activity) for activity in activities_df.to_dict('records')))
+        self.save_state()
+
+    def record_delete(self, start_time):
+        """Records the removal of an activity (e.g. replaced by a manual entry)."""
+        self._append({'op': 'delete', 'key': _row_key(start_time)})
+        self.save_state()
+
+    def record_deletes(self, start_times):
+        """Records the removal of many activities (e.g. replaced by a retention rollup) with one journal write."""
+        self._append(*({'op': 'delete', 'key': _row_key(start_time)} for start_time in start_times))
+        self.save_state()
+
+    def record_tags(self, start_time, tags):
+        """Records a tag edit on an existing activity."""
+        entry = self._append({'op': 'tags', 'key': _row_key(start_time), 'tags': tags})
+        self.state['tag_versions'][entry['key']] = entry['ts']
+        self.save_state()
+
+def _read_new_lines(path, offset):
+    """Returns complete lines written after offset and the offset just past them."""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+    except FileNotFoundError:
+        return [], offset
+    # A peer may be mid-write; leave any trailing partial line for next time
+    complete = data[:data.rfind(b'\n') + 1]
+    return complete.decode('utf-8').splitlines(), offset + len(complete)
+
+def _apply_entries(entries, tag_versions, activities_file):
+    """Merges peer journal entries into the local history in a single write, if any row changed. Returns rows changed."""
+    if not entries:
+        return 0
+    with locked(activities_file):
+        df = load_activities(activities_file)
+        df['tags'] = df['tags'].astype(object)
+        row_by_key = {_row_key(t): i for i, t in zip(df.index, df['start_time'])}
+        new_rows = {}
+        deleted_keys = set()
+        changed = 0
+
+        for entry in entries:
+            key = entry['key']
+            if entry['op'] == 'upsert':
+                was_deleted = key in deleted_keys
+                deleted_keys.discard(key)
+                values = {
+                    'app_name': entry['app_name'],
+                    'start_time': pd.Timestamp(key),
+                    'end_time': pd.Timestamp(entry['end_time']),
+                    'duration_seconds': entry['duration_seconds'],
+                }
+                if key in row_by_key:
+                    row = row_by_key[key]
+                    # A row we already have (e.g. the entry was seen before) changes nothing
+                    if not was_deleted and all(df.at[row, column] == value for column, value in values.items()):
+                        continue
+                    for column, value in values.items():
+                        df.at[row, column] = value
+                elif key in new_rows:
+                    new_rows[key].update(values)
+                else:
+                    new_rows[key] = dict(values, tags=entry.get('tags', ''))
+                changed += 1
+            elif entry['op'] == 'tags':
+                # Last writer wins; replaying an entry we've already applied is a no-op
+                if entry['ts'] <= tag_versions.get(key, 0):
+                    continue
+                tag_versions[key] = entry['ts']
+                if key in row_by_key:
+                    if df.at[row_by_key[key], 'tags'] == entry['tags']:
+                        continue
+                    df.at[row_by_key[key], 'tags'] = entry['tags']
+                elif key in new_rows:
+                    new_rows[key]['tags'] = entry['tags']
+                else:
+                    continue
+                changed += 1
+            elif entry['op'] == 'delete':
+                if key in row_by_key:
+                    deleted_keys.add(key)
+                elif new_rows.pop(key, None) is None:
+                    continue
+                changed += 1
+
+        if not changed:
+            # Nothing to write; a no-op sync must not rewrite the history
+            return 0
+        if deleted_keys:
+            df = df.drop(index=[row_by_key[key] for key in deleted_keys])
+        if new_rows:
+            df = pd.concat([df, pd.DataFrame(list(new_rows.values()))], ignore_index=True).sort_values('start_time')
+        atomic_write_csv(df, activities_file)
+    return changed
+
+@timed('sync.sync_with_folder')
+def sync_with_folder(shared_dir, user_id, journal, activities_file=ACTIVITIES_FILE):
+    """
+    Exchanges changes with every other instance using shared_dir (e.g. a synced
+    cloud folder). Each instance appends its own journal to <shared_dir>/<user_id>.jsonl
+    and reads the others' files from where it last stopped, so the work done is
+    proportional to the number of changes, not to the size of the history.
+    """
+    os.makedirs(shared_dir, exist_ok=True)
+    state = journal.state
+    # Offsets and seqs advance in copies and reach journal.state only once the entries
+    # are applied, so a failed sync is retried from the same place
+    peers = {peer_id: dict(peer_state) for peer_id, peer_state in state['peers'].items()}
+    tag_versions = dict(state['tag_versions'])
+
+    # --- Export: copy local journal lines past the high-water mark ---
+    outgoing, exported_offset = _read_new_lines(journal.journal_file, state['exported_offset'])
+    if outgoing:
+        with open(os.path.join(shared_dir, f"{user_id}.jsonl"), 'a', encoding='utf-8') as f:
+            f.write('\n'.join(outgoing) + '\n')
+
+    # --- Import: read every peer's journal from its last offset ---
+    entries = []
+    for file_name in sorted(os.listdir(shared_dir)):
+        peer_id, extension = os.path.splitext(file_name)
+        if extension != '.jsonl' or peer_id == user_id:
+            continue
+        peer_state = peers.setdefault(peer_id, {'offset': 0, 'seq': 0})
+        lines, peer_state['offset'] = _read_new_lines(os.path.join(shared_dir, file_name), peer_state['offset'])
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A line cut short by an interrupted sync of the peer's file
+                print(f"Skipping unreadable line in {file_name}: {line[:80]!r}")
+                continue
+            if entry['seq'] > peer_state['seq']:
+                entries.append(entry)
+                peer_state['seq'] = entry['seq']
+
+    changed = _apply_entries(entries, tag_versions, activities_file)
+    state.update({'exported_offset': exported_offset, 'peers': peers, 'tag_versions': tag_versions})
+    journal.save_state()
+    return {'exported': len(outgoing), 'imported': len(entries), 'changed': changed,
+            'synced_at': datetime.datetime.now().isoformat(timespec='seconds')}
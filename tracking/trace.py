@@ -0,0 +1,121 @@
+import json
+import bisect
+import datetime
+
+TRACE_VERSION = 1
+
+# A trace is a JSON Lines file. The first line is a header:
+#   {"version": 1, "start": "2025-01-06T09:00:00", "check_interval_seconds": 3, "idle_threshold_minutes": 5}
+# Every other line is an event, t being seconds since start:
+#   {"t": 12.5, "title": "main.py - Visual Studio Code"}   the foreground window changed
+#   {"t": 300.0, "idle": 900.0}                            no user input for 900 seconds from t
+
+class VirtualClock:
+    """A clock that only moves when told to; replaces datetime.datetime.now during a replay."""
+    def __init__(self, start):
+        self.current = start
+
+    def now(self):
+        return self.current
+
+    def advance(self, seconds):
+        self.current += datetime.timedelta(seconds=seconds)
+
+class TraceRecorder:
+    """
+    Wraps a detector backend and records what it reports: title changes as they are
+    polled, and idle periods once input resumes. Lines are flushed as written, so a
+    trace survives a crash up to the last event.
+    """
+    def __init__(self, path, backend, check_interval_seconds, idle_threshold_minutes, min_idle_seconds=30):
+        self.backend = backend
+        self.min_idle_seconds = min_idle_seconds
+        self.start = datetime.datetime.now()
+        self._last_title = None
+        self._idle_start = None
+        self._file = open(path, 'w', encoding='utf-8', buffering=1)
+        self._write({'version': TRACE_VERSION, 'start': self.start.isoformat(),
+                     'check_interval_seconds': check_interval_seconds, 'idle_threshold_minutes': idle_threshold_minutes})
+
+    def _write(self, record):
+        self._file.write(json.dumps(record) + '\n')
+
+    def _elapsed(self):
+        return round((datetime.datetime.now() - self.start).total_seconds(), 3)
+
+    def idle_seconds(self):
+        idle_seconds = self.backend.idle_seconds()
+        now = self._elapsed()
+        if idle_seconds >= self.min_idle_seconds:
+            if self._idle_start is None:
+                self._idle_start = max(now - idle_seconds, 0.0)
+        elif self._idle_start is not None:
+            self._write({'t': round(self._idle_start, 3), 'idle': round(now - idle_seconds - self._idle_start, 3)})
+            self._idle_start = None
+        return idle_seconds
+
+    def active_window_title(self):
+        title = self.backend.active_window_title()
+        if title != self._last_title:
+            self._write({'t': self._elapsed(), 'title': title})
+            self._last_title = title
+        return title
+
+    def close(self):
+        self._file.close()
+
+def load_trace(path):
+    """Returns (header, events) with the events sorted by time."""
+    with open(path, encoding='utf-8') as f:
+        lines = [line for line in f if line.strip()]
+    if not lines:
+        raise ValueError(f"{path} is empty")
+    header = json.loads(lines[0])
+    if header.get('version') != TRACE_VERSION:
+        raise ValueError(f"{path}: unsupported trace version {header.get('version')!r}")
+    header['start'] = datetime.datetime.fromisoformat(header['start'])
+    events = sorted((json.loads(line) for line in lines[1:]), key=lambda event: event['t'])
+    return header, events
+
+def write_trace(path, header, events):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(dict(header, start=header['start'].isoformat())) + '\n')
+        for event in events:
+            f.write(json.dumps(event) + '\n')
+
+class ReplayBackend:
+    """
+    A detector backend that answers from a trace at the clock's current time: the
+    last title seen, and the time since input stopped while inside an idle period.
+    """
+    def __init__(self, header, events, clock):
+        self.start = header['start']
+        self.clock = clock
+        title_events = [event for event in events if 'title' in event]
+        self._title_times = [event['t'] for event in title_events]
+        self._titles = [event['title'] for event in title_events]
+        idle_events = [event for event in events if 'idle' in event]
+        self._idle_starts = [event['t'] for event in idle_events]
+        self._idle_ends = [event['t'] + event['idle'] for event in idle_events]
+        self.end_seconds = max([0.0] + self._title_times + self._idle_ends)
+
+    def elapsed(self):
+        return (self.clock.now() - self.start).total_seconds()
+
+    def finished(self):
+        return self.elapsed() > self.end_seconds
+
+    def events_until(self, seconds):
+        """Number of trace events at or before `seconds`."""
+        return bisect.bisect_right(self._title_times, seconds) + bisect.bisect_right(self._idle_starts, seconds)
+
+    def active_window_title(self):
+        position = bisect.bisect_right(self._title_times, self.elapsed()) - 1
+        return self._titles[position] if position >= 0 else ""
+
+    def idle_seconds(self):
+        now = self.elapsed()
+        position = bisect.bisect_right(self._idle_starts, now) - 1
+        if position >= 0 and now < self._idle_ends[position]:
+            return now - self._idle_starts[position]
+        return 0.0
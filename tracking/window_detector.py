@@ -38,32 +38,50 @@ def get_active_window_title():
         return "Linux tracking not yet implemented"
     return "Unknown OS"
 
+class SystemBackend:
+    """Reads the foreground window and idle time from the operating system."""
+    def active_window_title(self):
+        return get_active_window_title()
+
+    def idle_seconds(self):
+        return get_idle_time_seconds()
+
 
 class WindowDetector(QObject):
     """
     A QObject that detects active window changes and user idle time using a QTimer.
+    The backend supplies the window title and idle time (the OS by default; a
+    recorded trace when replaying, see tracking/trace.py).
     """
     activity_changed = pyqtSignal(str)
 
-    def __init__(self, check_interval_seconds, idle_threshold_minutes):
+    def __init__(self, check_interval_seconds, idle_threshold_minutes, backend=None):
         super().__init__()
         self.idle_threshold_seconds = idle_threshold_minutes * 60
+        self.backend = backend or SystemBackend()
         
         self.timer = QTimer(self)
         self.timer.setInterval(check_interval_seconds * 1000)
-        self.timer.timeout.connect(self._check_activity)
+        self.timer.timeout.connect(self.check_activity)
 
-    def _check_activity(self):
-        """This method is called by the QTimer to check for activity."""
-        idle_time = get_idle_time_seconds()
+    def check_activity(self):
+        """This method is called by the QTimer (or a replay driver) to check for activity."""
+        idle_time = self.backend.idle_seconds()
         
         if self.idle_threshold_seconds > 0 and idle_time >= self.idle_threshold_seconds:
             current_activity_name = "Idle"
         else:
-            current_activity_name = get_active_window_title()
+            current_activity_name = self.backend.active_window_title()
 
         self.activity_changed.emit(current_activity_name)
 
+    def set_check_interval(self, check_interval_seconds):
+        # setInterval on an active QTimer restarts it with the new period
+        self.timer.setInterval(check_interval_seconds * 1000)
+
+    def set_idle_threshold(self, idle_threshold_minutes):
+        self.idle_threshold_seconds = idle_threshold_minutes * 60
+
     def start(self):
         self.timer.start()
 
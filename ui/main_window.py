@@ -1,28 +1,82 @@
+import os
 import datetime
+import multiprocessing
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
     QPushButton, QStackedWidget, QGraphicsBlurEffect, QMessageBox, QFileDialog,
-    QSystemTrayIcon, QStyle, QAction, QMenu
+    QSystemTrayIcon, QStyle, QAction, QMenu, QDialog
 )
-from PyQt5.QtCore import QCoreApplication, QEvent, QPropertyAnimation, QEasingCurve, Qt, QTimer
+from PyQt5.QtCore import QCoreApplication, QEvent, QPropertyAnimation, QEasingCurve, Qt, QTimer, QFileSystemWatcher
 
-from data.data_handler import ensure_data_dir_and_files, load_config, save_config, append_activity, load_activities, update_activity_tags, update_last_activity_end_time
+from data.data_handler import ensure_data_dir_and_files, clear_activities, append_activity, append_activities, insert_activity, load_activities, update_activity_tags, update_last_activity_end_time, load_user_id, METRICS_FILE
+from data.config import CONFIG_FILE, ConfigError, ensure_config_file, load_config, load_config_with_errors, save_config, changed_keys
 from tracking.window_detector import WindowDetector
 from utils.helpers import get_clean_app_name
 from utils.theme_manager import get_stylesheet
+from utils.metrics import timed, write_metrics_file
+from utils.intervals import day_edges, split_activities
+from utils.live_totals import TodayTotals
+from utils.goals import GoalEngine, rules_from_config
+from utils.profiler import Profiler
+from data.compact_store import ACTIVITY_COLUMNS, CompactActivityLog
+from data.binary_store import BinaryActivityLog, open_binary_log
+from data.checkpoint import write_checkpoint, read_checkpoint, clear_checkpoint
+from services.aggregation_client import AggregationClient
+from services.sync import SyncJournal, sync_with_folder
+from utils.data_exporter import EXPORT_FORMATS, export_data_in_process
+from data.importer import import_activities
+from data.retention import retention_cutoff, plan_rollup, apply_rollup, rollup_changes
+from data.title_store import TitleStore
 
 from .pages.dashboard_page import DashboardPage
 from .pages.log_pages import LogPage
 from .pages.settings_page import SettingsPage
 from .pages.weekly_report_page import WeeklyReportPage
 from .widgets.compact_mode_widget import CompactModeWidget
+from .widgets.export_options_dialog import ExportOptionsDialog
+from .widgets.export_progress_dialog import ExportProgressDialog
+from .widgets.import_dialog import ImportDialog
 
 
 class ProductivityTrackerApp(QMainWindow):
-    def __init__(self):
+    CHECKPOINT_INTERVAL_SECONDS = 15
+    SAVE_RETRY_INTERVAL_SECONDS = 30
+    SYNC_INTERVAL_MINUTES = 5
+    MAINTENANCE_INTERVAL_HOURS = 6
+
+    def __init__(self, detector_backend=None, clock=None, idle_resolution=None):
+        """
+        detector_backend, clock and idle_resolution ('break', 'keep' or 'discard', used
+        instead of asking) let a trace replay drive the tracker; see tracking/trace.py.
+        """
         super().__init__()
+        self.detector_backend = detector_backend
+        self.now = clock or datetime.datetime.now
+        self.idle_resolution = idle_resolution
         ensure_data_dir_and_files()
+        ensure_config_file()
         self.config = load_config()
+        self.aggregation_client = None
+        self.configure_aggregation_client()
+        self.sync_journal = SyncJournal()
+        self.today_totals = TodayTotals(self.config['productivity_apps'], self.now)
+        self.goal_engine = GoalEngine(rules_from_config(self.config), self.today_totals)
+        self.profiler = Profiler()
+        self.title_store = TitleStore()
+        # Closed activities whose write failed (e.g. another program held the history open) are retried
+        self.unsaved_activities = []
+        self.save_retry_timer = QTimer(self)
+        self.save_retry_timer.setInterval(self.SAVE_RETRY_INTERVAL_SECONDS * 1000)
+        self.save_retry_timer.timeout.connect(self.save_pending_activities)
+        self.tray_icon = None
+
+        # Resident, dictionary-encoded copy of the history; pages materialise DataFrames from it.
+        # Closed activities are appended to it; it is reloaded only after bulk rewrites.
+        self.activity_log = None
+        self.load_activity_log()
+        self.recover_checkpoint()
         self.current_activity = None
         self.last_app_name = ""
         self.is_paused = False
@@ -47,9 +101,43 @@ class ProductivityTrackerApp(QMainWindow):
         self.ui_timer.timeout.connect(self.update_live_ui)
         self.ui_timer.start()
 
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.setInterval(60 * 1000)
+        self.metrics_timer.timeout.connect(self.write_metrics)
+        self.metrics_timer.start()
+
+        # Checkpoint the open activity so a crash loses at most one interval
+        self.checkpoint_timer = QTimer(self)
+        self.checkpoint_timer.setInterval(self.CHECKPOINT_INTERVAL_SECONDS * 1000)
+        self.checkpoint_timer.timeout.connect(self.checkpoint_current_activity)
+        self.checkpoint_timer.start()
+
+        # Exchange changes with other instances through the shared sync folder, if one is set
+        self.sync_timer = QTimer(self)
+        self.sync_timer.setInterval(self.SYNC_INTERVAL_MINUTES * 60 * 1000)
+        self.sync_timer.timeout.connect(lambda: self.sync_now(show_result=False))
+        self.sync_timer.start()
+
+        # Retention rollup runs in a worker process; the poll timer applies its result
+        self.maintenance_pool = None
+        self.maintenance_future = None
+        self.maintenance_timer = QTimer(self)
+        self.maintenance_timer.setInterval(self.MAINTENANCE_INTERVAL_HOURS * 3600 * 1000)
+        self.maintenance_timer.timeout.connect(self.run_maintenance)
+        self.maintenance_timer.start()
+        self.maintenance_poll_timer = QTimer(self)
+        self.maintenance_poll_timer.setInterval(1000)
+        self.maintenance_poll_timer.timeout.connect(self.poll_maintenance)
+        QTimer.singleShot(60 * 1000, self.run_maintenance)
+
+        # Edits to config.csv made outside the app are applied without a restart
+        self.config_watcher = QFileSystemWatcher([CONFIG_FILE], self)
+        self.config_watcher.fileChanged.connect(self.reload_config)
+
         self.apply_theme()
         self.init_and_start_tracker()
-        self.update_all_ui()
+        self.seed_today_totals()
+        self.refresh_views()
         QCoreApplication.instance().aboutToQuit.connect(self.on_app_exit)
 
     def _setup_tray_icon(self):
@@ -68,6 +156,10 @@ class ProductivityTrackerApp(QMainWindow):
         self.pause_action = QAction("Pause Tracking", self)
         self.pause_action.triggered.connect(self.toggle_pause)
         tray_menu.addAction(self.pause_action)
+
+        self.profiling_action = QAction("Start Profiling", self)
+        self.profiling_action.triggered.connect(self.toggle_profiling)
+        tray_menu.addAction(self.profiling_action)
         
         tray_menu.addSeparator()
         
@@ -86,6 +178,13 @@ class ProductivityTrackerApp(QMainWindow):
         else:
             self.show()
 
+    def bring_to_front(self):
+        """Shows the full window when the tracker is launched again while already running."""
+        self.compact_widget.hide()
+        self.showNormal()
+        self.raise_()
+        self.activateWindow()
+
     def toggle_compact_mode(self):
         """Switches between the main window and the compact widget."""
         if self.isVisible():
@@ -118,18 +217,35 @@ class ProductivityTrackerApp(QMainWindow):
         if self.is_paused:
             self.pause_action.setText("Resume Tracking")
             if self.current_activity:
-                end_time = datetime.datetime.now()
+                end_time = self.now()
                 duration = (end_time - self.current_activity['start_time']).total_seconds()
                 if duration > self.config['check_interval_seconds']:
                     self.current_activity.update({'end_time': end_time, 'duration_seconds': duration})
-                    append_activity(self.current_activity)
+                    self.save_activity(self.current_activity)
             self.current_activity = None
             self.last_app_name = "Paused"
+            self.title_store.close_segment(self.now())
+            clear_checkpoint()
         else:
             self.pause_action.setText("Pause Tracking")
         
         self.update_live_ui()
     
+    def toggle_profiling(self):
+        """Starts or stops the profiler; stopping writes the profile to tracker_data/."""
+        if not self.profiler.running:
+            self.profiler.start()
+            self.profiling_action.setText("Stop Profiling")
+            return
+        paths = self.profiler.stop()
+        self.profiling_action.setText("Start Profiling")
+        self.tray_icon.showMessage(
+            "Profile Saved",
+            "\n".join(paths) + "\nShow the hottest functions with: python -m utils.profiler FILE",
+            QSystemTrayIcon.Information,
+            5000
+        )
+
     # ... (the rest of your main_window.py file remains unchanged)
     def _create_collapsible_menu(self):
         self.nav_pane = QWidget()
@@ -173,13 +289,50 @@ class ProductivityTrackerApp(QMainWindow):
         self.nav_buttons["📋  Activity Log"].clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.log_page))
         self.nav_buttons["⚙️  Settings"].clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.settings_page))
         
+    @timed('ui.update_all_ui')
     def update_all_ui(self):
-        activities = load_activities()
-        self.log_page.display_activities(activities)
-        self.dashboard_page.generate_activity_report(activities, self.config)
+        """Reloads the history after it was rewritten (import, sync, rollup, edits), reseeds the running totals and redraws."""
+        self.load_activity_log()
+        self.seed_today_totals()
+        self.refresh_views()
+
+    def load_activity_log(self):
+        """
+        Loads the resident history: with the binary_activity_log setting, the mapped
+        activities.bin (rebuilt from the CSV only if the CSV was rewritten since),
+        otherwise a CompactActivityLog parsed from the CSV.
+        """
+        if isinstance(self.activity_log, BinaryActivityLog):
+            # Unmap before a rebuild replaces the file
+            self.activity_log.close()
+        if self.config['binary_activity_log']:
+            try:
+                self.activity_log = open_binary_log()
+                return
+            except BufferError as e:
+                print(f"Using the CSV history until activities.bin can be rebuilt: {e}")
+        self.activity_log = CompactActivityLog.from_frame(load_activities())
+
+    @timed('ui.refresh_views')
+    def refresh_views(self):
+        """Redraws the log, dashboard and weekly report from the resident history, without reading storage."""
+        self.log_page.refresh()
+        self.refresh_charts()
+
+    def seed_today_totals(self):
+        today = self.now().date()
+        today_edges = day_edges(today, today)
+        today_df = split_activities(self.activity_log.to_frame(today_edges[0], today_edges[-1]), today_edges)
+        self.today_totals.seed(today_df)
+        self.goal_engine.seed(today_df)
+
+    def refresh_charts(self):
+        """Redraws the dashboard and weekly report from the resident history, without reading storage."""
+        self.dashboard_page.generate_activity_report(self.activity_log, self.config)
         self.weekly_report_page.update_report()
 
-    def handle_return_from_idle(self, idle_activity, new_app_name):
+    def ask_idle_resolution(self, idle_activity):
+        """Asks how to log an idle period. Returns 'break', 'keep' or 'discard'."""
         idle_duration_minutes = round(idle_activity['duration_seconds'] / 60)
         msg_box = QMessageBox(self)
         msg_box.setWindowTitle("Returned from Idle")
@@ -191,25 +344,148 @@ class ProductivityTrackerApp(QMainWindow):
         msg_box.exec_()
         clicked_button = msg_box.clickedButton()
         if clicked_button == log_break_button:
+            return 'break'
+        if clicked_button == keep_time_button:
+            return 'keep'
+        return 'discard'
+
+    def handle_return_from_idle(self, idle_activity, new_app_name):
+        resolution = self.idle_resolution or self.ask_idle_resolution(idle_activity)
+        if resolution == 'break':
             idle_activity['app_name'] = "Break"
-            append_activity(idle_activity)
-        elif clicked_button == keep_time_button:
-            update_last_activity_end_time(idle_activity['end_time'])
-        elif clicked_button == discard_button:
-            pass
+            self.save_activity(idle_activity)
+        elif resolution == 'keep':
+            extended_activity = update_last_activity_end_time(idle_activity['end_time'])
+            if extended_activity:
+                self.sync_journal.record_upsert(extended_activity)
         self.start_new_activity(new_app_name)
-        self.update_all_ui()
+        # Extending the last row rewrites it in place; a logged break was appended
+        if resolution == 'keep':
+            self.update_all_ui()
+        else:
+            self.refresh_views()
 
     def start_new_activity(self, app_name):
-        self.current_activity = {'app_name': app_name, 'start_time': datetime.datetime.now(), 'tags': ''}
+        self.current_activity = {'app_name': app_name, 'start_time': self.now(), 'tags': ''}
         self.last_app_name = app_name
+        # Replace the previous activity's checkpoint right away; it may already be saved
+        self.checkpoint_current_activity()
+
+    def save_activity(self, activity):
+        """Persists a closed activity, journals it for sync and forwards it to the aggregation server, if configured."""
+        self.unsaved_activities.append(activity)
+        self.save_pending_activities()
+        self.activity_log.append(pd.DataFrame([activity], columns=ACTIVITY_COLUMNS))
+        self.today_totals.add_closed(activity)
+        self.goal_engine.add_closed(activity)
+        self.sync_journal.record_upsert(activity)
+        if self.aggregation_client:
+            self.aggregation_client.enqueue(activity)
+
+    def save_pending_activities(self):
+        """
+        Writes the closed activities not stored yet. If the history can't be written
+        they stay pending (they are already shown and journaled) and are retried on
+        a timer; returns whether everything is stored.
+        """
+        if not self.unsaved_activities:
+            return True
+        try:
+            if len(self.unsaved_activities) == 1:
+                append_activity(self.unsaved_activities[0])
+            else:
+                append_activities(pd.DataFrame(self.unsaved_activities, columns=ACTIVITY_COLUMNS))
+        except OSError as e:
+            print(f"Could not save {len(self.unsaved_activities)} activity(ies), will retry: {e}")
+            if not self.save_retry_timer.isActive():
+                if self.tray_icon:
+                    self.tray_icon.showMessage("Save Delayed", f"Could not write the activity history ({e}). Retrying every {self.SAVE_RETRY_INTERVAL_SECONDS} s.", QSystemTrayIcon.Warning, 5000)
+                self.save_retry_timer.start()
+            return False
+        self.unsaved_activities = []
+        self.save_retry_timer.stop()
+        return True
+
+    def save_manual_activity(self, activity, overlap_mode=None):
+        """Stores a manual entry, resolving overlaps with stored activities as chosen in the dialog."""
+        changes = insert_activity(activity, overlap_mode)
+        for start_time in changes['removed']:
+            self.sync_journal.record_delete(start_time)
+        for row in changes['replacements'] + changes['inserted']:
+            self.sync_journal.record_upsert(row)
+        if self.aggregation_client:
+            for row in changes['inserted']:
+                self.aggregation_client.enqueue(row)
+
+    def save_activity_tags(self, start_time, new_tags):
+        """Updates an activity's tags and journals the edit for sync."""
+        for exact_start_time in update_activity_tags(start_time, new_tags):
+            self.sync_journal.record_tags(exact_start_time, new_tags)
+
+    def sync_now(self, show_result=True):
+        """Exports local changes to the sync folder and merges in other instances' changes."""
+        sync_folder = self.config.get('sync_folder', '')
+        if not sync_folder:
+            if show_result:
+                QMessageBox.warning(self, "Sync", "Set a sync folder in Settings first.")
+            return
+        try:
+            result = sync_with_folder(sync_folder, load_user_id(), self.sync_journal)
+        except (OSError, ValueError) as e:
+            if show_result:
+                QMessageBox.critical(self, "Sync Error", f"Could not sync: {e}")
+            else:
+                print(f"Sync failed: {e}")
+            return
+        if result['changed']:
+            self.update_all_ui()
+        if show_result:
+            QMessageBox.information(self, "Sync Complete", f"Sent {result['exported']} change(s), received {result['imported']}.")
 
+    def configure_aggregation_client(self):
+        """(Re)creates the push client when the aggregation server URL changes."""
+        server_url = self.config.get('aggregation_server_url', '')
+        if self.aggregation_client and self.aggregation_client.server_url == server_url:
+            return
+        if self.aggregation_client:
+            self.aggregation_client.close(timeout=1, wait=False)
+            self.aggregation_client = None
+        user_id = load_user_id()
+        if server_url and user_id:
+            self.aggregation_client = AggregationClient(server_url, user_id)
+
+    def checkpoint_current_activity(self):
+        """Records the open activity in the checkpoint file, or clears it if nothing is being tracked."""
+        try:
+            if self.current_activity and not self.is_paused and self.last_app_name != "Idle":
+                write_checkpoint(self.current_activity, self.now())
+            else:
+                clear_checkpoint()
+        except OSError as e:
+            print(f"Could not write checkpoint: {e}")
+
+    def recover_checkpoint(self):
+        """Saves an activity left open by a crash or forced shutdown as a closed activity."""
+        recovered_activity = read_checkpoint()
+        if recovered_activity:
+            # The last title was open until the last checkpoint, not until now
+            self.title_store.close_segment(recovered_activity['end_time'])
+        if recovered_activity and recovered_activity['duration_seconds'] > self.config['check_interval_seconds']:
+            self.save_activity(recovered_activity)
+            print(f"Recovered unsaved activity: {recovered_activity['app_name']} ({int(recovered_activity['duration_seconds'])}s)")
+        clear_checkpoint()
+
+    @timed('ui.handle_activity_change')
     def handle_activity_change(self, app_name_with_idle):
         if self.is_paused:
             return
+        if app_name_with_idle == "Idle":
+            self.title_store.close_segment(self.now())
+        else:
+            self.title_store.record(app_name_with_idle, self.now())
         clean_app_name = get_clean_app_name(app_name_with_idle)
         if self.last_app_name == "Idle" and clean_app_name != "Idle":
-            idle_end_time = datetime.datetime.now()
+            idle_end_time = self.now()
             idle_duration = (idle_end_time - self.current_activity['start_time']).total_seconds()
             if idle_duration > 60:
                 self.current_activity['end_time'] = idle_end_time
@@ -219,13 +495,13 @@ class ProductivityTrackerApp(QMainWindow):
                 self.start_new_activity(clean_app_name)
             return
         if clean_app_name != self.last_app_name:
-            current_time = datetime.datetime.now()
+            current_time = self.now()
             if self.current_activity and self.last_app_name != "Idle":
                 duration = (current_time - self.current_activity['start_time']).total_seconds()
                 if duration > self.config['check_interval_seconds']:
                     self.current_activity.update({'end_time': current_time, 'duration_seconds': duration})
-                    append_activity(self.current_activity)
-                    self.update_all_ui()
+                    self.save_activity(self.current_activity)
+                    self.refresh_views()
             self.start_new_activity(clean_app_name)
             
     def _setup_background(self):
@@ -296,9 +572,9 @@ class ProductivityTrackerApp(QMainWindow):
             self.menu_animation.start()
             
     def toggle_theme(self):
-        self.config['is_dark_mode'] = not self.config['is_dark_mode']
-        save_config(self.config)
-        self.apply_theme()
+        new_config = dict(self.config, is_dark_mode=not self.config['is_dark_mode'])
+        save_config(new_config)
+        self.apply_config(new_config)
 
     def apply_theme(self):
         is_dark = self.config['is_dark_mode']
@@ -306,60 +582,179 @@ class ProductivityTrackerApp(QMainWindow):
         self.blur_background_label.setStyleSheet(f"background-color: {gradient};")
         self.setStyleSheet(get_stylesheet(is_dark))
         self.settings_page.update_theme_button_text(is_dark)
-        self.update_all_ui()
+        self.refresh_charts()
 
     def init_and_start_tracker(self):
-        self.window_detector = WindowDetector(self.config['check_interval_seconds'], self.config['idle_threshold_minutes'])
+        self.window_detector = WindowDetector(self.config['check_interval_seconds'], self.config['idle_threshold_minutes'], self.detector_backend)
         self.window_detector.activity_changed.connect(self.handle_activity_change)
         self.window_detector.start()
 
     def update_live_ui(self):
+        live_activity = None if self.is_paused else self.current_activity
+        live_totals = self.today_totals.snapshot(live_activity, self.now())
+        self.notify_goals(live_activity)
         if self.isVisible():
-            self.dashboard_page.update_live_ui(self.current_activity, self.is_paused)
+            self.dashboard_page.update_live_ui(self.current_activity, self.is_paused, live_totals)
         if self.compact_widget.isVisible():
-            self.compact_widget.update_display(self.current_activity, self.is_paused)
+            self.compact_widget.update_display(self.current_activity, self.is_paused, live_totals)
+
+    def notify_goals(self, live_activity):
+        """Shows a tray notification for each goal reached or limit hit since the last check."""
+        for rule in self.goal_engine.check(live_activity, self.now()):
+            title, message = rule.message()
+            icon = QSystemTrayIcon.Information if rule.kind == 'goal' else QSystemTrayIcon.Warning
+            self.tray_icon.showMessage(title, message, icon, 5000)
 
     def save_settings_handler(self):
-        old_interval = self.config['check_interval_seconds']
-        old_idle_threshold = self.config['idle_threshold_minutes']
-        self.config['check_interval_seconds'] = self.settings_page.interval_spinbox.value()
-        self.config['idle_threshold_minutes'] = self.settings_page.idle_spinbox.value()
-        self.config['productivity_apps'] = [app.strip() for app in self.settings_page.apps_input.text().split(',') if app.strip()]
-        save_config(self.config)
-        if old_interval != self.config['check_interval_seconds'] or old_idle_threshold != self.config['idle_threshold_minutes']:
-            self.window_detector.stop()
-            self.init_and_start_tracker()
-        self.update_all_ui()
+        new_config = self.settings_page.config_from_form(self.config)
+        try:
+            save_config(new_config)
+        except ConfigError as e:
+            QMessageBox.warning(self, "Invalid Settings", f"Settings were not saved: {e}")
+            return
+        self.apply_config(new_config)
         QMessageBox.information(self, "Settings Saved", "Your settings have been updated.")
 
+    def reload_config(self, path):
+        """Applies config.csv after it was changed on disk; invalid values keep their current setting."""
+        # Saving replaces the file, which drops it from the watcher
+        if path not in self.config_watcher.files() and os.path.exists(path):
+            self.config_watcher.addPath(path)
+        new_config, errors = load_config_with_errors(path, fallback=self.config)
+        for error in errors:
+            print(f"Ignoring invalid setting in {path}: {error}")
+        self.apply_config(new_config)
+
+    def apply_config(self, new_config):
+        """Switches to new_config live, updating only what the changed settings affect."""
+        changed = changed_keys(self.config, new_config)
+        self.config = new_config
+        if not changed:
+            return
+        if 'check_interval_seconds' in changed:
+            self.window_detector.set_check_interval(new_config['check_interval_seconds'])
+        if 'idle_threshold_minutes' in changed:
+            self.window_detector.set_idle_threshold(new_config['idle_threshold_minutes'])
+        if 'binary_activity_log' in changed:
+            self.load_activity_log()
+            self.refresh_views()
+        if 'aggregation_server_url' in changed:
+            self.configure_aggregation_client()
+        if changed & {'retention_days', 'retention_granularity'}:
+            self.run_maintenance()
+        if 'productivity_apps' in changed:
+            self.today_totals.set_productivity_apps(new_config['productivity_apps'])
+        if changed & {'productivity_apps', 'daily_goal_minutes', 'app_limits'}:
+            self.goal_engine.set_rules(rules_from_config(new_config))
+            self.seed_today_totals()
+        if 'is_dark_mode' in changed:
+            self.apply_theme()
+        elif changed & {'productivity_apps', 'dashboard_top_n', 'deep_work_min_minutes', 'deep_work_max_interruption_seconds'}:
+            self.refresh_charts()
+        self.settings_page.load_from_config(new_config)
+        self.update_live_ui()
+
     def export_data(self):
-        path, _ = QFileDialog.getSaveFileName(self, "Save CSV File", "", "CSV Files (*.csv)")
-        if path:
-            try:
-                df = load_activities()
-                if df.empty:
-                    QMessageBox.warning(self, "Export Failed", "No data to export.")
-                    return
-                df.to_csv(path, index=False)
-                QMessageBox.information(self, "Export Complete", f"Data exported to:\n{path}")
-            except Exception as e:
-                QMessageBox.critical(self, "Export Error", f"An error occurred: {e}")
+        """Asks for a format and filters, then streams the export in a worker process."""
+        options_dialog = ExportOptionsDialog(self)
+        options_dialog.setStyleSheet(self.styleSheet())
+        if options_dialog.exec_() != QDialog.Accepted:
+            return
+        options = options_dialog.get_export_options()
+        output_format = options['format']
+        path, _ = QFileDialog.getSaveFileName(self, "Save Export", f"activities.{output_format}", EXPORT_FORMATS[output_format])
+        if not path:
+            return
+
+        export_dialog = ExportProgressDialog("Exporting Data", export_data_in_process, (path, output_format, options['filters']), path, self)
+        export_dialog.export_finished.connect(lambda file_path: QMessageBox.information(self, "Export Complete", f"Data exported to:\n{file_path}"))
+        export_dialog.export_failed.connect(lambda message: QMessageBox.critical(self, "Export Error", f"An error occurred: {message}"))
+        export_dialog.start()
+
+    def import_data(self):
+        """Validates a CSV/JSON Lines file against the history and imports it in one write."""
+        import_dialog = ImportDialog(load_activities(), self)
+        import_dialog.setStyleSheet(self.styleSheet())
+        if import_dialog.exec_() != QDialog.Accepted:
+            return
+        rows, skip_overlapping = import_dialog.get_import()
+        try:
+            imported = import_activities(rows, skip_overlapping)
+        except OSError as e:
+            QMessageBox.critical(self, "Import Error", f"An error occurred: {e}")
+            return
+        self.sync_journal.record_upserts(imported)
+        self.update_all_ui()
+        QMessageBox.information(self, "Import Complete", f"Imported {len(imported):,} activities.")
 
     def clear_data_prompt(self):
         reply = QMessageBox.question(self, 'Confirm Deletion', "Delete ALL activity data?\nThis cannot be undone.", QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
-            from data.data_handler import ACTIVITIES_FILE
-            import pandas as pd
-            pd.DataFrame(columns=['app_name', 'start_time', 'end_time', 'duration_seconds', 'tags']).to_csv(ACTIVITIES_FILE, index=False)
+            clear_activities()
+            self.title_store.clear()
             self.update_all_ui()
             QMessageBox.information(self, "Data Cleared", "All activity data has been deleted.")
 
+    def run_maintenance(self):
+        """Starts rolling up activities older than the retention period, if enabled."""
+        retention_days = self.config.get('retention_days', 0)
+        if retention_days <= 0 or self.maintenance_future is not None:
+            return
+        if self.maintenance_pool is None:
+            self.maintenance_pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+        cutoff = retention_cutoff(retention_days, self.now())
+        self.maintenance_future = self.maintenance_pool.submit(plan_rollup, cutoff, self.config.get('retention_granularity', 'day'))
+        self.maintenance_poll_timer.start()
+
+    def poll_maintenance(self):
+        """Applies a finished rollup on the GUI thread, which owns all writes to the history."""
+        if not self.maintenance_future.done():
+            return
+        self.maintenance_poll_timer.stop()
+        future, self.maintenance_future = self.maintenance_future, None
+        try:
+            plan = future.result()
+        except Exception as e:
+            print(f"Retention rollup failed: {e}")
+            return
+        if not plan:
+            return
+        # If old rows changed meanwhile (sync, import, an edit), the plan is stale; the next run will redo it
+        replaced_df = apply_rollup(plan)
+        if replaced_df is None:
+            return
+        # Peers replace the raw rows with the same rolled rows; deletes go first so that
+        # a rolled row starting where a raw one did is kept. Rows already rolled up are left out.
+        deleted, upserted = rollup_changes(replaced_df, plan['rolled'])
+        self.sync_journal.record_deletes(deleted)
+        self.sync_journal.record_upserts(upserted)
+        print(f"Retention: rolled {plan['raw_rows']} rows into {len(plan['rolled'])}.")
+        self.update_all_ui()
+
+    def write_metrics(self):
+        """Periodically persists the timing metrics if enabled in Settings."""
+        if not self.config.get('write_metrics_file', False):
+            return
+        try:
+            write_metrics_file(METRICS_FILE)
+        except OSError as e:
+            print(f"Could not write metrics file: {e}")
+
     def on_app_exit(self):
         if self.current_activity:
-            end_time = datetime.datetime.now()
+            end_time = self.now()
             duration = (end_time - self.current_activity['start_time']).total_seconds()
             if duration > 1 and not self.is_paused:
                 self.current_activity.update({'end_time': end_time, 'duration_seconds': duration})
-                append_activity(self.current_activity)
+                self.save_activity(self.current_activity)
+        if not self.save_pending_activities():
+            print("Some activities could not be saved before exiting.")
         if self.window_detector: self.window_detector.stop()
+        self.title_store.close_segment(self.now())
+        clear_checkpoint()
+        if self.aggregation_client: self.aggregation_client.close(timeout=2)
+        if self.maintenance_pool: self.maintenance_pool.shutdown(wait=False, cancel_futures=True)
+        self.write_metrics()
+        if self.profiler.running:
+            print(f"Profile saved to {', '.join(self.profiler.stop())}")
         print("Application exiting. Final activity saved.")
\ No newline at end of file
@@ -1,16 +1,25 @@
 import datetime
 import pandas as pd
 import matplotlib.pyplot as plt
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, QLabel, QScrollArea, QComboBox
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, QLabel, QScrollArea, QComboBox, QPushButton
 from PyQt5.QtCore import Qt
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 
+from utils.intervals import day_edges, app_bucket_totals
+from utils.deep_work import log_daily_streaks
+from utils.live_totals import KeywordMatcher
+from utils.helpers import top_n_with_other
+from utils.metrics import timed
+
 class DashboardPage(QWidget):
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
         self.setStyleSheet("background: transparent;")
+        # Number of top apps skipped while drilling into the "Other" bucket
+        self.breakdown_offset = 0
+        self._bar_labels = {}
         self._setup_ui()
 
     def _setup_ui(self):
@@ -41,7 +50,7 @@ class DashboardPage(QWidget):
         filter_group = QGroupBox("Filter Report by Tag")
         filter_layout = QHBoxLayout()
         self.tag_filter_combo = QComboBox()
-        self.tag_filter_combo.currentIndexChanged.connect(self.main_window.update_all_ui) # Refresh UI when selection changes
+        self.tag_filter_combo.currentIndexChanged.connect(self.reset_breakdown) # Redraw the chart when the selection changes
         filter_layout.addWidget(QLabel("Show activity for:"))
         filter_layout.addWidget(self.tag_filter_combo)
         filter_group.setLayout(filter_layout)
@@ -59,13 +68,35 @@ class DashboardPage(QWidget):
         metrics_group.setLayout(metrics_layout)
         layout.addWidget(metrics_group)
 
+        # --- Deep Work ---
+        deep_work_group = QGroupBox("Deep Work Today")
+        deep_work_layout = QHBoxLayout()
+        self.streak_count_label = QLabel("<b>Streaks:</b><br>0")
+        self.deep_work_time_label = QLabel("<b>Deep Work:</b><br>0:00:00")
+        self.longest_streak_label = QLabel("<b>Longest Streak:</b><br>0:00:00")
+        deep_work_layout.addWidget(self.streak_count_label, alignment=Qt.AlignCenter)
+        deep_work_layout.addWidget(self.deep_work_time_label, alignment=Qt.AlignCenter)
+        deep_work_layout.addWidget(self.longest_streak_label, alignment=Qt.AlignCenter)
+        deep_work_group.setLayout(deep_work_layout)
+        layout.addWidget(deep_work_group)
+
         # --- Bar Chart Report ---
         report_group = QGroupBox("Activity Breakdown for Selection")
         report_layout = QVBoxLayout()
+        drill_layout = QHBoxLayout()
+        self.back_button = QPushButton("◀ Back to Top Apps")
+        self.back_button.clicked.connect(self.reset_breakdown)
+        self.back_button.hide()
+        self.drill_label = QLabel("Click the 'Other' bar to see the remaining apps.")
+        drill_layout.addWidget(self.back_button)
+        drill_layout.addWidget(self.drill_label)
+        drill_layout.addStretch()
+        report_layout.addLayout(drill_layout)
         self.chart_scroll_area = QScrollArea()
         self.chart_scroll_area.setWidgetResizable(True)
         self.canvas = FigureCanvas(Figure(figsize=(5, 8)))
         self.ax = self.canvas.figure.subplots()
+        self.canvas.mpl_connect('pick_event', self.handle_bar_picked)
         self.chart_scroll_area.setWidget(self.canvas)
         report_layout.addWidget(self.chart_scroll_area)
         report_group.setLayout(report_layout)
@@ -74,7 +105,12 @@ class DashboardPage(QWidget):
         scroll_area.setWidget(content_card)
         page_layout.addWidget(scroll_area)
         
-    def update_live_ui(self, current_activity, is_paused):
+    def update_live_ui(self, current_activity, is_paused, live_totals=None):
+        """live_totals is (productive_seconds, total_seconds, focus_score) for today, in-flight session included."""
+        # With a tag selected the metrics come from the stored rows in generate_activity_report
+        if live_totals and self.tag_filter_combo.currentText() in ("", "All Activities"):
+            self._show_metrics(*live_totals)
+
         if is_paused:
             self.current_app_label.setText("<b>Current App:</b> <font color='#FFA726'>Paused</font>")
             self.current_duration_label.setText("<b>Duration:</b> 00:00:00")
@@ -82,9 +118,22 @@ class DashboardPage(QWidget):
 
         if current_activity:
             self.current_app_label.setText(f"<b>Current App:</b> {current_activity['app_name']}")
-            duration = (datetime.datetime.now() - current_activity['start_time']).total_seconds()
+            duration = (self.main_window.now() - current_activity['start_time']).total_seconds()
             self.current_duration_label.setText(f"<b>Duration:</b> {str(datetime.timedelta(seconds=int(duration)))}")
-    def update_tag_filter(self, activities_df):
+
+    def _show_metrics(self, productive_seconds, total_seconds, focus_score):
+        unproductive_seconds = total_seconds - productive_seconds
+        self.productive_time_label.setText(f"<b>Productive:</b><br>{str(datetime.timedelta(seconds=int(productive_seconds)))}")
+        self.unproductive_time_label.setText(f"<b>Unproductive:</b><br>{str(datetime.timedelta(seconds=int(unproductive_seconds)))}")
+        self.focus_score_label.setText(f"<b>Focus Score:</b><br>{focus_score:.1f}%")
+
+    def _show_deep_work(self, day_streaks):
+        """day_streaks is one row of log_daily_streaks (streaks, deep_work_seconds, longest_seconds)."""
+        self.streak_count_label.setText(f"<b>Streaks:</b><br>{int(day_streaks['streaks'])}")
+        self.deep_work_time_label.setText(f"<b>Deep Work:</b><br>{str(datetime.timedelta(seconds=int(day_streaks['deep_work_seconds'])))}")
+        self.longest_streak_label.setText(f"<b>Longest Streak:</b><br>{str(datetime.timedelta(seconds=int(day_streaks['longest_seconds'])))}")
+
+    def update_tag_filter(self, activity_log):
         """Populates the tag filter dropdown with unique tags from the data."""
         self.tag_filter_combo.blockSignals(True) # Prevent signal firing while we repopulate
         
@@ -92,7 +141,8 @@ class DashboardPage(QWidget):
         self.tag_filter_combo.clear()
         
         unique_tags = set()
-        for tags_string in activities_df['tags'].dropna():
+        # The log's tag dictionary holds each distinct tags string once
+        for tags_string in activity_log.tag_categories:
             for tag in tags_string.split(','):
                 if tag.strip():
                     unique_tags.add(tag.strip())
@@ -107,8 +157,21 @@ class DashboardPage(QWidget):
 
         self.tag_filter_combo.blockSignals(False)
 
-    def generate_activity_report(self, activities_df, config):
-        self.update_tag_filter(activities_df)
+    def handle_bar_picked(self, event):
+        """Drills into the 'Other' bucket when its bar is clicked."""
+        if self._bar_labels.get(event.artist) != "Other":
+            return
+        self.breakdown_offset += self.main_window.config.get('dashboard_top_n', 10)
+        self.generate_activity_report(self.main_window.activity_log, self.main_window.config)
+
+    def reset_breakdown(self):
+        self.breakdown_offset = 0
+        self.generate_activity_report(self.main_window.activity_log, self.main_window.config)
+
+    @timed('ui.dashboard.generate_activity_report')
+    def generate_activity_report(self, activity_log, config):
+        """Charts today's time per app from the log's interval arrays (CompactActivityLog or BinaryActivityLog)."""
+        self.update_tag_filter(activity_log)
         self.ax.clear()
         is_dark = config['is_dark_mode']
         text_color = '#E0E0E0' if is_dark else '#333'
@@ -124,42 +187,57 @@ class DashboardPage(QWidget):
         self.ax.spines['right'].set_color('none')
 
         # --- Filter data by date and selected tag ---
-        today_df = activities_df[activities_df['start_time'].dt.date == datetime.date.today()].copy()
-        
+        # Sessions crossing midnight only count the part that falls on today
+        today = self.main_window.now().date()
         selected_tag = self.tag_filter_combo.currentText()
-        if selected_tag and selected_tag != "All Activities":
-            today_df = today_df[today_df['tags'].str.contains(selected_tag, na=False)]
+        tag = selected_tag if selected_tag and selected_tag != "All Activities" else None
+        today_per_app = app_bucket_totals(activity_log, day_edges(today, today), tag).sum(axis=1)
 
         productive_seconds = 0
         total_seconds = 0
 
-        if not today_df.empty and today_df['duration_seconds'].sum() > 0:
-            total_time_per_app = today_df.groupby('app_name')['duration_seconds'].sum().sort_values(ascending=True)
-            
-            app_names = total_time_per_app.index
-            durations_minutes = total_time_per_app.values / 60
+        self._bar_labels = {}
+        if today_per_app.sum() > 0:
+            total_time_per_app = today_per_app.sort_values(ascending=False)
+
+            # --- Collapse the long tail so the bar count stays bounded ---
+            top_n = config.get('dashboard_top_n', 10)
+            if self.breakdown_offset >= len(total_time_per_app):
+                self.breakdown_offset = 0
+            visible_totals = top_n_with_other(total_time_per_app.iloc[self.breakdown_offset:], top_n).sort_values(ascending=True)
+            if "Other" in visible_totals.index:
+                # Keep the "Other" bucket at the bottom regardless of its size
+                visible_totals = pd.concat([visible_totals[["Other"]], visible_totals.drop("Other")])
+
+            app_names = visible_totals.index
+            durations_minutes = visible_totals.values / 60
             
-            colors = ['#4CAF50' if any(p.lower() in app.lower() for p in config.get('productivity_apps', [])) else '#D32F2F' for app in app_names]
+            is_productive = KeywordMatcher(config['productivity_apps'])
+            colors = ['#9E9E9E' if app == "Other" else '#4CAF50' if is_productive(app) else '#D32F2F' for app in app_names]
 
-            self.ax.barh(app_names, durations_minutes, color=colors)
+            bars = self.ax.barh(app_names, durations_minutes, color=colors)
+            for bar, app in zip(bars, app_names):
+                bar.set_picker(True)
+                self._bar_labels[bar] = app
             
-            total_seconds = today_df['duration_seconds'].sum()
-            productive_mask = today_df['app_name'].str.contains('|'.join(config['productivity_apps']), case=False, na=False)
-            productive_seconds = today_df[productive_mask]['duration_seconds'].sum()
+            total_seconds = today_per_app.sum()
+            productive_seconds = today_per_app[is_productive.mask(today_per_app.index)].sum()
             
             new_height = max(5, len(app_names) * 0.5)
             self.canvas.figure.set_figheight(new_height)
         else:
+            self.breakdown_offset = 0
             self.ax.text(0.5, 0.5, f"No Data for '{selected_tag}' Today", ha='center', va='center', color=text_color, fontsize=12)
 
+        self.back_button.setVisible(self.breakdown_offset > 0)
+        self.drill_label.setVisible("Other" in self._bar_labels.values())
+
         # --- Update metric labels ---
-        unproductive_seconds = total_seconds - productive_seconds
         focus_score = (productive_seconds / total_seconds * 100) if total_seconds > 0 else 0
-        
-        self.productive_time_label.setText(f"<b>Productive:</b><br>{str(datetime.timedelta(seconds=int(productive_seconds)))}")
-        self.unproductive_time_label.setText(f"<b>Unproductive:</b><br>{str(datetime.timedelta(seconds=int(unproductive_seconds)))}")
-        self.focus_score_label.setText(f"<b>Focus Score:</b><br>{focus_score:.1f}%")
+        self._show_metrics(productive_seconds, total_seconds, focus_score)
+        self._show_deep_work(log_daily_streaks(activity_log, day_edges(today, today), config, self.main_window.now()).iloc[0])
 
         self.ax.set_xlabel("Time Spent (Minutes)", color=text_color)
-        self.canvas.figure.tight_layout()
-        self.canvas.draw()
\ No newline at end of file
+        with timed('chart.dashboard.draw'):
+            self.canvas.figure.tight_layout()
+            self.canvas.draw()
\ No newline at end of file
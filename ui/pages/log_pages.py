@@ -2,19 +2,27 @@ import datetime
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, QLabel, 
     QPushButton, QDateEdit, QTableWidget, QTableWidgetItem, 
-    QHeaderView, QScrollArea, QDialog
+    QHeaderView, QScrollArea, QDialog, QLineEdit, QComboBox, QInputDialog, QMessageBox
 )
-from PyQt5.QtCore import QDate, Qt
+from PyQt5.QtCore import QDate, Qt, QTimer
 
-from data.data_handler import update_activity_tags, append_activity
+from utils.metrics import timed
+from utils.helpers import get_clean_app_name
+from data.query import QUERY_HELP, QueryError, run_query, load_saved_views, save_saved_views
 from ..widgets.add_activity_dialog import AddActivityDialog
 
 class LogPage(QWidget):
+    # Rendering table rows is the slow part; beyond this only the most recent matches are listed
+    DISPLAY_LIMIT = 5000
+
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
         self.setStyleSheet("background: transparent;")
         self._is_populating = False
+        # Until a filter is applied the log shows the whole history
+        self.filter_applied = False
+        self.saved_views = load_saved_views()
         self._setup_ui()
 
     def _setup_ui(self):
@@ -38,7 +46,8 @@ class LogPage(QWidget):
         header_layout.addWidget(self.add_activity_button)
         layout.addLayout(header_layout)
         
-        filter_group = QGroupBox("Filter by Date")
+        filter_group = QGroupBox("Filter")
+        filter_group_layout = QVBoxLayout()
         filter_layout = QHBoxLayout()
         self.start_date_edit = QDateEdit(QDate.currentDate().addMonths(-1))
         self.end_date_edit = QDateEdit(QDate.currentDate())
@@ -56,8 +65,58 @@ class LogPage(QWidget):
         filter_layout.addWidget(self.end_date_edit)
         filter_layout.addStretch(1)
         filter_layout.addWidget(apply_button)
-        filter_group.setLayout(filter_layout)
+        filter_group_layout.addLayout(filter_layout)
+
+        # --- Query Bar and Saved Views ---
+        query_layout = QHBoxLayout()
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText("e.g. app:chrome AND (tag:research OR duration>30m) AND time:09:00-12:00")
+        self.query_input.setToolTip(QUERY_HELP)
+        self.query_input.setClearButtonEnabled(True)
+        self.query_input.returnPressed.connect(self.filter_activities)
+        self.views_combo = QComboBox()
+        self.views_combo.setMinimumWidth(160)
+        self.views_combo.activated.connect(self.apply_saved_view)
+        save_view_button = QPushButton("Save View...")
+        save_view_button.clicked.connect(self.save_current_view)
+        delete_view_button = QPushButton("Delete View")
+        delete_view_button.clicked.connect(self.delete_current_view)
+        query_layout.addWidget(QLabel("Query:"))
+        query_layout.addWidget(self.query_input, 1)
+        query_layout.addWidget(self.views_combo)
+        query_layout.addWidget(save_view_button)
+        query_layout.addWidget(delete_view_button)
+        filter_group_layout.addLayout(query_layout)
+        self.filter_status_label = QLabel()
+        self.filter_status_label.setWordWrap(True)
+        filter_group_layout.addWidget(self.filter_status_label)
+        filter_group.setLayout(filter_group_layout)
         layout.addWidget(filter_group)
+        self._refresh_views_combo()
+
+        # --- Window Title Search ---
+        search_group = QGroupBox("Search Window Titles")
+        search_layout = QVBoxLayout()
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Documents, repositories, URLs... (e.g. 'github tracker')")
+        self.search_input.setClearButtonEnabled(True)
+        # Search once typing pauses rather than on every keystroke
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(200)
+        self.search_timer.timeout.connect(self.search_titles)
+        self.search_input.textChanged.connect(self.search_timer.start)
+        self.search_results_table = QTableWidget()
+        self.search_results_table.setColumnCount(4)
+        self.search_results_table.setHorizontalHeaderLabels(["Window Title", "App", "Total Time", "Last Seen"])
+        self.search_results_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.search_results_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.search_results_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.search_results_table.hide()
+        search_layout.addWidget(self.search_input)
+        search_layout.addWidget(self.search_results_table)
+        search_group.setLayout(search_layout)
+        layout.addWidget(search_group)
 
         self.activities_table = QTableWidget()
         self.activities_table.setColumnCount(5)
@@ -72,7 +131,7 @@ class LogPage(QWidget):
 
     def open_add_activity_dialog(self):
         """Creates and opens the dialog for adding a manual activity."""
-        dialog = AddActivityDialog(self)
+        dialog = AddActivityDialog(self, self.main_window.activity_log)
         
         # --- Start of Fix ---
         # Apply the main window's stylesheet to the dialog to ensure it's styled correctly
@@ -82,21 +141,94 @@ class LogPage(QWidget):
         if dialog.exec_() == QDialog.Accepted:
             new_activity = dialog.get_activity_data()
             if new_activity:
-                append_activity(new_activity)
+                self.main_window.save_manual_activity(new_activity, dialog.get_overlap_mode())
                 self.main_window.update_all_ui()
 
     def filter_activities(self):
-        from data.data_handler import load_activities
-        activities = load_activities()
+        self.filter_applied = True
+        self.refresh()
+
+    def refresh(self):
+        """Shows the activities matching the date range and query, or everything if no filter was applied."""
+        activity_log = self.main_window.activity_log
+        if not self.filter_applied:
+            self.display_activities(activity_log.to_frame())
+            return
         start_date = self.start_date_edit.date().toPyDate()
         end_date = self.end_date_edit.date().toPyDate()
+        try:
+            activities = run_query(activity_log, self.query_input.text(), self.main_window.config,
+                                   start_date, end_date + datetime.timedelta(days=1))
+        except QueryError as e:
+            # Don't leave the previous results on screen as if they matched this query
+            self.activities_table.setRowCount(0)
+            self.filter_status_label.setText(f"Invalid query: {e}")
+            return
+        # The range lookup returns rows overlapping the days; keep those that started in them
         mask = (activities['start_time'].dt.date >= start_date) & (activities['start_time'].dt.date <= end_date)
         self.display_activities(activities.loc[mask])
 
+    # --- Saved Views ---
+    def _refresh_views_combo(self, current_name=None):
+        self.views_combo.clear()
+        self.views_combo.addItem("Saved views")
+        self.views_combo.addItems(list(self.saved_views))
+        if current_name in self.saved_views:
+            self.views_combo.setCurrentText(current_name)
+
+    def apply_saved_view(self, combo_index):
+        name = self.views_combo.itemText(combo_index)
+        if combo_index == 0 or name not in self.saved_views:
+            return
+        self.query_input.setText(self.saved_views[name])
+        self.filter_activities()
+
+    def save_current_view(self):
+        query = self.query_input.text().strip()
+        if not query:
+            QMessageBox.warning(self, "Save View", "Enter a query to save first.")
+            return
+        current_name = self.views_combo.currentText() if self.views_combo.currentIndex() > 0 else ""
+        name, ok = QInputDialog.getText(self, "Save View", "View name:", text=current_name)
+        name = name.strip()
+        if not ok or not name:
+            return
+        self.saved_views[name] = query
+        save_saved_views(self.saved_views)
+        self._refresh_views_combo(name)
+
+    def delete_current_view(self):
+        name = self.views_combo.currentText()
+        if self.views_combo.currentIndex() == 0 or name not in self.saved_views:
+            return
+        del self.saved_views[name]
+        save_saved_views(self.saved_views)
+        self._refresh_views_combo()
+
+    def search_titles(self):
+        """Lists the window titles matching the search box, with the time spent on each."""
+        query = self.search_input.text().strip()
+        self.search_results_table.setVisible(bool(query))
+        if not query:
+            return
+        results = self.main_window.title_store.search(query)
+        self.search_results_table.setRowCount(len(results))
+        for row_num, row in enumerate(results.itertuples()):
+            self.search_results_table.setItem(row_num, 0, QTableWidgetItem(row.title))
+            self.search_results_table.setItem(row_num, 1, QTableWidgetItem(get_clean_app_name(row.title)))
+            self.search_results_table.setItem(row_num, 2, QTableWidgetItem(str(datetime.timedelta(seconds=int(row.total_seconds)))))
+            self.search_results_table.setItem(row_num, 3, QTableWidgetItem(row.last_seen.strftime('%Y-%m-%d %H:%M')))
+
+    @timed('ui.log.display_activities')
     def display_activities(self, df):
         self._is_populating = True
         self.activities_table.setRowCount(0)
-        df = df.sort_values(by="start_time", ascending=False)
+        total_seconds = int(df['duration_seconds'].sum())
+        status = f"{len(df):,} activities, {datetime.timedelta(seconds=total_seconds)} in total"
+        if len(df) > self.DISPLAY_LIMIT:
+            status += f" (showing the latest {self.DISPLAY_LIMIT:,})"
+        self.filter_status_label.setText(status)
+        df = df.nlargest(self.DISPLAY_LIMIT, 'start_time', keep='first') if len(df) > self.DISPLAY_LIMIT else df.sort_values(by="start_time", ascending=False)
         
         for index, row in df.iterrows():
             row_num = self.activities_table.rowCount()
@@ -138,5 +270,5 @@ class LogPage(QWidget):
         start_time_str = start_time_item.data(Qt.UserRole)
         new_tags = item.text()
         
-        update_activity_tags(start_time_str, new_tags)
+        self.main_window.save_activity_tags(start_time_str, new_tags)
         self.main_window.update_all_ui()
\ No newline at end of file
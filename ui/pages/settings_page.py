@@ -1,5 +1,11 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, QLabel, QPushButton, QLineEdit, QSpinBox, QScrollArea
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, QLabel, QPushButton, QLineEdit, QSpinBox, QScrollArea,
+    QCheckBox, QTableWidget, QTableWidgetItem, QHeaderView, QComboBox
+)
+from PyQt5.QtCore import Qt, QTimer
+
+from utils.metrics import snapshot
+from data.retention import RETENTION_GRANULARITIES
 
 class SettingsPage(QWidget):
     def __init__(self, main_window):
@@ -38,7 +44,6 @@ class SettingsPage(QWidget):
         interval_layout = QHBoxLayout()
         self.interval_spinbox = QSpinBox()
         self.interval_spinbox.setRange(1, 60)
-        self.interval_spinbox.setValue(self.main_window.config.get('check_interval_seconds', 3))
         interval_layout.addWidget(QLabel("Check interval (seconds):"))
         interval_layout.addWidget(self.interval_spinbox)
         interval_layout.addStretch()
@@ -48,19 +53,97 @@ class SettingsPage(QWidget):
         idle_layout = QHBoxLayout()
         self.idle_spinbox = QSpinBox()
         self.idle_spinbox.setRange(1, 120) # 1 minute to 2 hours
-        self.idle_spinbox.setValue(self.main_window.config.get('idle_threshold_minutes', 5))
         idle_layout.addWidget(QLabel("Idle threshold (minutes):"))
         idle_layout.addWidget(self.idle_spinbox)
         idle_layout.addStretch()
         tracking_layout.addLayout(idle_layout)
 
+        # --- Breakdown Chart Size Setting ---
+        top_n_layout = QHBoxLayout()
+        self.top_n_spinbox = QSpinBox()
+        self.top_n_spinbox.setRange(3, 50)
+        top_n_layout.addWidget(QLabel("Apps shown in breakdown chart (rest grouped as 'Other'):"))
+        top_n_layout.addWidget(self.top_n_spinbox)
+        top_n_layout.addStretch()
+        tracking_layout.addLayout(top_n_layout)
+
+        # --- Retention Setting ---
+        retention_layout = QHBoxLayout()
+        self.retention_spinbox = QSpinBox()
+        self.retention_spinbox.setRange(0, 3650)
+        self.retention_spinbox.setSpecialValueText("Keep all")
+        self.retention_granularity_combo = QComboBox()
+        self.retention_granularity_combo.addItems(list(RETENTION_GRANULARITIES))
+        retention_layout.addWidget(QLabel("Roll up activities older than (days):"))
+        retention_layout.addWidget(self.retention_spinbox)
+        retention_layout.addWidget(QLabel("into one row per app and"))
+        retention_layout.addWidget(self.retention_granularity_combo)
+        retention_layout.addStretch()
+        tracking_layout.addLayout(retention_layout)
+
+        # --- Storage Setting ---
+        self.binary_log_checkbox = QCheckBox("Keep a memory-mapped binary copy of the history (activities.bin) for faster startup and reports on large histories")
+        tracking_layout.addWidget(self.binary_log_checkbox)
+
         # --- Productive Apps Setting ---
         apps_layout = QVBoxLayout()
-        self.apps_input = QLineEdit(",".join(self.main_window.config.get('productivity_apps', [])))
+        self.apps_input = QLineEdit()
         apps_layout.addWidget(QLabel("Productivity Keywords (comma-separated):"))
         apps_layout.addWidget(self.apps_input)
         tracking_layout.addLayout(apps_layout)
         
+        # --- Team Aggregation Setting ---
+        server_layout = QVBoxLayout()
+        self.server_url_input = QLineEdit()
+        self.server_url_input.setPlaceholderText("e.g. http://team-server:8765 (leave empty to disable)")
+        server_layout.addWidget(QLabel("Team aggregation server URL (optional):"))
+        server_layout.addWidget(self.server_url_input)
+        tracking_layout.addLayout(server_layout)
+
+        # --- Sync Folder Setting ---
+        sync_layout = QVBoxLayout()
+        sync_input_layout = QHBoxLayout()
+        self.sync_folder_input = QLineEdit()
+        self.sync_folder_input.setPlaceholderText("A folder shared between your machines (leave empty to disable)")
+        sync_button = QPushButton("Sync Now")
+        sync_button.clicked.connect(lambda: self.main_window.sync_now())
+        sync_input_layout.addWidget(self.sync_folder_input)
+        sync_input_layout.addWidget(sync_button)
+        sync_layout.addWidget(QLabel("Sync folder (optional):"))
+        sync_layout.addLayout(sync_input_layout)
+        tracking_layout.addLayout(sync_layout)
+        
+        # --- Goals and Alerts Settings ---
+        goal_layout = QHBoxLayout()
+        self.daily_goal_spinbox = QSpinBox()
+        self.daily_goal_spinbox.setRange(0, 1440)
+        self.daily_goal_spinbox.setSingleStep(15)
+        self.daily_goal_spinbox.setSpecialValueText("Off")
+        goal_layout.addWidget(QLabel("Daily productive time goal (minutes):"))
+        goal_layout.addWidget(self.daily_goal_spinbox)
+        goal_layout.addStretch()
+        tracking_layout.addLayout(goal_layout)
+
+        limits_layout = QVBoxLayout()
+        self.app_limits_input = QLineEdit()
+        self.app_limits_input.setPlaceholderText("e.g. Slack=30, YouTube=15 (leave empty to disable)")
+        limits_layout.addWidget(QLabel("Daily app limits in minutes (a tray notification is shown when one is reached):"))
+        limits_layout.addWidget(self.app_limits_input)
+        tracking_layout.addLayout(limits_layout)
+
+        # --- Deep Work Settings ---
+        deep_work_layout = QHBoxLayout()
+        self.deep_work_min_spinbox = QSpinBox()
+        self.deep_work_min_spinbox.setRange(1, 480)
+        self.deep_work_interruption_spinbox = QSpinBox()
+        self.deep_work_interruption_spinbox.setRange(0, 3600)
+        deep_work_layout.addWidget(QLabel("Deep work: productive streaks of at least (minutes):"))
+        deep_work_layout.addWidget(self.deep_work_min_spinbox)
+        deep_work_layout.addWidget(QLabel("ignoring interruptions shorter than (seconds):"))
+        deep_work_layout.addWidget(self.deep_work_interruption_spinbox)
+        deep_work_layout.addStretch()
+        tracking_layout.addLayout(deep_work_layout)
+
         save_button = QPushButton("Save Settings")
         save_button.clicked.connect(self.main_window.save_settings_handler)
         tracking_layout.addWidget(save_button, alignment=Qt.AlignRight)
@@ -68,18 +151,98 @@ class SettingsPage(QWidget):
 
         data_group = QGroupBox("Data Management")
         data_layout = QHBoxLayout(data_group)
-        export_button = QPushButton("Export All Data (CSV)")
+        export_button = QPushButton("Export Data...")
         export_button.clicked.connect(self.main_window.export_data)
         clear_button = QPushButton("Clear All Data")
         clear_button.clicked.connect(self.main_window.clear_data_prompt)
+        import_button = QPushButton("Import Data...")
+        import_button.clicked.connect(self.main_window.import_data)
         data_layout.addWidget(export_button)
+        data_layout.addWidget(import_button)
         data_layout.addWidget(clear_button)
         layout.addWidget(data_group)
+
+        # --- Diagnostics ---
+        diagnostics_group = QGroupBox("Diagnostics")
+        diagnostics_layout = QVBoxLayout(diagnostics_group)
+        diagnostics_layout.addWidget(QLabel("Timings of storage, classification and UI operations since startup (last 512 samples for percentiles)."))
+        self.diagnostics_table = QTableWidget()
+        self.diagnostics_table.setColumnCount(5)
+        self.diagnostics_table.setHorizontalHeaderLabels(["Operation", "Count", "p50 (ms)", "p95 (ms)", "Max (ms)"])
+        self.diagnostics_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.diagnostics_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.diagnostics_table.setMinimumHeight(250)
+        diagnostics_layout.addWidget(self.diagnostics_table)
+        self.metrics_file_checkbox = QCheckBox("Write metrics to tracker_data/metrics.json every minute (applied on Save Settings)")
+        diagnostics_layout.addWidget(self.metrics_file_checkbox)
+        layout.addWidget(diagnostics_group)
         
         layout.addStretch()
 
+        # Refresh the diagnostics table only while the page is on screen
+        self.diagnostics_timer = QTimer(self)
+        self.diagnostics_timer.setInterval(2000)
+        self.diagnostics_timer.timeout.connect(self.refresh_diagnostics)
+
         scroll_area.setWidget(content_card)
         page_layout.addWidget(scroll_area)
+        self.load_from_config(self.main_window.config)
+
+    def load_from_config(self, config):
+        """Shows config's values in the form (at startup and after the config file is edited externally)."""
+        self.interval_spinbox.setValue(config['check_interval_seconds'])
+        self.idle_spinbox.setValue(config['idle_threshold_minutes'])
+        self.top_n_spinbox.setValue(config['dashboard_top_n'])
+        self.retention_spinbox.setValue(config['retention_days'])
+        self.retention_granularity_combo.setCurrentText(config['retention_granularity'])
+        self.apps_input.setText(",".join(config['productivity_apps']))
+        self.server_url_input.setText(config['aggregation_server_url'])
+        self.sync_folder_input.setText(config['sync_folder'])
+        self.daily_goal_spinbox.setValue(config['daily_goal_minutes'])
+        self.app_limits_input.setText(", ".join(config['app_limits']))
+        self.deep_work_min_spinbox.setValue(config['deep_work_min_minutes'])
+        self.deep_work_interruption_spinbox.setValue(config['deep_work_max_interruption_seconds'])
+        self.metrics_file_checkbox.setChecked(config['write_metrics_file'])
+        self.binary_log_checkbox.setChecked(config['binary_activity_log'])
+        self.update_theme_button_text(config['is_dark_mode'])
+
+    def config_from_form(self, config):
+        """Returns a copy of config with the form's values."""
+        new_config = dict(config)
+        new_config.update({
+            'check_interval_seconds': self.interval_spinbox.value(),
+            'idle_threshold_minutes': self.idle_spinbox.value(),
+            'dashboard_top_n': self.top_n_spinbox.value(),
+            'write_metrics_file': self.metrics_file_checkbox.isChecked(),
+            'binary_activity_log': self.binary_log_checkbox.isChecked(),
+            'productivity_apps': [app.strip() for app in self.apps_input.text().split(',') if app.strip()],
+            'aggregation_server_url': self.server_url_input.text().strip(),
+            'sync_folder': self.sync_folder_input.text().strip(),
+            'retention_days': self.retention_spinbox.value(),
+            'retention_granularity': self.retention_granularity_combo.currentText(),
+            'daily_goal_minutes': self.daily_goal_spinbox.value(),
+            'app_limits': [limit.strip() for limit in self.app_limits_input.text().split(',') if limit.strip()],
+            'deep_work_min_minutes': self.deep_work_min_spinbox.value(),
+            'deep_work_max_interruption_seconds': self.deep_work_interruption_spinbox.value(),
+        })
+        return new_config
 
     def update_theme_button_text(self, is_dark):
-        self.theme_toggle_button.setText("☀️ Switch to Light Mode" if is_dark else "🌙 Switch to Dark Mode")
\ No newline at end of file
+        self.theme_toggle_button.setText("☀️ Switch to Light Mode" if is_dark else "🌙 Switch to Dark Mode")
+
+    def showEvent(self, event):
+        self.refresh_diagnostics()
+        self.diagnostics_timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.diagnostics_timer.stop()
+        super().hideEvent(event)
+
+    def refresh_diagnostics(self):
+        timings = snapshot()
+        self.diagnostics_table.setRowCount(len(timings))
+        for row, (name, summary) in enumerate(timings.items()):
+            values = [name, str(summary['count']), f"{summary['p50_ms']:.1f}", f"{summary['p95_ms']:.1f}", f"{summary['max_ms']:.1f}"]
+            for column, value in enumerate(values):
+                self.diagnostics_table.setItem(row, column, QTableWidgetItem(value))
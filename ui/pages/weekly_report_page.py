@@ -1,13 +1,14 @@
-import datetime
-import pandas as pd
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, QLabel, QPushButton, QDateEdit, QScrollArea, QFileDialog
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, QLabel, QPushButton, QDateEdit, QScrollArea, QFileDialog, QMessageBox
 from PyQt5.QtCore import QDate, Qt
 import matplotlib.pyplot as plt
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 
-# Import the new PDF exporter function
-from utils.pdf_exporter import generate_weekly_report_pdf
+from utils.intervals import week_edges, split_activities, app_bucket_totals
+from utils.live_totals import KeywordMatcher
+from utils.metrics import timed
+from utils.pdf_exporter import export_pdf_in_process
+from ..widgets.export_progress_dialog import ExportProgressDialog
 
 class WeeklyReportPage(QWidget):
     def __init__(self, main_window):
@@ -68,33 +69,32 @@ class WeeklyReportPage(QWidget):
         page_layout.addWidget(scroll_area)
     
     def export_to_pdf(self):
-        """Opens a save dialog and triggers the PDF generation."""
-        from data.data_handler import load_activities
-        
+        """Opens a save dialog and runs the PDF generation in a worker process."""
         start_date = self.week_start_edit.date().toPyDate()
         default_filename = f"Productivity_Report_{start_date.strftime('%Y_%m_%d')}.pdf"
         
         path, _ = QFileDialog.getSaveFileName(self, "Save PDF Report", default_filename, "PDF Files (*.pdf)")
         
         if path:
-            activities_df = load_activities()
-            end_date = start_date + datetime.timedelta(days=6)
-            week_df = activities_df[
-                (activities_df['start_time'].dt.date >= start_date) & 
-                (activities_df['start_time'].dt.date <= end_date)
-            ].copy()
-            
-            try:
-                generate_weekly_report_pdf(path, start_date, week_df, self.main_window.config)
-                # Optionally, open the PDF after saving or show a success message
-            except Exception as e:
-                # Handle potential errors during PDF generation
-                print(f"Error generating PDF: {e}")
+            edges = week_edges(start_date)
+            week_df = split_activities(self.main_window.activity_log.to_frame(edges[0], edges[-1]), edges)
+
+            self.export_pdf_button.setEnabled(False)
+            export_dialog = ExportProgressDialog("Exporting PDF", export_pdf_in_process, (path, start_date, week_df, dict(self.main_window.config)), path, self)
+            export_dialog.export_finished.connect(self._on_export_finished)
+            export_dialog.export_failed.connect(self._on_export_failed)
+            export_dialog.destroyed.connect(lambda: self.export_pdf_button.setEnabled(True))
+            export_dialog.start()
+
+    def _on_export_finished(self, path):
+        QMessageBox.information(self, "Export Complete", f"Report saved to:\n{path}")
+
+    def _on_export_failed(self, error_message):
+        QMessageBox.critical(self, "Export Error", f"Could not generate the PDF report:\n{error_message}")
 
+    @timed('ui.weekly_report.update_report')
     def update_report(self):
         """This method will be called to generate the weekly chart."""
-        from data.data_handler import load_activities
-        activities_df = load_activities()
         config = self.main_window.config
         
         self.ax.clear()
@@ -111,21 +111,15 @@ class WeeklyReportPage(QWidget):
         self.ax.spines['right'].set_color('none')
 
         start_date = self.week_start_edit.date().toPyDate()
-        end_date = start_date + datetime.timedelta(days=6)
         
-        week_df = activities_df[
-            (activities_df['start_time'].dt.date >= start_date) & 
-            (activities_df['start_time'].dt.date <= end_date)
-        ].copy()
+        # Clip sessions to the week's midnights so time is credited to the day it happened
+        week_totals = app_bucket_totals(self.main_window.activity_log, week_edges(start_date))
 
-        productive_apps = config.get('productivity_apps', [])
-        productive_mask = week_df['app_name'].str.contains('|'.join(productive_apps), case=False, na=False)
-        productive_df = week_df[productive_mask]
+        productive_totals = week_totals[KeywordMatcher(config.get('productivity_apps', [])).mask(week_totals.index)]
 
-        if not productive_df.empty:
-            daily_productive_time = productive_df.groupby(productive_df['start_time'].dt.date)['duration_seconds'].sum() / 3600
-            date_range = pd.to_datetime(pd.date_range(start=start_date, end=end_date)).date
-            daily_productive_time = daily_productive_time.reindex(date_range, fill_value=0)
+        if not productive_totals.empty:
+            # One column per day of the week, so days without productive time are already there
+            daily_productive_time = productive_totals.sum(axis=0) / 3600
             days_of_week = [d.strftime('%A') for d in daily_productive_time.index]
             
             self.ax.bar(days_of_week, daily_productive_time.values, color='#4CAF50')
@@ -134,5 +128,6 @@ class WeeklyReportPage(QWidget):
         else:
             self.ax.text(0.5, 0.5, f"No Productive Data for Selected Week", ha='center', va='center', color=text_color, fontsize=12)
 
-        self.canvas.figure.tight_layout()
-        self.canvas.draw()
\ No newline at end of file
+        with timed('chart.weekly_report.draw'):
+            self.canvas.figure.tight_layout()
+            self.canvas.draw()
\ No newline at end of file
@@ -1,15 +1,19 @@
 import datetime
-from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QDateTimeEdit, QDialogButtonBox
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QDateTimeEdit, QDialogButtonBox, QMessageBox
 from PyQt5.QtCore import QDateTime
 
+MAX_LISTED_CONFLICTS = 5
+
 class AddActivityDialog(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, activity_log=None):
         super().__init__(parent)
         self.setWindowTitle("Add Manual Activity")
         self.setMinimumWidth(400)
         
         # --- Data Storage ---
         self.activity_data = None
+        self.activity_log = activity_log
+        self.overlap_mode = None
         
         # --- UI Elements ---
         layout = QVBoxLayout(self)
@@ -63,6 +67,13 @@ class AddActivityDialog(QDialog):
             print("Error: Start time must be before end time.")
             return
             
+        if self.activity_log is not None:
+            conflicts = self.activity_log.find_overlapping(start_time, end_time)
+            if not conflicts.empty:
+                self.overlap_mode = self._ask_overlap_mode(conflicts)
+                if self.overlap_mode is None:
+                    return
+
         duration = (end_time - start_time).total_seconds()
         
         self.activity_data = {
@@ -75,6 +86,29 @@ class AddActivityDialog(QDialog):
         
         super().accept()
 
+    def _ask_overlap_mode(self, conflicts):
+        """Asks how to resolve overlapping activities; returns None if the user cancels."""
+        listed = "\n".join(
+            f"{row.app_name}: {row.start_time:%Y-%m-%d %H:%M:%S} - {row.end_time:%H:%M:%S}"
+            for row in conflicts.head(MAX_LISTED_CONFLICTS).itertuples()
+        )
+        if len(conflicts) > MAX_LISTED_CONFLICTS:
+            listed += f"\n... and {len(conflicts) - MAX_LISTED_CONFLICTS} more"
+        msg_box = QMessageBox(self)
+        msg_box.setWindowTitle("Overlapping Activities")
+        msg_box.setText(f"This entry overlaps {len(conflicts)} existing activit{'y' if len(conflicts) == 1 else 'ies'}:")
+        msg_box.setInformativeText(listed)
+        trim_button = msg_box.addButton("Trim New Entry", QMessageBox.AcceptRole)
+        split_button = msg_box.addButton("Split Existing", QMessageBox.AcceptRole)
+        replace_button = msg_box.addButton("Replace Existing", QMessageBox.DestructiveRole)
+        msg_box.addButton(QMessageBox.Cancel)
+        msg_box.exec_()
+        return {trim_button: 'trim', split_button: 'split', replace_button: 'replace'}.get(msg_box.clickedButton())
+
+    def get_overlap_mode(self):
+        """How overlaps with stored activities should be resolved, or None if there were none."""
+        return self.overlap_mode
+
     def get_activity_data(self):
         """Returns the collected data if the dialog was accepted."""
         return self.activity_data
\ No newline at end of file
@@ -14,7 +14,7 @@ class CompactModeWidget(QWidget):
         # --- Widget Styling and Behavior ---
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
         self.setAttribute(Qt.WA_TranslucentBackground)
-        self.setGeometry(100, 100, 300, 80)
+        self.setGeometry(100, 100, 300, 100)
 
         # --- UI Elements ---
         self.container = QWidget(self)
@@ -31,8 +31,13 @@ class CompactModeWidget(QWidget):
         self.timer_label.setObjectName("compactTimer")
         self.timer_label.setAlignment(Qt.AlignCenter)
 
+        self.today_label = QLabel("")
+        self.today_label.setObjectName("compactToday")
+        self.today_label.setAlignment(Qt.AlignCenter)
+
         layout.addWidget(self.app_name_label)
         layout.addWidget(self.timer_label)
+        layout.addWidget(self.today_label)
 
         main_layout = QVBoxLayout(self)
         main_layout.addWidget(self.container)
@@ -40,9 +45,12 @@ class CompactModeWidget(QWidget):
 
         self._drag_pos = QPoint()
 
-    def update_display(self, current_activity, is_paused):
+    def update_display(self, current_activity, is_paused, live_totals=None):
         """Public method to update the labels from the main window."""
         is_dark = self.main_window.config.get('is_dark_mode', False)
+        if live_totals:
+            productive_seconds, total_seconds, focus_score = live_totals
+            self.today_label.setText(f"Today {str(datetime.timedelta(seconds=int(total_seconds)))} · Focus {focus_score:.0f}%")
         
         if is_paused:
             self.app_name_label.setText("Tracking Paused")
@@ -57,7 +65,8 @@ class CompactModeWidget(QWidget):
                 
                 self.app_name_label.setText(app_name)
                 
-                duration = (datetime.datetime.now() - current_activity.get('start_time', datetime.datetime.now())).total_seconds()
+                now = self.main_window.now()
+                duration = (now - current_activity.get('start_time', now)).total_seconds()
                 duration_str = str(datetime.timedelta(seconds=int(duration)))
                 self.timer_label.setText(duration_str)
             
@@ -70,6 +79,7 @@ class CompactModeWidget(QWidget):
         text_color = "#F0F0F0" if is_dark else "#222"
         self.app_name_label.setStyleSheet(f"color: {text_color}; font-size: 14px;")
         self.timer_label.setStyleSheet(f"color: {text_color}; font-size: 20px; font-weight: bold;")
+        self.today_label.setStyleSheet(f"color: {text_color}; font-size: 12px;")
 
     def contextMenuEvent(self, event):
         """Create a right-click context menu."""
@@ -0,0 +1,72 @@
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QComboBox, QCheckBox, QDateEdit, QDialogButtonBox
+from PyQt5.QtCore import QDate
+
+from utils.data_exporter import EXPORT_FORMATS
+
+class ExportOptionsDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Export Data")
+        self.setMinimumWidth(400)
+
+        # --- Data Storage ---
+        self.export_options = None
+
+        # --- UI Elements ---
+        layout = QVBoxLayout(self)
+
+        # Format
+        layout.addWidget(QLabel("Format:"))
+        self.format_combo = QComboBox()
+        self.format_combo.addItems(list(EXPORT_FORMATS))
+        layout.addWidget(self.format_combo)
+
+        # Date Range
+        self.all_dates_checkbox = QCheckBox("All dates")
+        self.all_dates_checkbox.setChecked(True)
+        layout.addWidget(self.all_dates_checkbox)
+        date_layout = QHBoxLayout()
+        self.start_date_edit = QDateEdit(QDate.currentDate().addMonths(-1))
+        self.end_date_edit = QDateEdit(QDate.currentDate())
+        for edit in [self.start_date_edit, self.end_date_edit]:
+            edit.setCalendarPopup(True)
+            edit.setDisplayFormat("yyyy-MM-dd")
+            edit.setEnabled(False)
+        self.all_dates_checkbox.toggled.connect(lambda checked: [edit.setEnabled(not checked) for edit in [self.start_date_edit, self.end_date_edit]])
+        date_layout.addWidget(QLabel("From:"))
+        date_layout.addWidget(self.start_date_edit)
+        date_layout.addWidget(QLabel("To:"))
+        date_layout.addWidget(self.end_date_edit)
+        layout.addLayout(date_layout)
+
+        # Filters
+        layout.addWidget(QLabel("Only these tags (comma-separated, optional):"))
+        self.tags_input = QLineEdit()
+        layout.addWidget(self.tags_input)
+        layout.addWidget(QLabel("Only apps containing (comma-separated, optional):"))
+        self.apps_input = QLineEdit()
+        layout.addWidget(self.apps_input)
+
+        # --- Dialog Buttons ---
+        button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        button_box.accepted.connect(self.accept)
+        button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+
+    def accept(self):
+        """Collects the format and the filters as keyword arguments for export_activities."""
+        all_dates = self.all_dates_checkbox.isChecked()
+        self.export_options = {
+            'format': self.format_combo.currentText(),
+            'filters': {
+                'start_date': None if all_dates else self.start_date_edit.date().toPyDate(),
+                'end_date': None if all_dates else self.end_date_edit.date().toPyDate(),
+                'tags': [tag.strip() for tag in self.tags_input.text().split(',') if tag.strip()],
+                'apps': [app.strip() for app in self.apps_input.text().split(',') if app.strip()],
+            }
+        }
+        super().accept()
+
+    def get_export_options(self):
+        """Returns the chosen options if the dialog was accepted."""
+        return self.export_options
@@ -0,0 +1,90 @@
+import os
+import queue
+import multiprocessing
+from PyQt5.QtWidgets import QProgressDialog
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+
+class ExportProgressDialog(QProgressDialog):
+    """
+    Runs an export in a separate process and shows its progress.
+    `target(*args, message_queue)` must write file_path via file_path + '.part' and report
+    ('progress', percent, message), ('done', path) or ('error', message) tuples.
+    The GUI thread only polls the queue, so it never blocks on the export.
+    """
+    export_finished = pyqtSignal(str)
+    export_failed = pyqtSignal(str)
+
+    POLL_INTERVAL_MS = 100
+
+    def __init__(self, title, target, args, file_path, parent=None):
+        super().__init__("Starting export...", "Cancel", 0, 100, parent)
+        self.setWindowTitle(title)
+        self.setWindowModality(Qt.WindowModal)
+        self.setAutoClose(False)
+        self.setAutoReset(False)
+        self.setMinimumDuration(0)
+        self.file_path = file_path
+        self._is_finished = False
+
+        # Spawn rather than fork so the child never inherits Qt state
+        context = multiprocessing.get_context('spawn')
+        self._queue = context.Queue()
+        self._process = context.Process(
+            target=target,
+            args=(*args, self._queue),
+            daemon=True
+        )
+
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setInterval(self.POLL_INTERVAL_MS)
+        self._poll_timer.timeout.connect(self._poll_messages)
+        self.canceled.connect(self.cancel_export)
+
+    def start(self):
+        self._process.start()
+        self._poll_timer.start()
+        self.show()
+
+    def _poll_messages(self):
+        """Drains pending messages from the worker without blocking."""
+        while True:
+            try:
+                message = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            kind = message[0]
+            if kind == 'progress':
+                self.setValue(message[1])
+                self.setLabelText(message[2])
+            elif kind == 'done':
+                self._finish()
+                self.export_finished.emit(message[1])
+                return
+            elif kind == 'error':
+                self._finish()
+                self.export_failed.emit(message[1])
+                return
+
+        if not self._process.is_alive() and self._queue.empty():
+            self._finish()
+            self.export_failed.emit(f"The export process exited unexpectedly (code {self._process.exitcode}).")
+
+    def cancel_export(self):
+        """Stops the worker process and removes any partially written file."""
+        if self._is_finished:
+            return
+        if self._process.is_alive():
+            self._process.terminate()
+        self._finish()
+        temp_path = self.file_path + '.part'
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    def _finish(self):
+        self._is_finished = True
+        self._poll_timer.stop()
+        if self._process.pid is not None:
+            self._process.join(timeout=1)
+        # hide() rather than close(): closing a QProgressDialog emits canceled
+        self.hide()
+        self.deleteLater()
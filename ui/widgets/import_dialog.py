@@ -0,0 +1,110 @@
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QLabel, QPushButton, QComboBox,
+    QCheckBox, QDialogButtonBox, QFileDialog, QMessageBox
+)
+
+from data.importer import REQUIRED_IMPORT_COLUMNS, OPTIONAL_IMPORT_COLUMNS, read_import_file, guess_column_mapping, prepare_import
+
+NOT_MAPPED = "(not mapped)"
+
+class ImportDialog(QDialog):
+    def __init__(self, existing_df, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Import Activities")
+        self.setMinimumWidth(450)
+
+        # --- Data Storage ---
+        self.existing_df = existing_df
+        self.source_df = None
+        self.prepared_rows = None
+
+        # --- UI Elements ---
+        layout = QVBoxLayout(self)
+
+        file_layout = QHBoxLayout()
+        self.file_label = QLabel("No file selected (CSV or JSON Lines).")
+        choose_button = QPushButton("Choose File...")
+        choose_button.clicked.connect(self.choose_file)
+        file_layout.addWidget(self.file_label, 1)
+        file_layout.addWidget(choose_button)
+        layout.addLayout(file_layout)
+
+        # Column Mapping
+        mapping_layout = QFormLayout()
+        self.mapping_combos = {}
+        for column in REQUIRED_IMPORT_COLUMNS + OPTIONAL_IMPORT_COLUMNS:
+            combo = QComboBox()
+            combo.currentIndexChanged.connect(self._invalidate)
+            self.mapping_combos[column] = combo
+            mapping_layout.addRow(f"{column}{'' if column in REQUIRED_IMPORT_COLUMNS else ' (optional)'}:", combo)
+        layout.addLayout(mapping_layout)
+
+        self.skip_overlapping_checkbox = QCheckBox("Skip rows that overlap other activities")
+        layout.addWidget(self.skip_overlapping_checkbox)
+
+        check_layout = QHBoxLayout()
+        self.summary_label = QLabel("")
+        self.summary_label.setWordWrap(True)
+        check_button = QPushButton("Check")
+        check_button.clicked.connect(self.check_import)
+        check_layout.addWidget(self.summary_label, 1)
+        check_layout.addWidget(check_button)
+        layout.addLayout(check_layout)
+
+        # --- Dialog Buttons ---
+        button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        button_box.button(QDialogButtonBox.Ok).setText("Import")
+        button_box.accepted.connect(self.accept)
+        button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+
+    def choose_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Import Activities", "", "Activity Files (*.csv *.jsonl *.ndjson);;All Files (*)")
+        if not path:
+            return
+        try:
+            self.source_df = read_import_file(path)
+        except Exception as e:
+            QMessageBox.warning(self, "Import", f"Could not read the file: {e}")
+            return
+        self.file_label.setText(f"{path} ({len(self.source_df):,} rows)")
+        guessed = guess_column_mapping(self.source_df.columns)
+        for column, combo in self.mapping_combos.items():
+            combo.blockSignals(True)
+            combo.clear()
+            combo.addItems([NOT_MAPPED] + list(self.source_df.columns))
+            combo.setCurrentText(guessed.get(column, NOT_MAPPED))
+            combo.blockSignals(False)
+        self._invalidate()
+
+    def _invalidate(self):
+        self.prepared_rows = None
+        self.summary_label.setText("")
+
+    def check_import(self):
+        """Validates the file with the current mapping and shows what an import would do."""
+        if self.source_df is None:
+            QMessageBox.warning(self, "Import", "Choose a file first.")
+            return False
+        mapping = {column: combo.currentText() for column, combo in self.mapping_combos.items() if combo.currentText() != NOT_MAPPED}
+        try:
+            self.prepared_rows, report = prepare_import(self.source_df, mapping, self.existing_df)
+        except (ValueError, KeyError) as e:
+            QMessageBox.warning(self, "Import", str(e))
+            return False
+        self.summary_label.setText(
+            f"{report['importable']:,} of {report['rows']:,} rows can be imported. "
+            f"{report['invalid']:,} invalid, {report['duplicates']:,} duplicates skipped, "
+            f"{report['overlapping']:,} overlap other activities."
+        )
+        return True
+
+    def accept(self):
+        """Called when the Import button is clicked."""
+        if self.prepared_rows is None and not self.check_import():
+            return
+        super().accept()
+
+    def get_import(self):
+        """Returns the prepared rows and whether overlapping rows should be skipped."""
+        return self.prepared_rows, self.skip_overlapping_checkbox.isChecked()
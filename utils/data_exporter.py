@@ -0,0 +1,144 @@
+import os
+import re
+import datetime
+import traceback
+import pandas as pd
+
+from data.data_handler import ACTIVITIES_FILE
+from data.locking import snapshot
+from data.compact_store import ACTIVITY_COLUMNS
+from utils.metrics import timed
+
+EXPORT_FORMATS = {'csv': "CSV Files (*.csv)", 'jsonl': "JSON Lines Files (*.jsonl)", 'parquet': "Parquet Files (*.parquet)"}
+EXPORT_CHUNK_ROWS = 50_000
+
+def filter_chunk(chunk, start_date=None, end_date=None, tags=None, apps=None):
+    """
+    Keeps rows overlapping [start_date, end_date] (dates, inclusive) that carry any of
+    `tags` and whose app name contains any of `apps` (case-insensitive). Empty filters match all.
+    """
+    mask = pd.Series(True, index=chunk.index)
+    if start_date:
+        mask &= chunk['end_time'] > pd.Timestamp(start_date)
+    if end_date:
+        mask &= chunk['start_time'] < pd.Timestamp(end_date + datetime.timedelta(days=1))
+    if tags:
+        chunk_tags = chunk['tags'].str.lower().str.split(r'\s*,\s*')
+        wanted = {tag.lower() for tag in tags}
+        mask &= chunk_tags.map(lambda row_tags: not wanted.isdisjoint(row_tags))
+    if apps:
+        mask &= chunk['app_name'].str.contains('|'.join(re.escape(app) for app in apps), case=False, na=False)
+    return chunk[mask]
+
+def _normalize_chunk(chunk):
+    """Gives every chunk the same dtypes, so column types never change mid-file."""
+    chunk['app_name'] = chunk['app_name'].fillna('').astype(str)
+    chunk['start_time'] = pd.to_datetime(chunk['start_time'])
+    chunk['end_time'] = pd.to_datetime(chunk['end_time'])
+    chunk['duration_seconds'] = pd.to_numeric(chunk['duration_seconds']).astype('float64')
+    if 'tags' not in chunk.columns: chunk['tags'] = ''
+    chunk['tags'] = chunk['tags'].fillna('').astype(str)
+    return chunk[ACTIVITY_COLUMNS]
+
+class _CsvChunkWriter:
+    def __init__(self, file_path):
+        self._file = open(file_path, 'w', newline='', encoding='utf-8')
+        self._wrote_header = False
+
+    def write(self, chunk):
+        chunk.to_csv(self._file, header=not self._wrote_header, index=False)
+        self._wrote_header = True
+
+    def close(self):
+        if not self._wrote_header:
+            # Keep the header so an empty export is still a valid CSV
+            pd.DataFrame(columns=ACTIVITY_COLUMNS).to_csv(self._file, index=False)
+        self._file.close()
+
+class _JsonLinesChunkWriter:
+    def __init__(self, file_path):
+        self._file = open(file_path, 'w', encoding='utf-8')
+
+    def write(self, chunk):
+        lines = chunk.to_json(orient='records', lines=True, date_format='iso', date_unit='us')
+        self._file.write(lines if lines.endswith('\n') else lines + '\n')
+
+    def close(self):
+        self._file.close()
+
+class _ParquetChunkWriter:
+    """Writes each chunk as a row group of one Parquet file."""
+    def __init__(self, file_path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export needs the 'pyarrow' package (pip install pyarrow).")
+        self._pa = pa
+        self.schema = pa.schema([
+            ('app_name', pa.string()), ('start_time', pa.timestamp('us')), ('end_time', pa.timestamp('us')),
+            ('duration_seconds', pa.float64()), ('tags', pa.string()),
+        ])
+        self._writer = pq.ParquetWriter(file_path, self.schema)
+
+    def write(self, chunk):
+        self._writer.write_table(self._pa.Table.from_pandas(chunk, schema=self.schema, preserve_index=False, safe=False))
+
+    def close(self):
+        self._writer.close()
+
+_CHUNK_WRITERS = {'csv': _CsvChunkWriter, 'jsonl': _JsonLinesChunkWriter, 'parquet': _ParquetChunkWriter}
+
+@timed('export.export_activities')
+def export_activities(file_path, output_format, start_date=None, end_date=None, tags=None, apps=None,
+                      progress_callback=None, activities_file=ACTIVITIES_FILE, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Streams the activity history into file_path as 'csv', 'jsonl' or 'parquet',
+    applying the filters chunk by chunk so memory stays bounded by chunk_rows.
+    Returns the number of rows written.
+    """
+    if output_format not in _CHUNK_WRITERS:
+        raise ValueError(f"Unknown export format: {output_format}")
+    report = progress_callback or (lambda percent, message: None)
+    rows_written = 0
+
+    writer = _CHUNK_WRITERS[output_format](file_path)
+    # Read a copy: holding the history open for the whole export would block the tracker's saves on Windows
+    try:
+        with snapshot(activities_file) as snapshot_path, open(snapshot_path, 'rb') as source:
+            total_bytes = max(os.path.getsize(snapshot_path), 1)
+            try:
+                chunks = pd.read_csv(source, chunksize=chunk_rows)
+            except pd.errors.EmptyDataError:
+                chunks = []
+            for chunk in chunks:
+                chunk = filter_chunk(_normalize_chunk(chunk), start_date, end_date, tags, apps)
+                if not chunk.empty:
+                    writer.write(chunk)
+                    rows_written += len(chunk)
+                # The parser reads ahead in blocks, so the file position is a close estimate
+                report(min(99, int(source.tell() * 100 / total_bytes)), f"Exported {rows_written:,} rows...")
+    finally:
+        writer.close()
+    report(100, f"Exported {rows_written:,} rows.")
+    return rows_written
+
+def export_data_in_process(file_path, output_format, filters, message_queue):
+    """
+    Entry point for a worker process, mirroring export_pdf_in_process: writes to a
+    temporary file that is renamed on success and reports ('progress', percent, message),
+    ('done', path) or ('error', message) tuples on message_queue.
+    """
+    temp_path = file_path + '.part'
+    try:
+        export_activities(
+            temp_path, output_format, **filters,
+            progress_callback=lambda percent, message: message_queue.put(('progress', percent, message))
+        )
+        os.replace(temp_path, file_path)
+        message_queue.put(('done', file_path))
+    except Exception as e:
+        traceback.print_exc()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        message_queue.put(('error', str(e)))
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+from data.retention import retention_cutoff
+from utils.intervals import to_ns, deoverlap_intervals
+from utils.live_totals import KeywordMatcher
+
+DAILY_STREAK_COLUMNS = ['streaks', 'deep_work_seconds', 'longest_seconds']
+
+def productive_mask(app_names, productivity_apps):
+    """Whether each app name (an Index or Series) is productive, classified like TodayTotals does."""
+    codes, categories = pd.factorize(pd.Series(app_names, dtype=object))
+    productive = KeywordMatcher(productivity_apps).mask(categories)
+    return productive[codes] & (codes >= 0) if len(categories) else np.zeros(len(codes), dtype=bool)
+
+def find_streaks(starts, ends, productive, max_interruption_seconds, min_streak_seconds):
+    """
+    Finds uninterrupted productive streaks in int64 nanosecond [start, end) intervals.
+
+    Productive intervals are sorted and a streak breaks wherever the time between
+    one productive interval ending and the next starting (other apps, idle or
+    untracked time) is max_interruption_seconds or more. Streaks shorter than
+    min_streak_seconds are dropped. Returns (streak_starts, streak_ends,
+    productive_seconds): the streak's span, and the productive time inside it.
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    keep = np.asarray(productive, dtype=bool) & (ends > starts)
+    starts, ends = starts[keep], ends[keep]
+    if len(starts) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0)
+    order = np.argsort(starts, kind='stable')
+    starts, ends = starts[order], ends[order]
+
+    # --- Run-length encode: a new run starts after every long enough gap ---
+    covered_until = np.maximum.accumulate(ends)
+    gaps = starts[1:] - covered_until[:-1]
+    run_starts = np.concatenate(([0], np.flatnonzero(gaps >= int(max_interruption_seconds * 1e9)) + 1))
+    streak_starts = starts[run_starts]
+    streak_ends = np.maximum.reduceat(ends, run_starts)
+    productive_seconds = np.add.reduceat(ends - starts, run_starts) / 1e9
+
+    long_enough = streak_ends - streak_starts >= int(min_streak_seconds * 1e9)
+    return streak_starts[long_enough], streak_ends[long_enough], productive_seconds[long_enough]
+
+def daily_streaks(streak_starts, streak_ends, edges):
+    """
+    Per-day streak count, total streak time and longest streak, with each streak
+    credited to the day it started. Returns a DataFrame indexed by day start with
+    DAILY_STREAK_COLUMNS; days without streaks are zero.
+    """
+    edges = to_ns(edges)
+    n_days = len(edges) - 1
+    days = np.searchsorted(edges, streak_starts, side='right') - 1
+    inside = (days >= 0) & (days < n_days)
+    days = days[inside]
+    lengths = (streak_ends[inside] - streak_starts[inside]) / 1e9
+    longest = np.zeros(n_days)
+    np.maximum.at(longest, days, lengths)
+    return pd.DataFrame({
+        'streaks': np.bincount(days, minlength=n_days),
+        'deep_work_seconds': np.bincount(days, weights=lengths, minlength=n_days),
+        'longest_seconds': longest,
+    }, index=pd.to_datetime(edges[:-1]), columns=DAILY_STREAK_COLUMNS)
+
+def _streak_settings(config):
+    return config['deep_work_max_interruption_seconds'], config['deep_work_min_minutes'] * 60
+
+def _rolled_up_before(config, now=None):
+    """
+    The retention cutoff in nanoseconds, or None when retention is off. Rows that
+    ended before it are rolled-up bucket totals rather than sessions, so they would
+    read as long streaks; days before the cutoff report no streaks.
+    """
+    if config['retention_days'] <= 0:
+        return None
+    return to_ns([retention_cutoff(config['retention_days'], now)])[0]
+
+def log_daily_streaks(activity_log, edges, config, now=None):
+    """daily_streaks for the days in edges, straight from a log's interval_arrays()."""
+    starts, ends, app_codes, _ = activity_log.interval_arrays()
+    range_ns = to_ns([edges[0], edges[-1]])
+    cutoff = _rolled_up_before(config, now)
+    if cutoff is not None:
+        range_ns[0] = max(range_ns[0], cutoff)
+    # Only sessions overlapping the range take part; time covered twice counts once
+    rows = np.flatnonzero((ends > range_ns[0]) & (starts < range_ns[1]))
+    starts, ends = deoverlap_intervals(starts[rows], ends[rows])
+    productive = KeywordMatcher(config['productivity_apps']).mask(activity_log.app_categories)
+    productive = productive[app_codes[rows]] if len(productive) else np.zeros(len(rows), dtype=bool)
+    streak_starts, streak_ends, _ = find_streaks(starts, ends, productive, *_streak_settings(config))
+    return daily_streaks(streak_starts, streak_ends, edges)
+
+def frame_daily_streaks(activities_df, edges, config, now=None):
+    """daily_streaks for the days in edges from activity rows (e.g. a split_activities week)."""
+    cutoff = _rolled_up_before(config, now)
+    if cutoff is not None and not activities_df.empty:
+        activities_df = activities_df[to_ns(activities_df['end_time']) > cutoff]
+    if activities_df.empty:
+        return daily_streaks(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), edges)
+    starts, ends = deoverlap_intervals(to_ns(activities_df['start_time']), to_ns(activities_df['end_time']))
+    productive = productive_mask(activities_df['app_name'].astype(str), config['productivity_apps'])
+    streak_starts, streak_ends, _ = find_streaks(starts, ends, productive, *_streak_settings(config))
+    return daily_streaks(streak_starts, streak_ends, edges)
@@ -0,0 +1,100 @@
+from data.config import parse_app_limits
+from utils.live_totals import UNCOUNTED_LIVE_APPS, KeywordMatcher, seconds_on_day
+
+class Rule:
+    """
+    A threshold on today's time, either a goal to reach ('goal', on the productive
+    total) or a limit not to pass ('limit', on the apps `matches` accepts). Limits
+    keep their own running total of closed time for today.
+    """
+    def __init__(self, kind, name, threshold_seconds, matches=None):
+        self.kind = kind
+        self.name = name
+        self.threshold_seconds = threshold_seconds
+        self.matches = matches
+        self.seconds = 0.0
+        self.alerted = False
+
+    def message(self):
+        minutes = round(self.threshold_seconds / 60)
+        if self.kind == 'goal':
+            return "Daily Goal Reached", f"You've spent {minutes // 60} h {minutes % 60:02d} min on productive apps today."
+        return f"{self.name} Limit Reached", f"You've spent {minutes} min on {self.name} today."
+
+def rules_from_config(config):
+    """The daily productive-time goal (if set) and one limit per app_limits entry."""
+    rules = []
+    if config['daily_goal_minutes']:
+        rules.append(Rule('goal', "Daily goal", config['daily_goal_minutes'] * 60))
+    for app, minutes in parse_app_limits(config['app_limits']):
+        rules.append(Rule('limit', app, minutes * 60, KeywordMatcher([app])))
+    return rules
+
+class GoalEngine:
+    """
+    Evaluates goal and limit rules for today. The goal reads the productive total
+    from today_totals; each limit keeps a running total that is seeded once from
+    stored rows and then updated from each closed activity. The in-flight session is
+    added when checking, so check() costs O(rules) and never reads history. Each rule
+    alerts at most once per day.
+    """
+    def __init__(self, rules, today_totals):
+        self.today_totals = today_totals
+        self.day = today_totals.clock().date()
+        self.set_rules(rules)
+
+    def set_rules(self, rules):
+        # Rules that already alerted today stay quiet after a settings change
+        alerted = {(rule.kind, rule.name, rule.threshold_seconds) for rule in getattr(self, 'rules', []) if rule.alerted}
+        self.rules = rules
+        self.limits = [rule for rule in rules if rule.kind == 'limit']
+        for rule in self.rules:
+            rule.alerted = (rule.kind, rule.name, rule.threshold_seconds) in alerted
+
+    def seed(self, today_df, day=None):
+        """Resets the limit totals from today's rows (already clipped to today, e.g. by split_activities)."""
+        day = day or self.today_totals.clock().date()
+        if day != self.day:
+            self._reset(day)
+        per_app = today_df.groupby('app_name', observed=True)['duration_seconds'].sum()
+        for rule in self.limits:
+            rule.seconds = float(sum(seconds for app, seconds in per_app.items() if rule.matches(app)))
+
+    def _reset(self, day):
+        self.day = day
+        for rule in self.rules:
+            rule.seconds = 0.0
+            rule.alerted = False
+
+    def _roll_over(self, now):
+        if now.date() != self.day:
+            self._reset(now.date())
+
+    def add_closed(self, activity):
+        """Counts a just-closed activity (only its part that falls on today) towards the matching limits."""
+        self._roll_over(activity['end_time'])
+        seconds = seconds_on_day(self.day, activity['start_time'], activity['end_time'])
+        for rule in self.limits:
+            if rule.matches(activity['app_name']):
+                rule.seconds += seconds
+
+    def check(self, current_activity=None, now=None):
+        """Returns the rules that crossed their threshold since the last check, including the in-flight session."""
+        now = now or self.today_totals.clock()
+        self._roll_over(now)
+        live_app, live_seconds = None, 0.0
+        if current_activity and current_activity['app_name'] not in UNCOUNTED_LIVE_APPS:
+            live_app = current_activity['app_name']
+            live_seconds = seconds_on_day(self.day, current_activity['start_time'], now)
+        triggered = []
+        for rule in self.rules:
+            if rule.alerted:
+                continue
+            if rule.kind == 'goal':
+                seconds = self.today_totals.snapshot(current_activity, now)[0]
+            else:
+                seconds = rule.seconds + (live_seconds if live_app and rule.matches(live_app) else 0.0)
+            if seconds >= rule.threshold_seconds:
+                rule.alerted = True
+                triggered.append(rule)
+        return triggered
@@ -1,3 +1,7 @@
+import pandas as pd
+from utils.metrics import timed
+
+@timed('classify.get_clean_app_name')
 def get_clean_app_name(window_title):
     """Cleans the window title to get a more consistent application name."""
     if not window_title or not isinstance(window_title, str) or window_title.strip() == "":
@@ -26,4 +30,15 @@ def get_clean_app_name(window_title):
         app_name = window_title.split(" | ")[-1].strip()
         if app_name: return app_name
             
-    return window_title.strip()
\ No newline at end of file
+    return window_title.strip()
+
+def top_n_with_other(totals, n, other_label="Other"):
+    """
+    Keeps the n largest entries of a Series of totals and sums the rest into a
+    single other_label entry. Returns a Series sorted in descending order.
+    """
+    totals = totals.sort_values(ascending=False)
+    if n <= 0 or len(totals) <= n + 1:
+        return totals
+    # concat rather than item assignment, so a CategoricalIndex doesn't reject the new label
+    return pd.concat([totals.iloc[:n], pd.Series({other_label: totals.iloc[n:].sum()})])
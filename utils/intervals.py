@@ -0,0 +1,156 @@
+import datetime
+import numpy as np
+import pandas as pd
+
+def day_edges(start_date, end_date):
+    """Returns the midnight bucket edges covering start_date to end_date (inclusive)."""
+    days = (end_date - start_date).days + 1
+    return pd.date_range(start=pd.Timestamp(start_date), periods=days + 1, freq='D')
+
+def week_edges(week_start_date):
+    """Returns the daily bucket edges for the 7 days starting at week_start_date."""
+    return day_edges(week_start_date, week_start_date + datetime.timedelta(days=6))
+
+def to_ns(values):
+    """Converts datetimes (Series, Index, array or list) to an int64 nanosecond array."""
+    return np.asarray(pd.to_datetime(values)).astype('datetime64[ns]').view(np.int64)
+
+def clip_intervals(starts, ends, edges):
+    """
+    Clips [start, end) intervals to the buckets defined by the sorted edges.
+
+    All inputs are int64 arrays on the same time scale. Returns four arrays
+    (row_index, bucket_index, piece_start, piece_end), one entry per non-empty
+    piece. Time falling outside edges[0]..edges[-1] is dropped.
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    edges = np.asarray(edges, dtype=np.int64)
+    n_buckets = len(edges) - 1
+    if n_buckets < 1 or len(starts) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty, empty
+
+    # --- Locate the first and last bucket touched by each interval ---
+    first = np.maximum(np.searchsorted(edges, starts, side='right') - 1, 0)
+    last = np.minimum(np.searchsorted(edges, ends, side='left') - 1, n_buckets - 1)
+    counts = np.where(ends > starts, np.maximum(last - first + 1, 0), 0)
+
+    # --- Expand each interval into one piece per bucket it spans ---
+    rows = np.repeat(np.arange(len(starts)), counts)
+    offsets = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+    buckets = first[rows] + offsets
+    piece_starts = np.maximum(starts[rows], edges[buckets])
+    piece_ends = np.minimum(ends[rows], edges[buckets + 1])
+
+    keep = piece_ends > piece_starts
+    return rows[keep], buckets[keep], piece_starts[keep], piece_ends[keep]
+
+def deoverlap_intervals(starts, ends):
+    """
+    Makes [start, end) intervals disjoint: each interval keeps only the time not
+    already covered by intervals that start before it (ties go to the earlier row).
+    Takes and returns int64 arrays; covered intervals come back with start == end.
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    if len(starts) < 2:
+        return starts.copy(), ends.copy()
+    order = np.argsort(starts, kind='stable')
+    covered_until = np.empty(len(starts), dtype=np.int64)
+    covered_until[0] = np.iinfo(np.int64).min
+    covered_until[1:] = np.maximum.accumulate(ends[order])[:-1]
+    new_starts = np.empty_like(starts)
+    new_starts[order] = np.maximum(starts[order], covered_until)
+    return np.minimum(new_starts, ends), ends.copy()
+
+class OverlapIndex:
+    """
+    Interval index over [start, end) int64 intervals: starts sorted ascending plus
+    the running maximum of their ends. Since that maximum never decreases, both
+    "does anything overlap?" and "where do the candidates begin?" are binary searches.
+    """
+    def __init__(self, starts, ends):
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        self.order = np.argsort(starts, kind='stable')
+        self.starts = starts[self.order]
+        self.ends = ends[self.order]
+        self.max_ends = np.maximum.accumulate(self.ends) if len(self.ends) else self.ends
+
+    @classmethod
+    def from_frame(cls, activities_df):
+        return cls(to_ns(activities_df['start_time']), to_ns(activities_df['end_time']))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def overlaps_any(self, starts, ends):
+        """Vectorised: for each [start, end), whether any indexed interval overlaps it. O(log n) each."""
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        if len(self) == 0:
+            return np.zeros(len(starts), dtype=bool)
+        # The last interval starting before `end` carries the largest end of all candidates
+        last_candidate = np.searchsorted(self.starts, ends, side='left') - 1
+        has_candidate = last_candidate >= 0
+        overlaps = np.zeros(len(starts), dtype=bool)
+        overlaps[has_candidate] = self.max_ends[last_candidate[has_candidate]] > starts[has_candidate]
+        return overlaps
+
+    def overlapping(self, start, end):
+        """Positions (in the original order) of the intervals overlapping [start, end)."""
+        high = np.searchsorted(self.starts, end, side='left')
+        low = np.searchsorted(self.max_ends[:high], start, side='right')
+        candidates = np.arange(low, high)
+        return self.order[candidates[self.ends[low:high] > start]]
+
+def split_activities(activities_df, edges, deoverlap=True):
+    """
+    Splits activity rows at the given datetime edges (e.g. midnights).
+
+    Each returned row lies inside a single bucket, with start_time, end_time and
+    duration_seconds clipped to it; other columns and the original index label
+    are carried over. Rows outside the edge range are dropped. With deoverlap,
+    time covered by more than one row (e.g. a manual entry over tracked time)
+    is only counted once.
+    """
+    if activities_df.empty:
+        return activities_df.iloc[0:0].copy()
+
+    starts, ends = to_ns(activities_df['start_time']), to_ns(activities_df['end_time'])
+    if deoverlap:
+        starts, ends = deoverlap_intervals(starts, ends)
+    rows, _, piece_starts, piece_ends = clip_intervals(starts, ends, to_ns(edges))
+    split_df = activities_df.iloc[rows].copy()
+    split_df['start_time'] = pd.to_datetime(piece_starts)
+    split_df['end_time'] = pd.to_datetime(piece_ends)
+    split_df['duration_seconds'] = (piece_ends - piece_starts) / 1e9
+    return split_df
+
+def app_bucket_totals(activity_log, edges, tag=None):
+    """
+    Seconds per app and bucket, computed from the log's interval_arrays() without
+    materialising rows (a memory-mapped BinaryActivityLog is read in place). Time
+    covered twice counts once, as in split_activities; with tag, only rows whose tags
+    contain it take part in that. Returns a DataFrame indexed by app name with one
+    column per bucket start; apps with no time are dropped.
+    """
+    starts, ends, app_codes, tag_codes = activity_log.interval_arrays()
+    edges = to_ns(edges)
+    n_buckets = len(edges) - 1
+    # Rows outside the range can't cover time inside it, so only these take part
+    rows = np.flatnonzero((ends > edges[0]) & (starts < edges[-1]))
+    if tag:
+        # Filter before de-overlapping, so untagged rows can't take time from tagged ones
+        tag_matches = np.asarray(activity_log.tag_categories.str.contains(tag, regex=False), dtype=bool)
+        rows = rows[tag_matches[tag_codes[rows]]] if len(tag_matches) else rows[:0]
+    starts, ends = deoverlap_intervals(starts[rows], ends[rows])
+
+    piece_rows, buckets, piece_starts, piece_ends = clip_intervals(starts, ends, edges)
+    app_categories = activity_log.app_categories
+    cells = app_codes[rows[piece_rows]].astype(np.int64) * n_buckets + buckets
+    seconds = np.bincount(cells, weights=(piece_ends - piece_starts) / 1e9, minlength=len(app_categories) * n_buckets)
+    totals = pd.DataFrame(seconds.reshape(len(app_categories), n_buckets),
+                          index=pd.Index(app_categories, name='app_name'), columns=pd.to_datetime(edges[:-1]))
+    return totals[totals.sum(axis=1) > 0]
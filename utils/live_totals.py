@@ -0,0 +1,81 @@
+import re
+import datetime
+import numpy as np
+
+# The in-flight "Idle" session is not counted until it is resolved (logged as a break or discarded)
+UNCOUNTED_LIVE_APPS = {'Idle'}
+
+class KeywordMatcher:
+    """
+    Case-insensitive test of whether an app name contains one of `keywords` (e.g. the
+    productivity_apps). Each distinct app name is matched only once.
+    """
+    def __init__(self, keywords):
+        keywords = [keyword for keyword in keywords if keyword]
+        self.pattern = re.compile('|'.join(re.escape(keyword) for keyword in keywords), re.IGNORECASE) if keywords else None
+        self._matches = {}
+
+    def __call__(self, app_name):
+        if app_name not in self._matches:
+            self._matches[app_name] = bool(self.pattern and self.pattern.search(str(app_name)))
+        return self._matches[app_name]
+
+    def mask(self, app_names):
+        """A bool array with one entry per app name (e.g. a log's app_categories)."""
+        return np.fromiter((self(app_name) for app_name in app_names), dtype=bool, count=len(app_names))
+
+def seconds_on_day(day, start_time, end_time):
+    """The part of [start_time, end_time) that falls on or after midnight of `day`."""
+    midnight = datetime.datetime.combine(day, datetime.time())
+    return max((end_time - max(start_time, midnight)).total_seconds(), 0.0)
+
+class TodayTotals:
+    """
+    Running productive/total seconds for today. Seeded once from stored rows, then
+    updated in constant time as activities close; the in-flight session is added on
+    read, so the totals can be shown every second without touching storage.
+    clock replaces datetime.datetime.now (e.g. during a trace replay).
+    """
+    def __init__(self, productivity_apps, clock=None):
+        self.set_productivity_apps(productivity_apps)
+        self.clock = clock or datetime.datetime.now
+        self.day = self.clock().date()
+        self.productive_seconds = 0.0
+        self.total_seconds = 0.0
+
+    def set_productivity_apps(self, productivity_apps):
+        self.is_productive = KeywordMatcher(productivity_apps)
+
+    def seed(self, today_df, day=None):
+        """Resets the totals from today's rows (already clipped to today, e.g. by split_activities)."""
+        self.day = day or self.clock().date()
+        per_app = today_df.groupby('app_name', observed=True)['duration_seconds'].sum()
+        self.total_seconds = float(per_app.sum())
+        self.productive_seconds = float(sum(seconds for app, seconds in per_app.items() if self.is_productive(app)))
+
+    def _roll_over(self, now):
+        if now.date() != self.day:
+            self.day = now.date()
+            self.productive_seconds = 0.0
+            self.total_seconds = 0.0
+
+    def add_closed(self, activity):
+        """Counts a just-closed activity (only its part that falls on today)."""
+        self._roll_over(activity['end_time'])
+        seconds = seconds_on_day(self.day, activity['start_time'], activity['end_time'])
+        self.total_seconds += seconds
+        if self.is_productive(activity['app_name']):
+            self.productive_seconds += seconds
+
+    def snapshot(self, current_activity=None, now=None):
+        """Returns (productive_seconds, total_seconds, focus_score) including the in-flight session."""
+        now = now or self.clock()
+        self._roll_over(now)
+        productive_seconds, total_seconds = self.productive_seconds, self.total_seconds
+        if current_activity and current_activity['app_name'] not in UNCOUNTED_LIVE_APPS:
+            seconds = seconds_on_day(self.day, current_activity['start_time'], now)
+            total_seconds += seconds
+            if self.is_productive(current_activity['app_name']):
+                productive_seconds += seconds
+        focus_score = productive_seconds / total_seconds * 100 if total_seconds > 0 else 0
+        return productive_seconds, total_seconds, focus_score
@@ -0,0 +1,105 @@
+import os
+import json
+import time
+import functools
+import threading
+from collections import deque
+
+# Samples kept per operation for the rolling percentiles
+WINDOW_SIZE = 512
+
+class TimingStats:
+    """Rolling timing statistics for one operation."""
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.max_seconds = 0.0
+        self.total_seconds = 0.0
+        self.samples = deque(maxlen=WINDOW_SIZE)
+
+    def record(self, seconds):
+        # Only O(1) work here; percentiles are computed when a snapshot is read
+        self.count += 1
+        self.total_seconds += seconds
+        if seconds > self.max_seconds:
+            self.max_seconds = seconds
+        self.samples.append(seconds)
+
+    def clear(self):
+        self.count = 0
+        self.max_seconds = 0.0
+        self.total_seconds = 0.0
+        self.samples.clear()
+
+    def summary(self):
+        samples = sorted(self.samples)
+        if not samples:
+            return {'count': 0, 'mean_ms': 0.0, 'p50_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
+        return {
+            'count': self.count,
+            'mean_ms': self.total_seconds / self.count * 1000,
+            'p50_ms': samples[len(samples) // 2] * 1000,
+            'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+            'max_ms': self.max_seconds * 1000,
+        }
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+def get_stats(name):
+    """Returns the TimingStats for name, creating it on first use."""
+    stats = _stats.get(name)
+    if stats is None:
+        with _stats_lock:
+            stats = _stats.setdefault(name, TimingStats(name))
+    return stats
+
+class _Timer:
+    def __init__(self, stats):
+        self._stats = stats
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self._stats.record(time.perf_counter() - self._start)
+        return False
+
+    def __call__(self, func):
+        stats = self._stats
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stats.record(time.perf_counter() - start)
+        return wrapper
+
+def timed(name):
+    """
+    Records the duration of a block or function under name.
+    Use as `with timed('storage.load'):` or as a `@timed('storage.load')` decorator.
+    """
+    return _Timer(get_stats(name))
+
+def snapshot():
+    """Returns {name: summary} for every operation recorded so far, sorted by name."""
+    with _stats_lock:
+        stats = list(_stats.values())
+    return {s.name: s.summary() for s in sorted(stats, key=lambda s: s.name)}
+
+def reset():
+    """Zeroes every operation's statistics in place; @timed functions hold on to their TimingStats."""
+    with _stats_lock:
+        for stats in _stats.values():
+            stats.clear()
+
+def write_metrics_file(path):
+    """Atomically writes the current snapshot as JSON."""
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump({'written_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'timings': snapshot()}, f, indent=2)
+    os.replace(temp_path, path)
@@ -1,16 +1,103 @@
 import datetime
 import io
+import os
+import shutil
+import traceback
 import pandas as pd
+from matplotlib.figure import Figure
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.units import inch
 from reportlab.lib import colors
 
-def generate_weekly_report_pdf(file_path, week_start_date, weekly_data_df, config):
+from data.data_handler import DATA_DIR
+from utils.intervals import week_edges, split_activities
+from utils.deep_work import frame_daily_streaks, productive_mask
+from utils.report_cache import ReportCache, make_cache_key
+from utils.metrics import timed
+
+REPORT_CACHE_DIR = os.path.join(DATA_DIR, 'report_cache')
+
+# Anything that changes how the chart or the PDF looks must be part of its cache key
+CHART_STYLE = {'figsize': (8, 4), 'dpi': 300, 'color': '#4CAF50', 'ylabel': "Productive Time (Hours)", 'title': "Productive Time per Day"}
+# Bump when the PDF layout changes so stale cached reports are not reused
+REPORT_LAYOUT_VERSION = 2
+
+def summarize_week(week_start_date, weekly_data_df, config):
+    """Computes the aggregates a weekly report is built from."""
+    productive_df = weekly_data_df[productive_mask(weekly_data_df['app_name'].astype(str), config.get('productivity_apps', []))]
+
+    daily_productive_hours = None
+    if not productive_df.empty:
+        daily_productive_hours = productive_df.groupby(productive_df['start_time'].dt.date)['duration_seconds'].sum() / 3600
+        date_range = pd.to_datetime(pd.date_range(start=week_start_date, periods=7)).date
+        daily_productive_hours = daily_productive_hours.reindex(date_range, fill_value=0)
+
+    total_seconds = weekly_data_df['duration_seconds'].sum() if not weekly_data_df.empty else 0
+    productive_seconds = productive_df['duration_seconds'].sum() if not productive_df.empty else 0
+    return {
+        'is_empty': weekly_data_df.empty,
+        'total_seconds': float(total_seconds),
+        'productive_seconds': float(productive_seconds),
+        'focus_score': (productive_seconds / total_seconds * 100) if total_seconds > 0 else 0,
+        'daily_productive_hours': daily_productive_hours,
+        'top_apps': weekly_data_df.groupby('app_name', observed=True)['duration_seconds'].sum().nlargest(5) if not weekly_data_df.empty else None,
+        'deep_work': frame_daily_streaks(weekly_data_df, week_edges(week_start_date), config),
+    }
+
+@timed('chart.pdf_weekly')
+def render_weekly_chart_png(daily_productive_hours):
+    """Renders the productive-time-per-day bar chart to PNG bytes."""
+    # A standalone Figure renders through Agg, so no GUI backend is needed
+    fig = Figure(figsize=CHART_STYLE['figsize'])
+    ax = fig.subplots()
+    days_of_week = [d.strftime('%a') for d in daily_productive_hours.index]
+    ax.bar(days_of_week, daily_productive_hours.values, color=CHART_STYLE['color'])
+    ax.set_ylabel(CHART_STYLE['ylabel'])
+    ax.set_title(CHART_STYLE['title'])
+    fig.tight_layout()
+
+    img_buffer = io.BytesIO()
+    fig.savefig(img_buffer, format='png', dpi=CHART_STYLE['dpi'])
+    return img_buffer.getvalue()
+
+def _open_cache(cache_dir):
+    if not cache_dir:
+        return None
+    try:
+        return ReportCache(cache_dir)
+    except OSError:
+        return None
+
+def generate_weekly_report_pdf(file_path, week_start_date, weekly_data_df, config, progress_callback=None, cache_dir=REPORT_CACHE_DIR):
     """
     Generates a formatted PDF report for the selected week's productivity data.
+    progress_callback, if given, is called as progress_callback(percent, message).
+    Rendered charts and finished reports are cached in cache_dir (None disables it).
     """
+    report_progress = progress_callback or (lambda percent, message: None)
+    report_progress(5, "Preparing data...")
+
+    # Only count time inside the week, credited to the day it was spent
+    weekly_data_df = split_activities(weekly_data_df, week_edges(week_start_date))
+    summary = summarize_week(week_start_date, weekly_data_df, config)
+    daily_productive_hours = summary['daily_productive_hours']
+
+    # --- Reuse a previously built report for identical inputs ---
+    cache = _open_cache(cache_dir)
+    report_key = make_cache_key(
+        'report', REPORT_LAYOUT_VERSION, CHART_STYLE, week_start_date.isoformat(), config.get('productivity_apps', []),
+        {k: summary[k] for k in ('is_empty', 'total_seconds', 'productive_seconds')},
+        daily_productive_hours, summary['top_apps'], summary['deep_work'],
+        config['deep_work_min_minutes'], config['deep_work_max_interruption_seconds']
+    )
+    cached_report = cache.get_path(report_key, '.pdf') if cache else None
+    if cached_report:
+        shutil.copyfile(cached_report, file_path)
+        report_progress(100, "Done (cached)")
+        return
+
     doc = SimpleDocTemplate(file_path, pagesize=letter)
     story = []
     styles = getSampleStyleSheet()
@@ -21,59 +108,35 @@ def generate_weekly_report_pdf(file_path, week_start_date, weekly_data_df, confi
     story.append(Spacer(1, 0.2 * inch))
 
     # --- 2. Summary Metrics ---
-    if not weekly_data_df.empty:
-        productive_apps = config.get('productivity_apps', [])
-        productive_mask = weekly_data_df['app_name'].str.contains('|'.join(productive_apps), case=False, na=False)
-        
-        total_seconds = weekly_data_df['duration_seconds'].sum()
-        productive_seconds = weekly_data_df[productive_mask]['duration_seconds'].sum()
-        focus_score = (productive_seconds / total_seconds * 100) if total_seconds > 0 else 0
-
-        summary_text = f"<b>Total Time Tracked:</b> {str(datetime.timedelta(seconds=int(total_seconds)))}<br/>"
-        summary_text += f"<b>Total Productive Time:</b> {str(datetime.timedelta(seconds=int(productive_seconds)))}<br/>"
-        summary_text += f"<b>Weekly Focus Score:</b> {focus_score:.1f}%"
+    if not summary['is_empty']:
+        summary_text = f"<b>Total Time Tracked:</b> {str(datetime.timedelta(seconds=int(summary['total_seconds'])))}<br/>"
+        summary_text += f"<b>Total Productive Time:</b> {str(datetime.timedelta(seconds=int(summary['productive_seconds'])))}<br/>"
+        summary_text += f"<b>Weekly Focus Score:</b> {summary['focus_score']:.1f}%"
         story.append(Paragraph(summary_text, styles['Normal']))
         story.append(Spacer(1, 0.2 * inch))
-    
+
     # --- 3. Matplotlib Chart Image ---
-    # Create the chart in memory
-    from ui.pages.weekly_report_page import WeeklyReportPage # Import locally to avoid circular deps
-    
-    # We need a temporary figure to generate the chart
-    from matplotlib.figure import Figure
-    fig = Figure(figsize=(8, 4))
-    ax = fig.subplots()
-    
-    # Re-generate the bar chart logic here
-    productive_df = weekly_data_df[productive_mask]
-    if not productive_df.empty:
-        daily_productive_time = productive_df.groupby(productive_df['start_time'].dt.date)['duration_seconds'].sum() / 3600
-        date_range = pd.to_datetime(pd.date_range(start=week_start_date, periods=7)).date
-        daily_productive_time = daily_productive_time.reindex(date_range, fill_value=0)
-        days_of_week = [d.strftime('%a') for d in daily_productive_time.index]
-        
-        ax.bar(days_of_week, daily_productive_time.values, color='#4CAF50')
-        ax.set_ylabel("Productive Time (Hours)")
-        ax.set_title("Productive Time per Day")
-        fig.tight_layout()
-
-        # Save chart to an in-memory buffer
-        img_buffer = io.BytesIO()
-        fig.savefig(img_buffer, format='png', dpi=300)
-        img_buffer.seek(0)
-        
-        story.append(Image(img_buffer, width=6*inch, height=3*inch))
+    report_progress(20, "Rendering chart...")
+    if daily_productive_hours is not None:
+        chart_key = make_cache_key('chart', CHART_STYLE, daily_productive_hours)
+        chart_png = cache.get(chart_key, '.png') if cache else None
+        if chart_png is None:
+            chart_png = render_weekly_chart_png(daily_productive_hours)
+            if cache:
+                cache.put(chart_key, '.png', chart_png)
+
+        story.append(Image(io.BytesIO(chart_png), width=6*inch, height=3*inch))
         story.append(Spacer(1, 0.2 * inch))
 
     # --- 4. Top 5 Applications Table ---
-    if not weekly_data_df.empty:
+    report_progress(70, "Building tables...")
+    if not summary['is_empty']:
         story.append(Paragraph("Top 5 Applications Used", styles['h2']))
-        top_5_apps = weekly_data_df.groupby('app_name')['duration_seconds'].sum().nlargest(5)
-        
+
         table_data = [['Rank', 'Application', 'Time Spent']]
-        for i, (app, duration) in enumerate(top_5_apps.items()):
+        for i, (app, duration) in enumerate(summary['top_apps'].items()):
             table_data.append([i + 1, app, str(datetime.timedelta(seconds=int(duration)))])
-            
+
         t = Table(table_data, colWidths=[0.5*inch, 4*inch, 1.5*inch])
         t.setStyle(TableStyle([
             ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
@@ -85,6 +148,64 @@ def generate_weekly_report_pdf(file_path, week_start_date, weekly_data_df, confi
             ('GRID', (0, 0), (-1, -1), 1, colors.black)
         ]))
         story.append(t)
+        story.append(Spacer(1, 0.2 * inch))
+
+    # --- 5. Deep Work Table ---
+    deep_work = summary['deep_work']
+    if deep_work['streaks'].sum() > 0:
+        story.append(Paragraph("Deep Work", styles['h2']))
+        story.append(Paragraph(
+            f"Productive streaks of at least {config['deep_work_min_minutes']} minutes, "
+            f"ignoring interruptions shorter than {config['deep_work_max_interruption_seconds']} seconds.",
+            styles['Normal']
+        ))
+        story.append(Spacer(1, 0.1 * inch))
+
+        table_data = [['Day', 'Streaks', 'Deep Work', 'Longest Streak']]
+        for day, row in deep_work.iterrows():
+            table_data.append([day.strftime('%a %Y-%m-%d'), int(row['streaks']),
+                               str(datetime.timedelta(seconds=int(row['deep_work_seconds']))),
+                               str(datetime.timedelta(seconds=int(row['longest_seconds'])))])
+        table_data.append(['Week', int(deep_work['streaks'].sum()),
+                           str(datetime.timedelta(seconds=int(deep_work['deep_work_seconds'].sum()))),
+                           str(datetime.timedelta(seconds=int(deep_work['longest_seconds'].max())))])
+
+        t = Table(table_data, colWidths=[2*inch, 1*inch, 1.5*inch, 1.5*inch])
+        t.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+        story.append(t)
 
     # --- Build the PDF ---
-    doc.build(story)
\ No newline at end of file
+    report_progress(85, "Writing PDF...")
+    doc.build(story)
+    if cache:
+        cache.put_file(report_key, '.pdf', file_path)
+    report_progress(100, "Done")
+
+def export_pdf_in_process(file_path, week_start_date, weekly_data_df, config, message_queue):
+    """
+    Entry point for a worker process. Writes to a temporary file that is renamed on
+    success and reports ('progress', percent, message), ('done', path) or
+    ('error', message) tuples on message_queue.
+    """
+    temp_path = file_path + '.part'
+    try:
+        generate_weekly_report_pdf(
+            temp_path, week_start_date, weekly_data_df, config,
+            progress_callback=lambda percent, message: message_queue.put(('progress', percent, message))
+        )
+        os.replace(temp_path, file_path)
+        message_queue.put(('done', file_path))
+    except Exception as e:
+        traceback.print_exc()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        message_queue.put(('error', str(e)))
@@ -0,0 +1,154 @@
+import os
+import sys
+import pstats
+import cProfile
+import argparse
+import datetime
+import threading
+from collections import Counter
+
+from data.data_handler import DATA_DIR
+
+SAMPLE_INTERVAL_SECONDS = 0.005
+
+def _frame_label(code):
+    # Collapsed stacks use ';' between frames, so keep it out of the labels
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(';', ',')
+
+class StackSampler(threading.Thread):
+    """
+    Samples the stacks of every other thread every `interval` seconds and counts them
+    as collapsed stacks ("thread;outer;...;inner"), the input format of flame graph
+    tools. Costs one sys._current_frames() walk per sample and nothing in between.
+    """
+    def __init__(self, interval=SAMPLE_INTERVAL_SECONDS):
+        super().__init__(name="StackSampler", daemon=True)
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        labels = {}
+        while not self._stop_event.wait(self.interval):
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == self.ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = _frame_label(code)
+                    stack.append(label)
+                    frame = frame.f_back
+                stack.append(thread_names.get(thread_id, f"thread-{thread_id}"))
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+class Profiler:
+    """
+    An on-demand profile of the running tracker: cProfile on the thread that starts
+    it (the GUI thread) plus a StackSampler over all threads. stop() writes
+    profile_<timestamp>.prof and profile_<timestamp>.collapsed to output_dir.
+    """
+    def __init__(self, output_dir=DATA_DIR, interval=SAMPLE_INTERVAL_SECONDS):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.started_at = None
+        self._profile = None
+        self._sampler = None
+
+    @property
+    def running(self):
+        return self._sampler is not None
+
+    def start(self):
+        if self.running:
+            return
+        self.started_at = datetime.datetime.now()
+        self._sampler = StackSampler(self.interval)
+        self._sampler.start()
+        self._profile = cProfile.Profile()
+        try:
+            self._profile.enable()
+        except ValueError:
+            # Another profiler is already active on this thread; rely on the sampler
+            self._profile = None
+
+    def stop(self):
+        """Stops profiling and returns the paths of the files written."""
+        if not self.running:
+            return []
+        if self._profile:
+            self._profile.disable()
+        self._sampler.stop()
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, f"profile_{self.started_at:%Y%m%d_%H%M%S}")
+        paths = []
+        if self._profile:
+            self._profile.dump_stats(base + '.prof')
+            paths.append(base + '.prof')
+        with open(base + '.collapsed', 'w', encoding='utf-8') as f:
+            for stack, count in self._sampler.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        paths.append(base + '.collapsed')
+        self._profile = None
+        self._sampler = None
+        return paths
+
+# --- Reading saved profiles ---
+
+def load_collapsed(path):
+    """Returns {stack: count} from a collapsed-stack file."""
+    stacks = Counter()
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            stack, _, count = line.rstrip('\n').rpartition(' ')
+            if stack and count.isdigit():
+                stacks[stack] += int(count)
+    return stacks
+
+def top_functions(stacks, limit=20):
+    """
+    Returns [(function, self_samples, total_samples)] for the `limit` functions with
+    the most samples on top of the stack. total counts samples with the function
+    anywhere in the stack (once per sample, so recursion is not double counted).
+    """
+    self_counts, total_counts = Counter(), Counter()
+    for stack, count in stacks.items():
+        # The first element is the thread name
+        frames = stack.split(';')[1:]
+        if not frames:
+            continue
+        self_counts[frames[-1]] += count
+        for frame in set(frames):
+            total_counts[frame] += count
+    return [(function, samples, total_counts[function]) for function, samples in self_counts.most_common(limit)]
+
+def print_report(path, limit=20, sort='cumulative'):
+    if path.endswith('.prof'):
+        pstats.Stats(path).strip_dirs().sort_stats(sort).print_stats(limit)
+        return
+    stacks = load_collapsed(path)
+    samples = sum(stacks.values())
+    print(f"{samples:,} samples in {path}\n")
+    print(f"{'Self %':>8}{'Total %':>9}  Function")
+    for function, self_samples, total_samples in top_functions(stacks, limit):
+        print(f"{self_samples / samples * 100:>8.1f}{total_samples / samples * 100:>9.1f}  {function}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the hottest functions of a profile saved from the tray menu.")
+    parser.add_argument('profile', help="A tracker_data/profile_*.prof or profile_*.collapsed file.")
+    parser.add_argument('--top', type=int, default=20, help="Number of functions to show.")
+    parser.add_argument('--sort', default='cumulative', help="pstats sort key for .prof files (e.g. cumulative, tottime).")
+    args = parser.parse_args()
+    print_report(args.profile, args.top, args.sort)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+import os
+import json
+import hashlib
+import tempfile
+import pandas as pd
+
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+def make_cache_key(*parts):
+    """
+    Returns a stable hex digest for the given parts. DataFrames and Series are
+    hashed by content; everything else must be JSON-serialisable.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (pd.DataFrame, pd.Series)):
+            digest.update(pd.util.hash_pandas_object(part, index=True).values.tobytes())
+            digest.update(repr(list(part.columns) if isinstance(part, pd.DataFrame) else part.name).encode())
+        else:
+            digest.update(json.dumps(part, sort_keys=True, default=str).encode())
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+class ReportCache:
+    """
+    A content-addressed disk cache for rendered report artifacts.
+    Entries are files named '<key><suffix>'; their modification time is refreshed
+    on every hit, and the least recently used ones are evicted once the total
+    size exceeds max_bytes.
+    """
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key, suffix):
+        return os.path.join(self.cache_dir, f"{key}{suffix}")
+
+    def get_path(self, key, suffix):
+        """Returns the path of a cached entry, or None on a miss."""
+        path = self._path(key, suffix)
+        try:
+            os.utime(path)
+            return path
+        except FileNotFoundError:
+            return None
+
+    def get(self, key, suffix):
+        """Returns the cached bytes, or None on a miss."""
+        path = self.get_path(key, suffix)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as f: return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, suffix, data):
+        """Stores data atomically under key, then enforces the size cap."""
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f: f.write(data)
+            os.replace(temp_path, self._path(key, suffix))
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.evict()
+
+    def put_file(self, key, suffix, source_path):
+        with open(source_path, 'rb') as f:
+            self.put(key, suffix, f.read())
+
+    def evict(self):
+        """Deletes least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        total_size = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if not entry.is_file() or entry.name.endswith('.tmp'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_size += stat.st_size
+
+        if total_size <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
+            if total_size <= self.max_bytes:
+                break
@@ -0,0 +1,47 @@
+import re
+import bisect
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+def tokenize(text):
+    return _TOKEN_PATTERN.findall(text.lower())
+
+class TokenIndex:
+    """
+    Incremental inverted index from lower-cased word tokens to integer document ids.
+    Every query token is matched as a prefix, so results update while the user types:
+    'git proj' finds 'GitHub - my-project'.
+    """
+    def __init__(self):
+        self._postings = {}
+        self._sorted_tokens = []
+        self._sorted_tokens_stale = False
+
+    def add(self, doc_id, text):
+        for token in set(tokenize(text)):
+            postings = self._postings.get(token)
+            if postings is None:
+                self._postings[token] = postings = []
+                self._sorted_tokens_stale = True
+            postings.append(doc_id)
+
+    def _tokens_with_prefix(self, prefix):
+        if self._sorted_tokens_stale:
+            self._sorted_tokens = sorted(self._postings)
+            self._sorted_tokens_stale = False
+        position = bisect.bisect_left(self._sorted_tokens, prefix)
+        while position < len(self._sorted_tokens) and self._sorted_tokens[position].startswith(prefix):
+            yield self._sorted_tokens[position]
+            position += 1
+
+    def search(self, query):
+        """Returns the set of ids whose text has a token starting with every query token."""
+        matches = None
+        for query_token in tokenize(query):
+            token_matches = set()
+            for token in self._tokens_with_prefix(query_token):
+                token_matches.update(self._postings[token])
+            matches = token_matches if matches is None else matches & token_matches
+            if not matches:
+                return set()
+        return matches or set()